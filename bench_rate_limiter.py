@@ -0,0 +1,79 @@
+"""
+Нагрузочная проверка лимитеров админ-панели (utils/rate_limiter.py).
+
+    python bench_rate_limiter.py --backend memory
+    python bench_rate_limiter.py --backend redis --redis-url redis://localhost:6379/15
+
+Каждый ключ получает --hits запросов подряд (быстрее окна), поэтому пройти
+должно ровно max_requests на ключ — это проверяется в конце.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from utils.rate_limiter import RateLimiter, RedisRateLimiter
+
+
+async def run(limiter, keys: int, hits: int, concurrency: int) -> tuple[int, int, float]:
+    allowed = 0
+    denied = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def hammer(key: int):
+        nonlocal allowed, denied
+        async with semaphore:
+            for _ in range(hits):
+                if await limiter.hit(key):
+                    denied += 1
+                else:
+                    allowed += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(hammer(key) for key in range(keys)))
+    return allowed, denied, time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("memory", "redis"), default="memory")
+    parser.add_argument("--redis-url", default=None, help="по умолчанию REDIS_URL из конфига")
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--hits", type=int, default=50)
+    parser.add_argument("--max-requests", type=int, default=20)
+    parser.add_argument("--window", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    redis = None
+    if args.backend == "redis":
+        from redis.asyncio import Redis
+        if args.redis_url is None:
+            from config import config
+            args.redis_url = config.REDIS_URL
+        redis = Redis.from_url(args.redis_url)
+        prefix = f"bench_ratelimit:{uuid.uuid4().hex[:8]}"
+        limiter = RedisRateLimiter(redis, args.max_requests, args.window, prefix)
+    else:
+        limiter = RateLimiter(max_requests=args.max_requests, window=args.window, max_keys=args.keys)
+
+    try:
+        allowed, denied, elapsed = await run(limiter, args.keys, args.hits, args.concurrency)
+    finally:
+        if redis is not None:
+            keys = [key async for key in redis.scan_iter(match=f"{prefix}:*")]
+            if keys:
+                await redis.delete(*keys)
+            await redis.aclose()
+
+    total = allowed + denied
+    expected = args.keys * min(args.hits, args.max_requests)
+    print(f"backend={args.backend} keys={args.keys} hits/key={args.hits} limit={args.max_requests}/{args.window}s")
+    print(f"{total} checks in {elapsed:.3f}s: {total / elapsed:,.0f} ops/s, {elapsed / total * 1e6:.1f} us/op")
+    print(f"allowed={allowed} denied={denied} expected_allowed={expected}")
+    if allowed != expected:
+        raise SystemExit(f"Unexpected number of allowed requests: {allowed} != {expected}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
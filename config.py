@@ -10,6 +10,65 @@ class Settings(BaseSettings):
     REDIS_URL: str
     SECRET_KEY: str
 
+    # Служебный чат/канал, куда один раз публикуется контент рассылки
+    # (если не задан — копируем прямо из чата админа с ботом)
+    BROADCAST_STAGING_CHAT_ID: int | None = None
+
+    # Пул соединений: профиль процесса (bot / worker / broadcast, см. database/pool.py)
+    DB_POOL_PROFILE: str = "bot"
+    # Переопределения отдельных параметров профиля (None — как в профиле)
+    DB_POOL_SIZE: int | None = None
+    DB_MAX_OVERFLOW: int | None = None
+    DB_POOL_TIMEOUT: int | None = None
+    DB_POOL_RECYCLE: int | None = None
+    # Проверка соединения при каждой выдаче из пула (лишний round trip)
+    DB_POOL_PRE_PING: bool = False
+    # Подключение через pgbouncer в transaction-режиме: без кеша подготовленных выражений
+    DB_PGBOUNCER: bool = False
+    # Как часто писать метрики пула в лог, сек (0 — не писать)
+    DB_POOL_METRICS_INTERVAL: int = 60
+
+    # Реплика для аналитики и админских выборок (если не задана — всё идет в основную БД)
+    DB_REPLICA_DNS: str | None = None
+    # Допустимое отставание реплики, сек; при большем — запросы уходят в основную БД
+    DB_REPLICA_MAX_LAG_SECONDS: float = 30.0
+    # Как часто перепроверять доступность и отставание реплики, сек
+    DB_REPLICA_CHECK_INTERVAL: int = 10
+
+    # Через сколько дней после завершения розыгрыша участники уходят в архивную таблицу
+    PARTICIPANTS_ARCHIVE_AFTER_DAYS: int = 30
+
+    # Версия подписи реферальных токенов (повысить — новые ссылки подписываются новой версией)
+    REF_TOKEN_VERSION: int = 1
+    # Самая старая версия, которую еще принимаем (поднять до текущей — отозвать старые ссылки)
+    REF_TOKEN_MIN_VERSION: int = 1
+
+    # Хранилище лимита запросов админ-панели: memory (один процесс) или redis (общий для всех процессов)
+    ADMIN_RATE_LIMIT_BACKEND: str = "memory"
+
+    # Кеш проверок подписки: TTL по исходу проверки, сек
+    SUB_CACHE_TTL_SUBSCRIBED: int = 300
+    SUB_CACHE_TTL_NOT_SUBSCRIBED: int = 30
+    SUB_CACHE_TTL_FORBIDDEN: int = 60
+    SUB_CACHE_TTL_NOT_FOUND: int = 60
+    # Прочие ошибки Telegram — коротко, чтобы сломанный канал не дергался на каждом вступлении
+    SUB_CACHE_TTL_ERROR: int = 10
+    # Случайный разброс TTL (доля), чтобы ключи после вирусного поста не истекали разом
+    SUB_CACHE_JITTER: float = 0.1
+    # Сколько еще отдавать устаревшее "подписан", пока в фоне идет перепроверка, сек
+    SUB_CACHE_STALE_SECONDS: int = 600
+    # Предохранитель канала: столько Forbidden за окно — и канал не проверяем cooldown секунд
+    SUB_BREAKER_THRESHOLD: int = 5
+    SUB_BREAKER_WINDOW: int = 60
+    SUB_BREAKER_COOLDOWN: int = 120
+
+    # Обслуживание: как часто запускать, мин (0 — выключено)
+    MAINTENANCE_INTERVAL_MINUTES: int = 60
+    # Через сколько часов незавершенная реферальная связка считается брошенной
+    PENDING_REFERRAL_TTL_HOURS: int = 48
+    # VACUUM (ANALYZE) для горячих таблиц, у которых мертвых строк больше этой доли
+    MAINTENANCE_VACUUM_DEAD_RATIO: float = 0.2
+
     @field_validator("ADMIN_IDS", mode="before")
     @classmethod
     def parse_admin_ids(cls, v):
@@ -11,28 +11,26 @@ from database.requests.giveaway_repo import (
     get_giveaway_by_id,
     get_active_giveaways,
     get_required_channels,
-    get_expired_active_giveaways
+    get_expired_active_giveaways,
+    add_winners
 )
 from database.requests.participant_repo import get_weighted_candidates, get_participants_count
-from database.models.winner import Winner
+from database.requests.premium_repo import save_giveaway_history
 from core.tools.formatters import format_giveaway_caption
 from keyboards.inline.participation import join_keyboard, results_keyboard
-from core.services.checker_service import is_user_subscribed
+from core.services.checker_service import are_user_subscribed
+from core.services.reachability_service import ReachabilityBuffer, classify_delivery_error, OUTCOME_SENT
+from core.services.participation_summary_service import invalidate_giveaway_summaries
+from middlewares.request_coalescing import single_flight
 
 logger = logging.getLogger(__name__)
 
 async def check_subscription_all(bot: Bot, user_id: int, main_channel_id: int, required_channels: list) -> bool:
     try:
-        # 1. Основной канал
-        if not await is_user_subscribed(bot, main_channel_id, user_id):
-            return False
-
-        # 2. Спонсоры
-        for req in required_channels:
-            if not await is_user_subscribed(bot, req.channel_id, user_id):
-                return False
-        
-        return True
+        # Основной канал и спонсоры — одной пакетной проверкой
+        channel_ids = [main_channel_id] + [req.channel_id for req in required_channels]
+        statuses = await are_user_subscribed(bot, user_id, channel_ids)
+        return all(statuses.values())
     except Exception as e:
         logger.error(f"Sub check failed for user {user_id}: {e}")
         return False
@@ -49,6 +47,7 @@ async def finish_giveaway_task(giveaway_id: int):
         token=config.BOT_TOKEN.get_secret_value(),
         default=DefaultBotProperties(parse_mode="HTML")
     )
+    bot.session.middleware(single_flight)
     
     # Ключ блокировки для "Светофора"
     LOCK_KEY = "system:high_load"
@@ -80,6 +79,9 @@ async def finish_giveaway_task(giveaway_id: int):
             
             # Список ID, которые мы уже проверили (чтобы не проверять дважды)
             checked_ids = set()
+            
+            # Исходы доставки (проверка "живости" и уведомления победителям)
+            reachability = ReachabilityBuffer()
 
             # --- ШАГ А: Проверка "Блатного" (Predetermined) ---
             if gw.predetermined_winner_id:
@@ -87,8 +89,8 @@ async def finish_giveaway_task(giveaway_id: int):
                 checked_ids.add(pid)
                 
                 # Проверяем, участвует ли он вообще
-                from database.requests.participant_repo import is_participant_active
-                is_participant = await is_participant_active(session, pid, gw.id)
+                from core.services.membership_service import is_participant as check_participant
+                is_participant = await check_participant(session, pid, gw.id)
                 
                 if is_participant:
                     # Проверяем подписку
@@ -133,7 +135,8 @@ async def finish_giveaway_task(giveaway_id: int):
                             # Если набрали комплект - выходим из цикла for
                             if len(final_winners_ids) == target_winners_count:
                                 break
-                        except Exception:
+                        except Exception as e:
+                            reachability.record(uid, classify_delivery_error(e))
                             logging.info(f"User {uid} is dead/blocked bot. Skipping.")
                 
                 # Небольшая пауза между батчами, чтобы не убить CPU/DB
@@ -141,11 +144,14 @@ async def finish_giveaway_task(giveaway_id: int):
 
             # --- ШАГ В: Сохранение и Публикация ---
             gw.status = "finished"
-            
-            for uid in final_winners_ids:
-                session.add(Winner(giveaway_id=gw.id, user_id=uid))
-            
+
+            # Победители и история — в той же транзакции, что и смена статуса
+            await add_winners(session, gw.id, final_winners_ids)
+            await save_giveaway_history(session, gw.id, datetime.utcnow())
+
             await session.commit()
+            # Счетчики "активные/завершенные/выигрыши" у владельца и участников изменились
+            await invalidate_giveaway_summaries(session, gw.id, gw.owner_id)
             
             # Формирование текста
             if not final_winners_ids:
@@ -170,9 +176,10 @@ async def finish_giveaway_task(giveaway_id: int):
                                 f"Организатор розыгрыша: {owner_mention}\n"
                                 f"Свяжитесь с ним(ней) для получения приза!"
                             )
+                            reachability.record(uid, OUTCOME_SENT)
                         except Exception as e:
+                            reachability.record(uid, classify_delivery_error(e))
                             logger.info(f"Failed to send notification to winner {uid}: {e}")
-                            pass
 
                         if chat.username:
                             user_link = f"@{chat.username}"
@@ -224,6 +231,13 @@ async def finish_giveaway_task(giveaway_id: int):
                 # Не прерываем выполнение, просто логируем
             except Exception as e:
                 logger.error(f"Error publishing results: {e}")
+            
+            # Сохраняем статусы доставки одним пакетом
+            try:
+                await reachability.flush(session)
+                await session.commit()
+            except Exception as e:
+                logger.error(f"Failed to save reachability for GW {gw.id}: {e}")
 
     except Exception as e:
         logging.error(f"🔥 Critical error finishing GW {giveaway_id}: {e}")
@@ -284,6 +298,7 @@ async def smart_update_giveaway_task():
         token=bot_config.BOT_TOKEN.get_secret_value(),
         default=DefaultBotProperties(parse_mode="HTML")
     )
+    bot.session.middleware(single_flight)
 
     # Импорты для Redis
     from redis.asyncio import Redis
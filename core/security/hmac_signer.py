@@ -19,4 +19,18 @@ def sign_data(action: str, entity_id: int, admin_id: int) -> str:
 def verify_signature(action: str, entity_id: int, admin_id: int, received_sig: str) -> bool:
     """Проверяет подпись. Защищает от подмены ID и User ID"""
     expected_sig = sign_data(action, entity_id, admin_id)
-    return hmac.compare_digest(expected_sig, received_sig)
\ No newline at end of file
+    return hmac.compare_digest(expected_sig, received_sig)
+
+def sign_payload(payload: str) -> str:
+    """Подпись произвольной строки (курсоры пагинации в callback_data)"""
+    return _generate_hash(f"payload:{payload}")
+
+def verify_payload(payload: str, received_sig: str) -> bool:
+    return hmac.compare_digest(sign_payload(payload), received_sig)
+
+def sign_ref(user_id: int, version: int) -> str:
+    """Подпись реферального токена: версия входит в подпись, чтобы ее нельзя было подменить"""
+    return _generate_hash(f"ref:{version}:{user_id}")
+
+def verify_ref(user_id: int, version: int, received_sig: str) -> bool:
+    return hmac.compare_digest(sign_ref(user_id, version), received_sig)
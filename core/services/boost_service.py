@@ -1,9 +1,8 @@
 from typing import Optional
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from database.models.participant import Participant
 from database.requests.participant_repo import increment_ticket
+from core.services.membership_service import is_participant
 from database.requests.boost_repo import add_boost_ticket, user_has_boost_type
 
 
@@ -25,14 +24,7 @@ class BoostService:
         """
         try:
             # Проверяем, существует ли участник в розыгрыше
-            stmt = select(Participant).where(
-                Participant.user_id == user_id,
-                Participant.giveaway_id == giveaway_id
-            )
-            result = await session.execute(stmt)
-            participant = result.scalar_one_or_none()
-            
-            if not participant:
+            if not await is_participant(session, user_id, giveaway_id):
                 return False
             
             # Проверяем, не получал ли пользователь уже этот тип буста
@@ -63,14 +55,7 @@ class BoostService:
         """
         try:
             # Проверяем, является ли пользователь участником розыгрыша
-            stmt = select(Participant).where(
-                Participant.user_id == user_id,
-                Participant.giveaway_id == giveaway_id
-            )
-            result = await session.execute(stmt)
-            participant = result.scalar_one_or_none()
-            
-            if not participant:
+            if not await is_participant(session, user_id, giveaway_id):
                 return False, "Пользователь не участвует в розыгрыше"
             
             # Проверяем, не получал ли пользователь уже этот тип буста
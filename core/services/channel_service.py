@@ -6,7 +6,7 @@ from redis.asyncio import Redis
 from config import config
 
 from database.requests.giveaway_repo import get_required_channels
-from core.services.checker_service import is_user_subscribed
+from core.services.checker_service import are_user_subscribed
 
 
 logger = logging.getLogger(__name__)
@@ -56,17 +56,12 @@ class ChannelService:
         if required_channels is None:
             required_channels = []
 
-        results = {}
+        channel_ids = [getattr(channel, 'channel_id', channel) for channel in required_channels]  # Поддержка разных форматов
+        statuses = await are_user_subscribed(bot, user_id, [main_channel_id] + channel_ids, force_check)
 
-        # Проверяем основной канал
-        main_subscribed = await is_user_subscribed(bot, main_channel_id, user_id, force_check)
-        results['main'] = main_subscribed
-
-        # Проверяем дополнительные каналы
-        for channel in required_channels:
-            channel_id = getattr(channel, 'channel_id', channel)  # Поддержка разных форматов
-            sub_result = await is_user_subscribed(bot, channel_id, user_id, force_check)
-            results[channel_id] = sub_result
+        results = {'main': statuses[main_channel_id]}
+        for channel_id in channel_ids:
+            results[channel_id] = statuses[channel_id]
 
         return results
 
@@ -84,9 +79,14 @@ class ChannelService:
         reqs = await get_required_channels(session, giveaway_id)
         channels_status = []
 
+        # Все подписки одной пакетной проверкой
+        statuses = await are_user_subscribed(
+            bot, user_id, [giveaway_id] + [r.channel_id for r in reqs], force_check=force_check
+        )
+
         # 1. Основной канал
         try:
-            is_sub = await is_user_subscribed(bot, giveaway_id, user_id, force_check=force_check)
+            is_sub = statuses[giveaway_id]
             chat_info = await ChannelService.get_chat_info_safe(bot, giveaway_id)
             if chat_info:
                 link = chat_info['invite_link'] or (f"https://t.me/{chat_info['username']}" if chat_info['username'] else None)
@@ -102,7 +102,7 @@ class ChannelService:
 
         # 2. Спонсорские каналы
         for r in reqs:
-            is_sub = await is_user_subscribed(bot, r.channel_id, user_id, force_check=force_check)
+            is_sub = statuses[r.channel_id]
 
             # У спонсоров ссылка хранится в БД, но проверим на None
             link = r.channel_link if r.channel_link and len(r.channel_link) > 5 else None
@@ -1,4 +1,8 @@
+import asyncio
 import logging
+import random
+import time
+from collections import Counter
 from aiogram import Bot
 from aiogram.exceptions import TelegramForbiddenError, TelegramBadRequest
 from redis.asyncio import Redis
@@ -8,66 +12,232 @@ from config import config
 redis = Redis.from_url(config.REDIS_URL)
 logger = logging.getLogger(__name__)
 
-async def is_user_subscribed(bot: Bot, channel_id: int, user_id: int, force_check: bool = False) -> bool:
+# Исходы проверки (от них зависит TTL кеша)
+OUTCOME_SUBSCRIBED = "subscribed"
+OUTCOME_NOT_SUBSCRIBED = "not_subscribed"
+OUTCOME_FORBIDDEN = "forbidden"
+OUTCOME_NOT_FOUND = "not_found"
+OUTCOME_ERROR = "error"
+
+
+class SubscriptionCachePolicy:
     """
-    Проверяет подписку пользователя на канал.
-    :param force_check: Если True, игнорирует кеш и делает запрос к Telegram.
+    Политика кеша sub_status:* из настроек SUB_CACHE_* / SUB_BREAKER_*.
+    В кеше лежит "флаг:свежо_до" (unix-время); положительный результат
+    живет в Redis дольше свежести на SUB_CACHE_STALE_SECONDS и в этом
+    промежутке отдается сразу, а перепроверяется в фоне.
     """
-    cache_key = f"sub_status:{channel_id}:{user_id}"
-    
-    # 1. Если НЕ принудительная проверка, пробуем достать из кеша
-    if not force_check:
-        try:
-            cached_status = await redis.get(cache_key)
-            if cached_status is not None:
-                return cached_status.decode() == "1"
-        except Exception as e:
-            logger.warning(f"Redis cache error for {cache_key}: {e}")
-            # Если кеш недоступен, продолжаем с запросом к Telegram
-
-    # 2. Спрашиваем у Telegram
+
+    def __init__(self):
+        self.ttls = {
+            OUTCOME_SUBSCRIBED: config.SUB_CACHE_TTL_SUBSCRIBED,
+            OUTCOME_NOT_SUBSCRIBED: config.SUB_CACHE_TTL_NOT_SUBSCRIBED,
+            OUTCOME_FORBIDDEN: config.SUB_CACHE_TTL_FORBIDDEN,
+            OUTCOME_NOT_FOUND: config.SUB_CACHE_TTL_NOT_FOUND,
+            OUTCOME_ERROR: config.SUB_CACHE_TTL_ERROR,
+        }
+        self.jitter = config.SUB_CACHE_JITTER
+        self.stale_seconds = config.SUB_CACHE_STALE_SECONDS
+
+    def fresh_ttl(self, outcome: str) -> int:
+        ttl = self.ttls[outcome]
+        if ttl and self.jitter:
+            ttl = int(ttl * random.uniform(1 - self.jitter, 1 + self.jitter))
+        return ttl
+
+    def encode(self, outcome: str) -> tuple[str, int] | None:
+        """Значение и TTL ключа в Redis (None — не кешировать)"""
+        ttl = self.fresh_ttl(outcome)
+        if ttl <= 0:
+            return None
+        flag = "1" if outcome == OUTCOME_SUBSCRIBED else "0"
+        key_ttl = ttl + self.stale_seconds if outcome == OUTCOME_SUBSCRIBED else ttl
+        return f"{flag}:{int(time.time()) + ttl}", key_ttl
+
+    @staticmethod
+    def decode(value: bytes) -> tuple[bool, bool]:
+        """(подписан, устарело)"""
+        flag, _, fresh_until = value.decode().partition(":")
+        # Старый формат без отметки ("1"/"0") считаем свежим, он доживет свой TTL
+        stale = bool(fresh_until) and int(fresh_until) < time.time()
+        return flag == "1", stale
+
+
+policy = SubscriptionCachePolicy()
+
+# Счетчики кеша с последнего отчета (процесс)
+stats: Counter = Counter()
+
+# Фоновые перепроверки устаревших записей: не больше одной на ключ
+_refreshing: set[str] = set()
+_refresh_tasks: set[asyncio.Task] = set()
+
+
+def _cache_key(channel_id: int, user_id: int) -> str:
+    return f"sub_status:{channel_id}:{user_id}"
+
+
+def _breaker_key(channel_id: int) -> str:
+    return f"sub_breaker:{channel_id}"
+
+
+def _breaker_open_key(channel_id: int) -> str:
+    return f"sub_breaker_open:{channel_id}"
+
+
+async def _fetch_subscription(bot: Bot, channel_id: int, user_id: int) -> str:
+    """Спрашивает у Telegram, возвращает исход проверки"""
     try:
         member = await bot.get_chat_member(chat_id=channel_id, user_id=user_id)
-        
+
         # Статусы, которые считаются "подписан"
         if member.status in ('creator', 'administrator', 'member', 'restricted'):
-            # Кешируем положительный результат на 5 минут
-            await safe_set_cache(cache_key, "1", 300)
-            return True
-        else:
-            # Кешируем отрицательный результат на 30 секунд
-            await safe_set_cache(cache_key, "0", 30)
-            return False
-            
+            return OUTCOME_SUBSCRIBED
+        return OUTCOME_NOT_SUBSCRIBED
+
     except TelegramForbiddenError:
         # Бот не имеет прав доступа к каналу
         logger.error(f"Bot has no access to channel {channel_id} (User: {user_id})")
-        # Кешируем отрицательный результат на короткое время, так как статус может измениться
-        await safe_set_cache(cache_key, "0", 60)
-        return False
-        
+        return OUTCOME_FORBIDDEN
+
     except TelegramBadRequest as e:
         # Некорректный запрос (например, неверный ID пользователя или канала)
         if "user not found" in str(e).lower() or "chat not found" in str(e).lower():
             logger.warning(f"User or channel not found (User: {user_id}, Channel: {channel_id})")
-            # Кешируем отрицательный результат на короткое время
-            await safe_set_cache(cache_key, "0", 60)
-            return False
-        else:
-            # Другая ошибка BadRequest
-            logger.error(f"Bad request when checking subscription (User: {user_id}, Channel: {channel_id}): {e}")
-            return False
-            
+            return OUTCOME_NOT_FOUND
+        # Другая ошибка BadRequest
+        logger.error(f"Bad request when checking subscription (User: {user_id}, Channel: {channel_id}): {e}")
+        return OUTCOME_ERROR
+
     except Exception as e:
         # Логируем ошибку, чтобы видеть в консоли, если бот не админ
         logger.error(f"Check sub error (User: {user_id}, Channel: {channel_id}): {e}")
-        return False
+        return OUTCOME_ERROR
+
 
-async def safe_set_cache(key: str, value: str, ex: int):
+async def _store(results: list[tuple[int, int, str]]):
+    """Пишет исходы (channel_id, user_id, outcome) одним pipeline и считает Forbidden для предохранителя"""
+    try:
+        forbidden = []  # (channel_id, позиция INCR в ответах pipeline)
+        async with redis.pipeline(transaction=False) as pipe:
+            position = 0
+            for channel_id, user_id, outcome in results:
+                encoded = policy.encode(outcome)
+                if encoded:
+                    value, ttl = encoded
+                    pipe.setex(_cache_key(channel_id, user_id), ttl, value)
+                    position += 1
+                if outcome == OUTCOME_FORBIDDEN:
+                    forbidden.append((channel_id, position))
+                    pipe.incr(_breaker_key(channel_id))
+                    pipe.expire(_breaker_key(channel_id), config.SUB_BREAKER_WINDOW)
+                    position += 2
+            replies = await pipe.execute()
+
+        for channel_id, pos in forbidden:
+            count = replies[pos]
+            if count >= config.SUB_BREAKER_THRESHOLD:
+                await redis.set(_breaker_open_key(channel_id), "1", ex=config.SUB_BREAKER_COOLDOWN)
+                logger.warning(f"Subscription checks for channel {channel_id} paused for {config.SUB_BREAKER_COOLDOWN}s (Forbidden x{count})")
+    except Exception as e:
+        logger.warning(f"Redis set error for sub_status: {e}")
+
+
+async def _refresh(bot: Bot, channel_id: int, user_id: int):
+    key = _cache_key(channel_id, user_id)
+    try:
+        outcome = await _fetch_subscription(bot, channel_id, user_id)
+        stats[outcome] += 1
+        # Сбой перепроверки не должен затирать устаревшее "подписан" — оно доживет свой срок
+        if outcome != OUTCOME_ERROR:
+            await _store([(channel_id, user_id, outcome)])
+    finally:
+        _refreshing.discard(key)
+
+
+def _schedule_refresh(bot: Bot, channel_id: int, user_id: int):
+    key = _cache_key(channel_id, user_id)
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+    task = asyncio.create_task(_refresh(bot, channel_id, user_id))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def are_user_subscribed(bot: Bot, user_id: int, channel_ids: list[int], force_check: bool = False) -> dict[int, bool]:
     """
-    Безопасное сохранение в кеш с обработкой ошибок
+    Проверяет подписку пользователя сразу на несколько каналов:
+    кеш и предохранители каналов читаются одним MGET, промахи идут
+    в Telegram параллельно, результаты пишутся обратно одним pipeline.
+    :param force_check: Если True, игнорирует кеш и делает запросы к Telegram.
     """
+    channel_ids = list(dict.fromkeys(channel_ids))
+    result: dict[int, bool] = {}
+    if not channel_ids:
+        return result
+
     try:
-        await redis.setex(key, ex, value)
+        keys = [_breaker_open_key(cid) for cid in channel_ids]
+        if not force_check:
+            keys += [_cache_key(cid, user_id) for cid in channel_ids]
+        values = await redis.mget(keys)
+        breakers, cached = values[:len(channel_ids)], values[len(channel_ids):]
+
+        for cid, is_open in zip(channel_ids, breakers):
+            # Канал стабильно отвечает Forbidden — не ходим в Telegram до конца паузы
+            if is_open is not None:
+                result[cid] = False
+                stats["breaker_open"] += 1
+
+        for cid, value in zip(channel_ids, cached):
+            if cid in result or value is None:
+                continue
+            is_sub, stale = policy.decode(value)
+            result[cid] = is_sub
+            if stale:
+                stats["stale"] += 1
+                _schedule_refresh(bot, cid, user_id)
+            else:
+                stats["hit"] += 1
     except Exception as e:
-        logger.warning(f"Redis set error for {key}: {e}")
\ No newline at end of file
+        logger.warning(f"Redis cache error for sub_status of user {user_id}: {e}")
+        # Если кеш недоступен, продолжаем с запросами к Telegram
+
+    # Спрашиваем у Telegram только то, чего нет в кеше
+    misses = [cid for cid in channel_ids if cid not in result]
+    if not misses:
+        return result
+    stats["miss"] += len(misses)
+
+    outcomes = await asyncio.gather(*(_fetch_subscription(bot, cid, user_id) for cid in misses))
+    for cid, outcome in zip(misses, outcomes):
+        result[cid] = outcome == OUTCOME_SUBSCRIBED
+        stats[outcome] += 1
+
+    await _store([(cid, user_id, outcome) for cid, outcome in zip(misses, outcomes)])
+    return result
+
+
+async def is_user_subscribed(bot: Bot, channel_id: int, user_id: int, force_check: bool = False) -> bool:
+    """
+    Проверяет подписку пользователя на канал.
+    :param force_check: Если True, игнорирует кеш и делает запрос к Telegram.
+    """
+    result = await are_user_subscribed(bot, user_id, [channel_id], force_check)
+    return result[channel_id]
+
+
+def get_cache_stats(reset: bool = False) -> dict:
+    """hit / stale / miss / breaker_open и исходы запросов к Telegram с последнего сброса"""
+    snapshot = dict(stats)
+    lookups = snapshot.get("hit", 0) + snapshot.get("stale", 0) + snapshot.get("miss", 0)
+    snapshot["hit_ratio"] = round((snapshot.get("hit", 0) + snapshot.get("stale", 0)) / lookups, 3) if lookups else 0.0
+    if reset:
+        stats.clear()
+    return snapshot
+
+
+async def log_cache_stats():
+    """Задача планировщика: статистика кеша подписок за интервал"""
+    logger.info(f"Subscription cache: {get_cache_stats(reset=True)}")
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import config
+from database import async_session_maker
+from database.requests.participant_repo import get_active_participant_ids, get_participant_ids_stream
+
+redis = Redis.from_url(config.REDIS_URL)
+logger = logging.getLogger(__name__)
+
+# Множество участников розыгрыша: gw_members:{id} = {user_id, ..., "*"}.
+# Служебный элемент "*" означает, что множество загружено из БД полностью —
+# без него ответ "нет" ничего не значит и решает БД.
+LOADED_MARK = "*"
+MEMBERS_TTL = 7 * 24 * 3600
+WARM_LOCK_TTL = 60
+WARM_CHUNK = 10000
+
+
+# Фоновые загрузки множеств: не больше одной на розыгрыш в процессе
+_warming: set[int] = set()
+_warm_tasks: set[asyncio.Task] = set()
+
+
+def _members_key(giveaway_id: int) -> str:
+    return f"gw_members:{giveaway_id}"
+
+
+async def _warm(giveaway_id: int):
+    """Загружает участников из БД своей сессией (одна загрузка на розыгрыш во всех процессах)"""
+    key = _members_key(giveaway_id)
+    try:
+        if not await redis.set(f"{key}:warming", "1", nx=True, ex=WARM_LOCK_TTL):
+            return
+        try:
+            async with async_session_maker() as session:
+                # SADD поверх уже записанных при вступлении — без DEL, чтобы не потерять их
+                async for batch in get_participant_ids_stream(session, giveaway_id, WARM_CHUNK):
+                    await redis.sadd(key, *batch)
+            await redis.sadd(key, LOADED_MARK)
+            await redis.expire(key, MEMBERS_TTL)
+        finally:
+            await redis.delete(f"{key}:warming")
+    except Exception as e:
+        logger.warning(f"Failed to warm membership set of giveaway {giveaway_id}: {e}")
+    finally:
+        _warming.discard(giveaway_id)
+
+
+def _schedule_warm(giveaway_id: int):
+    if giveaway_id in _warming:
+        return
+    _warming.add(giveaway_id)
+    task = asyncio.create_task(_warm(giveaway_id))
+    _warm_tasks.add(task)
+    task.add_done_callback(_warm_tasks.discard)
+
+
+async def are_participants(session: AsyncSession, giveaway_id: int, user_ids: list[int]) -> dict[int, bool]:
+    """
+    Пакетная проверка участия одним SMISMEMBER.
+    Если множество еще не загружено — загружаем его в фоне, а ответ берем из БД одним запросом.
+    """
+    if not user_ids:
+        return {}
+    key = _members_key(giveaway_id)
+    try:
+        flags = await redis.smismember(key, [LOADED_MARK, *user_ids])
+        if flags[0]:
+            return {uid: bool(flag) for uid, flag in zip(user_ids, flags[1:])}
+        _schedule_warm(giveaway_id)
+    except Exception as e:
+        logger.warning(f"Membership set unavailable for giveaway {giveaway_id}: {e}")
+
+    active = await get_active_participant_ids(session, giveaway_id, user_ids)
+    return {uid: uid in active for uid in user_ids}
+
+
+async def is_participant(session: AsyncSession, user_id: int, giveaway_id: int) -> bool:
+    result = await are_participants(session, giveaway_id, [user_id])
+    return result[user_id]
+
+
+async def add_member(giveaway_id: int, user_id: int):
+    """
+    Вызывается после COMMIT вступления (session.after_commit в хендлере):
+    в множество попадают только сохраненные участники
+    """
+    key = _members_key(giveaway_id)
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.sadd(key, user_id)
+            pipe.expire(key, MEMBERS_TTL)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to add {user_id} to membership set of giveaway {giveaway_id}: {e}")
+
+
+async def remove_member(giveaway_id: int, user_id: int):
+    try:
+        await redis.srem(_members_key(giveaway_id), user_id)
+    except Exception as e:
+        logger.warning(f"Failed to remove {user_id} from membership set of giveaway {giveaway_id}: {e}")
+
+
+async def drop_giveaway(giveaway_id: int):
+    """Удаление розыгрыша или перенос участников в архив"""
+    try:
+        await redis.delete(_members_key(giveaway_id))
+    except Exception as e:
+        logger.warning(f"Failed to drop membership set of giveaway {giveaway_id}: {e}")
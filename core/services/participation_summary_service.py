@@ -0,0 +1,66 @@
+import json
+import logging
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import config
+from database.requests.participant_repo import get_participation_summary, all_participations
+
+redis = Redis.from_url(config.REDIS_URL)
+logger = logging.getLogger(__name__)
+
+# Инвалидация идет после коммита (в хендлерах — через session.after_commit);
+# TTL — страховка на случай недоступного Redis в момент сброса
+SUMMARY_TTL = 300
+INVALIDATE_CHUNK = 1000
+
+
+def _summary_key(user_id: int) -> str:
+    return f"part_summary:{user_id}"
+
+
+async def get_summary(session: AsyncSession, user_id: int) -> dict:
+    """Счетчики хаба "Розыгрыши" из кеша или одним запросом к БД"""
+    key = _summary_key(user_id)
+    try:
+        cached = await redis.get(key)
+        if cached is not None:
+            return json.loads(cached)
+    except Exception as e:
+        logger.warning(f"Redis cache error for {key}: {e}")
+
+    summary = await get_participation_summary(session, user_id)
+    try:
+        await redis.set(key, json.dumps(summary), ex=SUMMARY_TTL)
+    except Exception as e:
+        logger.warning(f"Redis cache error for {key}: {e}")
+    return summary
+
+
+async def invalidate_summary(*user_ids: int):
+    """Сбрасывает сводку пользователей (вступление, дисквалификация, создание/удаление розыгрыша)"""
+    ids = [uid for uid in user_ids if uid]
+    try:
+        for i in range(0, len(ids), INVALIDATE_CHUNK):
+            await redis.delete(*(_summary_key(uid) for uid in ids[i:i + INVALIDATE_CHUNK]))
+    except Exception as e:
+        logger.warning(f"Failed to invalidate participation summary: {e}")
+
+
+async def giveaway_member_ids(session: AsyncSession, giveaway_id: int) -> list[int]:
+    """ID всех участников розыгрыша (включая архив) — чтобы сбросить их сводки после удаления"""
+    from sqlalchemy import select
+    p = all_participations()
+    return list((await session.scalars(select(p.c.user_id).where(p.c.giveaway_id == giveaway_id))).all())
+
+
+async def invalidate_giveaway_summaries(session: AsyncSession, giveaway_id: int, owner_id: int):
+    """Завершение розыгрыша меняет счетчики владельца и всех участников"""
+    from sqlalchemy import select
+    p = all_participations()
+    result = await session.stream_scalars(
+        select(p.c.user_id).where(p.c.giveaway_id == giveaway_id).execution_options(yield_per=INVALIDATE_CHUNK)
+    )
+    async for chunk in result.partitions(INVALIDATE_CHUNK):
+        await invalidate_summary(*chunk)
+    await invalidate_summary(owner_id)
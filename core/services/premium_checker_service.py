@@ -1,4 +1,3 @@
-import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
@@ -14,7 +13,9 @@ from database.models.premium_features import UserSubscription, SubscriptionTier
 from database.models.giveaway import Giveaway
 from database.models.participant import Participant
 from database.models.required_channel import GiveawayRequiredChannel
-from core.services.checker_service import is_user_subscribed
+from core.services.checker_service import are_user_subscribed
+from core.services.participation_summary_service import invalidate_summary
+from core.services.membership_service import remove_member
 
 
 logger = logging.getLogger(__name__)
@@ -159,30 +160,24 @@ class PremiumCheckerService:
         channels_status = []
         all_subscribed = True
         
-        # Параллельная проверка всех каналов
-        tasks = []
-        for channel_id, channel_title in all_channels:
-            tasks.append(
-                self._check_single_subscription(
-                    bot, user_id, channel_id, channel_title, force_check
-                )
+        # Все каналы одной пакетной проверкой (MGET кеша, параллельные запросы на промахи)
+        try:
+            statuses = await are_user_subscribed(
+                bot, user_id, [channel_id for channel_id, _ in all_channels], force_check=force_check
             )
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        for result in results:
-            if isinstance(result, Exception):
-                logger.error(f"Error checking subscription: {result}")
+        except Exception as e:
+            logger.error(f"Error checking subscriptions for user {user_id}: {e}")
+            statuses = {}
+
+        for channel_id, channel_title in all_channels:
+            is_subscribed = statuses.get(channel_id, False)
+            channels_status.append({
+                "title": channel_title,
+                "channel_id": channel_id,
+                "is_subscribed": is_subscribed
+            })
+            if not is_subscribed:
                 all_subscribed = False
-                channels_status.append({
-                    "title": "Ошибка проверки",
-                    "is_subscribed": False,
-                    "error": str(result)
-                })
-            else:
-                channels_status.append(result)
-                if not result["is_subscribed"]:
-                    all_subscribed = False
         
         # Кешируем результаты, если доступна премиум-функция
         if has_premium_check:
@@ -196,33 +191,6 @@ class PremiumCheckerService:
         
         return all_subscribed, channels_status
     
-    async def _check_single_subscription(
-        self, 
-        bot: Bot, 
-        user_id: int, 
-        channel_id: int, 
-        channel_title: str, 
-        force_check: bool
-    ) -> Dict:
-        """
-        Проверка подписки на один канал
-        """
-        try:
-            is_subscribed = await is_user_subscribed(bot, channel_id, user_id, force_check=force_check)
-            return {
-                "title": channel_title,
-                "channel_id": channel_id,
-                "is_subscribed": is_subscribed
-            }
-        except Exception as e:
-            logger.error(f"Error checking subscription for user {user_id} to channel {channel_id}: {e}")
-            return {
-                "title": channel_title,
-                "channel_id": channel_id,
-                "is_subscribed": False,
-                "error": str(e)
-            }
-    
     async def validate_and_disqualify_participants(self, bot: Bot, session: AsyncSession):
         """
         Фоновая задача: проверка подписок всех участников активных розыгрышей
@@ -268,6 +236,8 @@ class PremiumCheckerService:
             if participant:
                 await session.delete(participant)
                 await session.commit()
+                await invalidate_summary(user_id)
+                await remove_member(giveaway_id, user_id)
                 
                 # Уведомление участника
                 try:
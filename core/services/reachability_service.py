@@ -0,0 +1,99 @@
+import logging
+from aiogram.exceptions import (
+    TelegramForbiddenError,
+    TelegramBadRequest,
+    TelegramNotFound,
+    TelegramRetryAfter,
+    TelegramServerError
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.requests.user_repo import (
+    mark_users_delivered,
+    mark_users_blocked,
+    mark_users_deactivated
+)
+
+logger = logging.getLogger(__name__)
+
+# Исходы доставки сообщения пользователю
+OUTCOME_SENT = "sent"
+OUTCOME_BLOCKED = "blocked"
+OUTCOME_DEACTIVATED = "deactivated"
+OUTCOME_FAILED = "failed"
+
+
+def classify_delivery_error(error: Exception) -> str:
+    """
+    Определяет исход доставки по исключению Telegram.
+    Временные ошибки (сеть, лимиты, прочие BadRequest) считаются failed
+    и не влияют на статус пользователя.
+    """
+    if isinstance(error, TelegramForbiddenError):
+        # "user is deactivated" — аккаунт удален, всё остальное — бот заблокирован
+        if "deactivated" in str(error).lower():
+            return OUTCOME_DEACTIVATED
+        return OUTCOME_BLOCKED
+    if isinstance(error, TelegramNotFound):
+        return OUTCOME_DEACTIVATED
+    if isinstance(error, TelegramBadRequest) and "chat not found" in str(error).lower():
+        return OUTCOME_DEACTIVATED
+    return OUTCOME_FAILED
+
+
+def delivery_error_code(error: Exception) -> int | None:
+    """HTTP-код ошибки Telegram для журнала доставки"""
+    if isinstance(error, TelegramForbiddenError):
+        return 403
+    if isinstance(error, TelegramNotFound):
+        return 404
+    if isinstance(error, TelegramRetryAfter):
+        return 429
+    if isinstance(error, TelegramBadRequest):
+        return 400
+    if isinstance(error, TelegramServerError):
+        return 500
+    return None
+
+
+class ReachabilityBuffer:
+    """
+    Копит исходы доставки и сбрасывает их в БД пачками,
+    чтобы не делать UPDATE на каждое сообщение.
+    """
+
+    def __init__(self, flush_size: int = 500):
+        self.flush_size = flush_size
+        self._pending: dict[str, list[int]] = {
+            OUTCOME_SENT: [],
+            OUTCOME_BLOCKED: [],
+            OUTCOME_DEACTIVATED: [],
+        }
+
+    def record(self, user_id: int, outcome: str):
+        # failed не меняет статус пользователя
+        if outcome in self._pending:
+            self._pending[outcome].append(user_id)
+
+    @property
+    def size(self) -> int:
+        return sum(len(ids) for ids in self._pending.values())
+
+    def is_full(self) -> bool:
+        return self.size >= self.flush_size
+
+    async def flush(self, session: AsyncSession):
+        """Записывает накопленные исходы тремя UPDATE-запросами"""
+        if not self.size:
+            return
+        sent = self._pending[OUTCOME_SENT]
+        blocked = self._pending[OUTCOME_BLOCKED]
+        deactivated = self._pending[OUTCOME_DEACTIVATED]
+        self._pending = {key: [] for key in self._pending}
+
+        await mark_users_delivered(session, sent)
+        await mark_users_blocked(session, blocked)
+        await mark_users_deactivated(session, deactivated)
+        logger.debug(
+            f"Reachability flushed: sent={len(sent)}, blocked={len(blocked)}, deactivated={len(deactivated)}"
+        )
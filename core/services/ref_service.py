@@ -1,29 +1,58 @@
-import uuid
+import logging
 from redis.asyncio import Redis
 from config import config
+from core.security.hmac_signer import sign_ref, verify_ref
+
+logger = logging.getLogger(__name__)
 
 # Подключаемся к Redis (используем тот же URL, что в конфиге)
+# Нужен только для старых токенов ref_map:{token}, выданных до подписанных ссылок
 redis = Redis.from_url(config.REDIS_URL)
 
-async def create_ref_link(user_id: int) -> str:
+ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _to_base36(value: int) -> str:
+    if value == 0:
+        return "0"
+    digits = []
+    while value:
+        value, rem = divmod(value, 36)
+        digits.append(ALPHABET[rem])
+    return "".join(reversed(digits))
+
+
+def create_ref_link(user_id: int) -> str:
     """
-    Создает короткий UUID-токен, который указывает на реальный user_id.
-    Токен живет 30 дней.
+    Реферальный токен вида "{версия}-{user_id в base36}-{подпись}".
+    Детерминированный и без состояния: ничего не пишет в Redis,
+    для одного пользователя всегда одинаковый.
+    Без "_" — он разделяет части deep link (gw_{id}_{token}).
     """
-    # Генерируем уникальный токен (без тире, чтобы был короче)
-    token = uuid.uuid4().hex[:12] 
-    key = f"ref_map:{token}"
-    
-    # Проверяем, может у юзера уже есть активный токен (опционально), 
-    # но проще генерировать новый или хранить обратный индекс.
-    # Для скорости просто пишем:
-    await redis.set(key, user_id, ex=2592000) # 30 дней
-    return token
+    version = config.REF_TOKEN_VERSION
+    return f"{_to_base36(version)}-{_to_base36(user_id)}-{sign_ref(user_id, version)}"
+
 
 async def resolve_ref_link(token: str) -> int | None:
     """Получает реальный ID по токену"""
-    key = f"ref_map:{token}"
-    user_id = await redis.get(key)
+    parts = token.split("-")
+    if len(parts) == 3:
+        try:
+            version, user_id = int(parts[0], 36), int(parts[1], 36)
+        except ValueError:
+            return None
+        if version < config.REF_TOKEN_MIN_VERSION or version > config.REF_TOKEN_VERSION:
+            return None
+        if not verify_ref(user_id, version, parts[2]):
+            return None
+        return user_id
+
+    # Старый формат (случайный токен в Redis), ключи доживают свои 30 дней
+    try:
+        user_id = await redis.get(f"ref_map:{token}")
+    except Exception as e:
+        logger.warning(f"Legacy ref token lookup failed: {e}")
+        return None
     if user_id:
         return int(user_id)
-    return None
\ No newline at end of file
+    return None
@@ -0,0 +1,79 @@
+# core/tools/archiver.py
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, delete, insert, update
+
+from config import config
+from database import async_session_maker
+from database.models.giveaway import Giveaway
+from database.models.participant import Participant, ParticipantArchive
+from core.services.membership_service import drop_giveaway
+
+logger = logging.getLogger(__name__)
+
+# Сколько розыгрышей переносить за один запуск (каждый — своей транзакцией)
+ARCHIVE_GIVEAWAYS_PER_RUN = 50
+
+ARCHIVE_COLUMNS = ["user_id", "giveaway_id", "created_at", "tickets_count", "referrer_id"]
+
+
+async def archive_giveaway_participants(session, giveaway_id: int) -> int:
+    """
+    Переносит участников розыгрыша в participants_archive одним запросом:
+    WITH moved AS (DELETE ... RETURNING) INSERT INTO participants_archive SELECT * FROM moved
+    """
+    moved = (
+        delete(Participant)
+        .where(Participant.giveaway_id == giveaway_id)
+        .returning(*(getattr(Participant, name) for name in ARCHIVE_COLUMNS))
+        .cte("moved")
+    )
+    result = await session.execute(
+        insert(ParticipantArchive).from_select(
+            ARCHIVE_COLUMNS,
+            select(*(moved.c[name] for name in ARCHIVE_COLUMNS))
+        )
+    )
+    await session.execute(
+        update(Giveaway)
+        .where(Giveaway.id == giveaway_id)
+        .values(participants_archived_at=datetime.now(timezone.utc))
+    )
+    return result.rowcount
+
+
+async def archive_finished_giveaways():
+    """
+    Задача планировщика: участники розыгрышей, завершенных больше
+    PARTICIPANTS_ARCHIVE_AFTER_DAYS дней назад, уходят из горячей таблицы.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=config.PARTICIPANTS_ARCHIVE_AFTER_DAYS)
+
+    async with async_session_maker() as session:
+        giveaway_ids = list(await session.scalars(
+            select(Giveaway.id)
+            .where(
+                Giveaway.status.in_(("finished", "cancelled")),
+                Giveaway.finish_time < cutoff,
+                Giveaway.participants_archived_at.is_(None)
+            )
+            .order_by(Giveaway.finish_time)
+            .limit(ARCHIVE_GIVEAWAYS_PER_RUN)
+        ))
+
+    if not giveaway_ids:
+        return
+
+    total = 0
+    for giveaway_id in giveaway_ids:
+        try:
+            async with async_session_maker() as session:
+                moved = await archive_giveaway_participants(session, giveaway_id)
+                await session.commit()
+            # Проверки участия идут по горячей таблице — множество больше не нужно
+            await drop_giveaway(giveaway_id)
+            total += moved
+        except Exception as e:
+            logger.error(f"Failed to archive participants of giveaway {giveaway_id}: {e}")
+
+    logger.info(f"Archived {total} participants of {len(giveaway_ids)} finished giveaways")
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from aiogram import Bot
+from sqlalchemy import update
+
+from database import async_session_maker
+from database.models import Broadcast
+from services.admin_broadcast_service import BroadcastService, recover_stuck_broadcasts
+
+logger = logging.getLogger(__name__)
+
+# Настройка: Сколько минут бот может "опаздывать".
+# Если бот лежал больше этого времени, рассылка будет отменена.
+BROADCAST_TOLERANCE_MINUTES = 30
+
+# Как часто проверять очередь, если она пуста (сек)
+POLL_INTERVAL_SECONDS = 5
+# Как часто искать зависшие рассылки упавших воркеров (сек)
+RECOVERY_INTERVAL_SECONDS = 300
+
+
+class BroadcastPoller:
+    """
+    Лёгкий поллер очереди рассылок.
+    Единственный источник правды — таблица broadcasts: задачи забираются
+    через FOR UPDATE SKIP LOCKED, поэтому воркеров может быть сколько угодно.
+    """
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL_SECONDS):
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._task: asyncio.Task | None = None
+        self._last_recovery = 0.0
+
+    async def start(self, bot: Bot):
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run(bot))
+        logger.info(f"📢 Broadcast poller started ({self.worker_id})")
+
+    async def stop(self):
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Broadcast poller stopped")
+
+    async def _run(self, bot: Bot):
+        while True:
+            try:
+                if time.monotonic() - self._last_recovery > RECOVERY_INTERVAL_SECONDS:
+                    self._last_recovery = time.monotonic()
+                    await recover_stuck_broadcasts(bot)
+
+                processed = await self.run_once(bot)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"🔥 Broadcast poller error: {e}")
+                processed = False
+
+            # Если задача была — сразу проверяем следующую
+            if not processed:
+                await asyncio.sleep(self.poll_interval)
+
+    async def run_once(self, bot: Bot) -> bool:
+        """Забирает и выполняет одну рассылку. Возвращает True, если задача была."""
+        async with async_session_maker() as session:
+            service = BroadcastService(bot, session)
+            try:
+                broadcast = await service.claim_due_broadcast(self.worker_id)
+                if not broadcast:
+                    return False
+
+                # ПРОВЕРКА АКТУАЛЬНОСТИ (Защита от отправки старого при падении бота)
+                delta = datetime.now(timezone.utc) - broadcast.scheduled_time
+                if delta > timedelta(minutes=BROADCAST_TOLERANCE_MINUTES):
+                    logger.error(f"⛔ Broadcast #{broadcast.id} is too old! Late by {delta}. Cancelling.")
+                    await session.execute(
+                        update(Broadcast)
+                        .where(Broadcast.id == broadcast.id)
+                        .values(status='expired', failed_count=0) # failed_count=0 чтобы не путать с ошибками
+                    )
+                    await session.commit()
+                    return True
+
+                logger.info(f"🚀 Starting broadcast #{broadcast.id}")
+                if await service.send_broadcast(broadcast.id):
+                    logger.info(f"✅ Broadcast #{broadcast.id} completed successfully")
+                else:
+                    logger.error(f"❌ Broadcast #{broadcast.id} failed")
+                return True
+            finally:
+                await service.close()
+
+
+broadcast_poller = BroadcastPoller()
@@ -0,0 +1,168 @@
+# core/tools/fsm_storage.py
+import json
+import logging
+from collections import OrderedDict, Counter
+from typing import Any, Dict, Mapping
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import StorageKey, StateType
+from aiogram.fsm.storage.redis import RedisStorage
+from redis.asyncio import Redis
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Сколько живет незавершенный сценарий (состояние и данные), сек — по группе состояний
+FLOW_TTLS = {
+    # Капча при вступлении: брошенная — просто мусор
+    "JoinState": 15 * 60,
+    # Черновик конструктора и выбор спонсоров — можно вернуться на следующий день
+    "ConstructorState": 2 * 24 * 3600,
+    "SponsorChannelState": 2 * 24 * 3600,
+    "ChannelState": 3600,
+    "BroadcastState": 6 * 3600,
+    "UserSearchState": 30 * 60,
+    "GiveawaySearchState": 30 * 60,
+}
+# Состояние, которого нет в таблице
+DEFAULT_FLOW_TTL = 24 * 3600
+# Данные без состояния (стек NavigationContext, MessageManager)
+IDLE_DATA_TTL = 3 * 24 * 3600
+
+KEY_PREFIX = "fsm"
+
+
+def compact_dumps(data: Any) -> str:
+    """JSON без пробелов и \\u-экранирования кириллицы (заметно короче для русских текстов)"""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def flow_ttl(state: str | None) -> int:
+    if not state:
+        return IDLE_DATA_TTL
+    return FLOW_TTLS.get(state.split(":", 1)[0], DEFAULT_FLOW_TTL)
+
+
+class FlowRedisStorage(RedisStorage):
+    """
+    RedisStorage, у которого ключи состояния и данных живут столько,
+    сколько разумно ждать возврата в сценарий (FLOW_TTLS).
+    TTL данных следует за текущим состоянием: оно запоминается в процессе
+    при get_state (dispatcher читает его на каждом апдейте) и set_state.
+    """
+
+    # Предел локальной таблицы "ключ -> TTL текущего сценария"
+    KNOWN_KEYS_LIMIT = 50000
+
+    def __init__(self, redis: Redis, **kwargs):
+        kwargs.setdefault("state_ttl", DEFAULT_FLOW_TTL)
+        kwargs.setdefault("data_ttl", IDLE_DATA_TTL)
+        kwargs.setdefault("json_dumps", compact_dumps)
+        super().__init__(redis=redis, **kwargs)
+        self._ttls: OrderedDict[str, int] = OrderedDict()
+
+    def _remember(self, key: StorageKey, state: str | None) -> int:
+        ttl = flow_ttl(state)
+        state_key = self.key_builder.build(key, "state")
+        self._ttls[state_key] = ttl
+        self._ttls.move_to_end(state_key)
+        if len(self._ttls) > self.KNOWN_KEYS_LIMIT:
+            self._ttls.popitem(last=False)
+        return ttl
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        state = await super().get_state(key)
+        self._remember(key, state)
+        return state
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        raw_state = state.state if isinstance(state, State) else state
+        ttl = self._remember(key, raw_state)
+        state_key = self.key_builder.build(key, "state")
+        data_key = self.key_builder.build(key, "data")
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            if raw_state is None:
+                pipe.delete(state_key)
+            else:
+                pipe.set(state_key, raw_state, ex=ttl)
+            # Данные живут вместе со сценарием
+            pipe.expire(data_key, ttl)
+            await pipe.execute()
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        data_key = self.key_builder.build(key, "data")
+        if not data:
+            await self.redis.delete(data_key)
+            return
+        ttl = self._ttls.get(self.key_builder.build(key, "state"), DEFAULT_FLOW_TTL)
+        await self.redis.set(data_key, self.json_dumps(dict(data)), ex=ttl)
+
+
+# --- Отчет по ключам FSM ---
+
+redis = Redis.from_url(config.REDIS_URL)
+
+REPORT_SCAN_COUNT = 1000
+
+
+async def fsm_keyspace_report(fix_missing_ttl: bool = False) -> Dict[str, Any]:
+    """
+    Проходит ключи fsm:* (SCAN, без блокировки Redis) и считает:
+    сколько ключей каждого вида, сколько без TTL и сколько памяти они занимают.
+    :param fix_missing_ttl: проставить TTL ключам, оставшимся с времен без TTL
+    """
+    counts: Counter = Counter()
+    memory: Counter = Counter()
+    without_ttl = 0
+    fixed = 0
+
+    async for batch in _scan_batches(f"{KEY_PREFIX}:*"):
+        async with redis.pipeline(transaction=False) as pipe:
+            for key in batch:
+                pipe.ttl(key)
+                pipe.memory_usage(key)
+            replies = await pipe.execute()
+
+        stale = []
+        for key, ttl, size in zip(batch, replies[::2], replies[1::2]):
+            kind = key.decode().rsplit(":", 1)[-1]
+            counts[kind] += 1
+            memory[kind] += size or 0
+            if ttl == -1:
+                without_ttl += 1
+                stale.append(key)
+
+        if fix_missing_ttl and stale:
+            async with redis.pipeline(transaction=False) as pipe:
+                for key in stale:
+                    pipe.expire(key, IDLE_DATA_TTL)
+                await pipe.execute()
+            fixed += len(stale)
+
+    return {
+        "keys": dict(counts),
+        "bytes": dict(memory),
+        "without_ttl": without_ttl,
+        "ttl_fixed": fixed,
+    }
+
+
+async def _scan_batches(pattern: str):
+    cursor = 0
+    while True:
+        cursor, keys = await redis.scan(cursor=cursor, match=pattern, count=REPORT_SCAN_COUNT)
+        if keys:
+            yield keys
+        if cursor == 0:
+            break
+
+
+async def log_fsm_keyspace_report():
+    """Задача планировщика: отчет в лог и TTL для ключей, записанных до FlowRedisStorage"""
+    try:
+        report = await fsm_keyspace_report(fix_missing_ttl=True)
+        logger.info(f"FSM keyspace: {report}")
+    except Exception as e:
+        logger.warning(f"FSM keyspace report failed: {e}")
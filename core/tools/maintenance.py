@@ -0,0 +1,171 @@
+# core/tools/maintenance.py
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, delete, tuple_, text
+from redis.asyncio import Redis
+
+from config import config
+from database import engine, async_session_maker
+from database.models.pending_referral import PendingReferral
+
+logger = logging.getLogger(__name__)
+redis = Redis.from_url(config.REDIS_URL)
+
+# Флаг "Светофора": пока завершается розыгрыш, обслуживание ждет
+HIGH_LOAD_KEY = "system:high_load"
+# Пауза между пачками, чтобы живой бот не ждал соединений и блокировок
+PAUSE_BETWEEN_BATCHES = 0.5
+PURGE_BATCH_SIZE = 1000
+# Пачка не должна держать блокировки дольше этого
+PURGE_STATEMENT_TIMEOUT_MS = 5000
+
+# Горячие таблицы, для которых имеет смысл внеплановый VACUUM (ANALYZE)
+HOT_TABLES = (
+    "participants",
+    "pending_referrals",
+    "boost_tickets",
+    "winners",
+    "broadcast_deliveries",
+    "users",
+    "giveaways",
+)
+VACUUM_MIN_DEAD_TUPLES = 10000
+
+# Выборка ключей Redis для отчета
+KEYSPACE_SCAN_LIMIT = 50000
+KEYSPACE_SCAN_COUNT = 1000
+# MEMORY USAGE — для каждого N-го ключа префикса, остальное экстраполируется
+KEYSPACE_MEMORY_SAMPLE_EVERY = 20
+
+
+async def _yield_to_bot():
+    """Пауза между шагами; пока система под нагрузкой — ждем дольше"""
+    await asyncio.sleep(PAUSE_BETWEEN_BATCHES)
+    while await redis.get(HIGH_LOAD_KEY):
+        await asyncio.sleep(5)
+
+
+async def purge_pending_referrals() -> int:
+    """Удаляет брошенные реферальные связки пачками (каждая — своей короткой транзакцией)"""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=config.PENDING_REFERRAL_TTL_HOURS)
+    total = 0
+    while True:
+        stale = (
+            select(PendingReferral.user_id, PendingReferral.giveaway_id)
+            .where(PendingReferral.created_at < cutoff)
+            .limit(PURGE_BATCH_SIZE)
+        )
+        async with async_session_maker() as session:
+            await session.execute(text(f"SET LOCAL statement_timeout = {PURGE_STATEMENT_TIMEOUT_MS}"))
+            result = await session.execute(
+                delete(PendingReferral).where(
+                    tuple_(PendingReferral.user_id, PendingReferral.giveaway_id).in_(stale)
+                )
+            )
+            await session.commit()
+        total += result.rowcount
+        if result.rowcount < PURGE_BATCH_SIZE:
+            return total
+        await _yield_to_bot()
+
+
+async def vacuum_hot_tables() -> list[str]:
+    """
+    VACUUM (ANALYZE) только для горячих таблиц, где по pg_stat_user_tables
+    мертвых строк больше MAINTENANCE_VACUUM_DEAD_RATIO (autovacuum не успевает)
+    """
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        result = await conn.execute(
+            text(
+                "SELECT relname FROM pg_stat_user_tables "
+                "WHERE relname = ANY(:tables) AND n_dead_tup >= :min_dead "
+                "AND n_dead_tup > :ratio * GREATEST(n_live_tup, 1)"
+            ),
+            {"tables": list(HOT_TABLES), "min_dead": VACUUM_MIN_DEAD_TUPLES, "ratio": config.MAINTENANCE_VACUUM_DEAD_RATIO}
+        )
+        tables = [row[0] for row in result]
+
+        for table in tables:
+            # Имя из HOT_TABLES, не из внешнего ввода
+            await conn.execute(text(f"VACUUM (ANALYZE) {table}"))
+            await _yield_to_bot()
+    return tables
+
+
+async def sample_redis_keyspace() -> dict:
+    """
+    Отчет по префиксам ключей (sub_status, ref_map, join_lock, premium_subs, fsm, ...):
+    SCAN до KEYSPACE_SCAN_LIMIT ключей, память — по выборке, итог — с поправкой на DBSIZE
+    """
+    counts: Counter = Counter()
+    sampled_bytes: Counter = Counter()
+    sampled_keys: Counter = Counter()
+    no_ttl: Counter = Counter()
+    scanned = 0
+    cursor = 0
+
+    while True:
+        cursor, keys = await redis.scan(cursor=cursor, count=KEYSPACE_SCAN_COUNT)
+        sample = []
+        for key in keys:
+            prefix = key.decode(errors="replace").split(":", 1)[0]
+            if counts[prefix] % KEYSPACE_MEMORY_SAMPLE_EVERY == 0:
+                sample.append((prefix, key))
+            counts[prefix] += 1
+        scanned += len(keys)
+
+        if sample:
+            async with redis.pipeline(transaction=False) as pipe:
+                for _, key in sample:
+                    pipe.memory_usage(key)
+                    pipe.ttl(key)
+                replies = await pipe.execute()
+            for (prefix, _), size, ttl in zip(sample, replies[::2], replies[1::2]):
+                sampled_bytes[prefix] += size or 0
+                sampled_keys[prefix] += 1
+                if ttl == -1:
+                    no_ttl[prefix] += 1
+
+        if cursor == 0 or scanned >= KEYSPACE_SCAN_LIMIT:
+            break
+        await asyncio.sleep(0)
+
+    total_keys = await redis.dbsize()
+    scale = total_keys / scanned if scanned else 0
+    report = {}
+    for prefix, count in counts.most_common():
+        avg_bytes = sampled_bytes[prefix] / sampled_keys[prefix] if sampled_keys[prefix] else 0
+        report[prefix] = {
+            "keys": round(count * scale),
+            "bytes": round(count * scale * avg_bytes),
+            # Доля ключей без TTL в выборке — такие копятся бесконечно
+            "no_ttl_ratio": round(no_ttl[prefix] / sampled_keys[prefix], 2) if sampled_keys[prefix] else 0,
+        }
+    return {"total_keys": total_keys, "scanned": scanned, "prefixes": report}
+
+
+async def run_maintenance():
+    """Задача планировщика: шаги независимы, ошибка одного не отменяет остальные"""
+    try:
+        purged = await purge_pending_referrals()
+        logger.info(f"Maintenance: purged {purged} stale pending referrals")
+    except Exception as e:
+        logger.error(f"Maintenance: pending referrals purge failed: {e}")
+
+    try:
+        await _yield_to_bot()
+        vacuumed = await vacuum_hot_tables()
+        if vacuumed:
+            logger.info(f"Maintenance: VACUUM (ANALYZE) {', '.join(vacuumed)}")
+    except Exception as e:
+        logger.error(f"Maintenance: vacuum failed: {e}")
+
+    try:
+        await _yield_to_bot()
+        report = await sample_redis_keyspace()
+        logger.info(f"Maintenance: Redis keyspace {report}")
+    except Exception as e:
+        logger.error(f"Maintenance: Redis keyspace sampling failed: {e}")
@@ -2,6 +2,7 @@
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from config import config
 from .base import Base
+from .pool import engine_options
 # Импорт моделей
 from .models.user import User
 from .models.giveaway import Giveaway
@@ -11,14 +12,21 @@ from .models.required_channel import GiveawayRequiredChannel
 from .models.winner import Winner
 from .models.pending_referral import PendingReferral # <--- НОВОЕ
 
-engine = create_async_engine(
-    url=config.DB_DNS,
-    echo=False,
-    pool_pre_ping=True
-)
+# Параметры пула — из профиля DB_POOL_PROFILE (см. database/pool.py)
+engine = create_async_engine(**engine_options(config.DB_DNS))
 
 async_session_maker = async_sessionmaker(
     engine, 
     class_=AsyncSession, 
     expire_on_commit=False
-)
\ No newline at end of file
+)
+
+# Сессии для хендлеров, которые только читают (флаг db="read_only"):
+# AUTOCOMMIT — на сервере нет BEGIN/COMMIT, снимок не держится между запросами
+read_only_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+
+read_only_session_maker = async_sessionmaker(
+    read_only_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
@@ -1,11 +1,11 @@
 from .user import User
 from .giveaway import Giveaway
-from .participant import Participant
+from .participant import Participant, ParticipantArchive
 from .winner import Winner
 from .channel import Channel
 from .required_channel import GiveawayRequiredChannel
 from .pending_referral import PendingReferral
-from .admin_models import AdminLog, Broadcast, ScheduledBroadcast
+from .admin_models import AdminLog, Broadcast, BroadcastDelivery
 from .conversion_funnels import ConversionFunnel, GiveawayHistory, ChannelAnalytics
 from .premium_features import SubscriptionTier, UserSubscription, PremiumFeatureUsage
 from .boost_history import BoostTicket
@@ -14,13 +14,14 @@ __all__ = [
     "User",
     "Giveaway",
     "Participant",
+    "ParticipantArchive",
     "Winner",
     "Channel",
     "GiveawayRequiredChannel",
     "PendingReferral",
     "AdminLog",
     "Broadcast",
-    "ScheduledBroadcast",
+    "BroadcastDelivery",
     "ConversionFunnel",
     "GiveawayHistory",
     "ChannelAnalytics",
@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String, DateTime, Boolean, func, JSON, Text, BigInteger
+from sqlalchemy import Integer, SmallInteger, String, DateTime, Boolean, func, JSON, Text, BigInteger, Index, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column
 from database.base import Base
 from datetime import datetime
@@ -23,7 +23,14 @@ class Broadcast(Base):
     photo_file_id: Mapped[str | None] = mapped_column(String, nullable=True)
     video_file_id: Mapped[str | None] = mapped_column(String, nullable=True)
     document_file_id: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Источник для copy_message: чат и сообщение(я) с готовым контентом (несколько — альбом)
+    source_chat_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    source_message_ids: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    # Когда отправлять (для немедленных рассылок — время создания)
     scheduled_time: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Описание аудитории (см. services/broadcast_audience.py), NULL — все пользователи
+    audience: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    # pending -> in_progress -> completed / interrupted / expired
     status: Mapped[str] = mapped_column(String, default="pending")
     sent_count: Mapped[int] = mapped_column(Integer, default=0)
     total_count: Mapped[int] = mapped_column(Integer, default=0)
@@ -32,17 +39,31 @@ class Broadcast(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=func.now())
     completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_by: Mapped[int] = mapped_column(Integer)
+    
+    # Какой воркер взял задачу и когда он последний раз отчитывался о прогрессе
+    claimed_by: Mapped[str | None] = mapped_column(String, nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+# Очередь рассылок: поллер ищет pending с наступившим scheduled_time
+Index('idx_broadcasts_status_scheduled', Broadcast.status, Broadcast.scheduled_time)
 
 
-class ScheduledBroadcast(Base):
-    __tablename__ = "scheduled_broadcasts"
+class BroadcastDelivery(Base):
+    """
+    Журнал доставки рассылок (append-only): одна строка на попытку отправки.
+    Пишется пачками, счетчики рассылки выводятся из него.
+    """
+    __tablename__ = "broadcast_deliveries"
     
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    message_text: Mapped[str] = mapped_column(Text)
-    photo_file_id: Mapped[str | None] = mapped_column(String, nullable=True)
-    video_file_id: Mapped[str | None] = mapped_column(String, nullable=True)
-    document_file_id: Mapped[str | None] = mapped_column(String, nullable=True)
-    scheduled_time: Mapped[datetime] = mapped_column(DateTime(timezone=True))
-    status: Mapped[str] = mapped_column(String, default="pending")
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=func.now())
-    created_by: Mapped[int] = mapped_column(Integer)
\ No newline at end of file
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    broadcast_id: Mapped[int] = mapped_column(ForeignKey("broadcasts.id", ondelete="CASCADE"))
+    user_id: Mapped[int] = mapped_column(BigInteger)
+    # sent / blocked / deactivated / failed
+    outcome: Mapped[str] = mapped_column(String(16))
+    # HTTP-код ошибки Telegram (403, 400, 429...), NULL для успешной доставки
+    error_code: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
+    sent_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=func.now())
+
+
+Index('idx_broadcast_deliveries_broadcast_outcome', BroadcastDelivery.broadcast_id, BroadcastDelivery.outcome)
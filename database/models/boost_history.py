@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import BigInteger, String, DateTime, Integer, ForeignKey, Boolean
+from sqlalchemy import BigInteger, String, DateTime, Integer, ForeignKey, Boolean, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from database.base import Base
 
@@ -36,4 +36,12 @@ class BoostTicket(Base):
     # Уникальное ограничение: один пользователь может получить только один буст каждого типа на один розыгрыш
     __mapper_args__ = {
         'confirm_deleted_rows': False  # Для уникальных ограничений
-    }
\ No newline at end of file
+    }
+
+
+# Уникальность буста: (пользователь, розыгрыш, тип). Служит и для проверок user_has_boost_type
+Index(
+    'uq_boost_tickets_user_giveaway_type',
+    BoostTicket.user_id, BoostTicket.giveaway_id, BoostTicket.boost_type,
+    unique=True
+)
@@ -37,6 +37,9 @@ class Giveaway(Base):
     last_update_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)  # Когда обновляли пост последний раз
     last_count: Mapped[int] = mapped_column(Integer, default=0)  # Сколько было участников при последнем обновлении
 
+    # Когда участники перенесены в participants_archive (NULL — еще в горячей таблице)
+    participants_archived_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
 
     # Связи с другими моделями
     owner: Mapped["User"] = relationship("User", back_populates="giveaways", lazy="selectin")
@@ -50,5 +53,25 @@ Index('idx_giveaways_status', Giveaway.status)
 Index('idx_giveaways_owner_id', Giveaway.owner_id)
 Index('idx_giveaways_created_at', Giveaway.finish_time.desc())
 
-# Индекс для быстрого поиска розыгрышей с ошибками доступа
-Index('idx_giveaways_status_paused_error', Giveaway.status == 'paused_error')
+# Поиск в админке по тексту приза (pg_trgm)
+Index('idx_giveaways_prize_text_trgm', Giveaway.prize_text, postgresql_using='gin', postgresql_ops={'prize_text': 'gin_trgm_ops'})
+
+# Keyset-пагинация списка розыгрышей в админке: (finish_time, id) < курсор
+Index('idx_giveaways_finish_time_id', Giveaway.finish_time, Giveaway.id)
+
+# Просроченные активные розыгрыши (get_expired_active_giveaways)
+Index('idx_giveaways_status_finish_time', Giveaway.status, Giveaway.finish_time)
+
+# Очередь умного обновления постов: ORDER BY last_update_at среди активных
+Index(
+    'idx_giveaways_active_last_update',
+    Giveaway.last_update_at,
+    postgresql_where=Giveaway.status == 'active'
+)
+
+# Частичный индекс для быстрого поиска розыгрышей с ошибками доступа
+Index(
+    'idx_giveaways_paused_error',
+    Giveaway.id,
+    postgresql_where=Giveaway.status == 'paused_error'
+)
@@ -1,6 +1,6 @@
 # database/models/participant.py
 from datetime import datetime
-from sqlalchemy import BigInteger, ForeignKey, DateTime, Integer, String, UniqueConstraint
+from sqlalchemy import BigInteger, ForeignKey, DateTime, Integer, String, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from database.base import Base
 
@@ -9,12 +9,8 @@ class Participant(Base):
 
     user_id: Mapped[int] = mapped_column(ForeignKey("users.user_id"), primary_key=True)
     giveaway_id: Mapped[int] = mapped_column(ForeignKey("giveaways.id", ondelete="CASCADE"), primary_key=True)
-    
-    # Добавляем уникальный индекс для предотвращения дубликатов
-    __table_args__ = (
-        # Уникальный индекс для предотвращения дубликатов участников в одном розыгрыше
-        UniqueConstraint('user_id', 'giveaway_id', name='unique_user_giveaway'),
-    )
+    # Дубликаты исключает сам первичный ключ (user_id, giveaway_id),
+    # он же обслуживает выборки по user_id ("мои участия")
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
     # Кол-во шансов (билетов)
@@ -28,3 +24,24 @@ class Participant(Base):
     # Связи с другими моделями
     user: Mapped["User"] = relationship("User", lazy="selectin")
     giveaway: Mapped["Giveaway"] = relationship("Giveaway", back_populates="participants", lazy="selectin")
+
+# Выборки по розыгрышу (счетчики, экспорт, выбор победителей) — PK начинается с user_id и тут не помогает
+Index('idx_participants_giveaway_id', Participant.giveaway_id, Participant.user_id)
+
+
+class ParticipantArchive(Base):
+    """
+    Холодное хранилище участников завершенных розыгрышей (см. core/tools/archiver.py).
+    Только поля, нужные "моим участиям" и экспорту, без FK на users и кода билета.
+    """
+    __tablename__ = "participants_archive"
+
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    giveaway_id: Mapped[int] = mapped_column(ForeignKey("giveaways.id", ondelete="CASCADE"), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    tickets_count: Mapped[int] = mapped_column(Integer, default=1)
+    referrer_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+
+
+# Экспорт и счетчики архивного розыгрыша
+Index('idx_participants_archive_giveaway_id', ParticipantArchive.giveaway_id)
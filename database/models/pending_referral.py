@@ -1,4 +1,5 @@
-from sqlalchemy import BigInteger, ForeignKey, Integer
+from datetime import datetime
+from sqlalchemy import BigInteger, ForeignKey, Integer, DateTime, Index, func
 from sqlalchemy.orm import Mapped, mapped_column
 from database.base import Base
 
@@ -12,4 +13,9 @@ class PendingReferral(Base):
 
     user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True) # Тот, кого пригласили
     giveaway_id: Mapped[int] = mapped_column(ForeignKey("giveaways.id", ondelete="CASCADE"), primary_key=True)
-    referrer_id: Mapped[int] = mapped_column(BigInteger) # Тот, кто пригласил
\ No newline at end of file
+    referrer_id: Mapped[int] = mapped_column(BigInteger) # Тот, кто пригласил
+    # Когда связка записана (брошенные вступления чистит core/tools/maintenance.py)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+# Поиск устаревших связок для очистки
+Index('idx_pending_referrals_created_at', PendingReferral.created_at)
@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, String, ForeignKey, Integer
+from sqlalchemy import BigInteger, String, ForeignKey, Integer, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from database.base import Base
 
@@ -13,3 +13,6 @@ class GiveawayRequiredChannel(Base):
     
     # Связь с розыгрышем
     giveaway: Mapped["Giveaway"] = relationship("Giveaway", back_populates="required_channels", lazy="selectin")
+
+# Спонсоры розыгрыша (get_required_channels, проверка подписок)
+Index('idx_required_channels_giveaway_id', GiveawayRequiredChannel.giveaway_id)
@@ -16,6 +16,12 @@ class User(Base):
     
     # --- Timestamps ---
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=func.now())
+
+    # --- Reachability (доставляемость сообщений) ---
+    # Заполняется по результатам рассылок, уведомлений победителям и my_chat_member
+    blocked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    deactivated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_delivered_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     
     # Связь с розыгрышами (владелец)
     giveaways: Mapped[list["Giveaway"]] = relationship("Giveaway", back_populates="owner", lazy="selectin")
@@ -29,4 +35,13 @@ class User(Base):
 # Индексы для оптимизации производительности
 Index('idx_users_username', User.username)
 Index('idx_users_premium', User.is_premium)
-Index('idx_users_created_at', User.created_at.desc())
\ No newline at end of file
+Index('idx_users_created_at', User.created_at.desc())
+# Поиск в админке (ILIKE по подстроке), нужно расширение pg_trgm
+Index('idx_users_username_trgm', User.username, postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'})
+Index('idx_users_full_name_trgm', User.full_name, postgresql_using='gin', postgresql_ops={'full_name': 'gin_trgm_ops'})
+# Частичный индекс "живой" аудитории для рассылок
+Index(
+    'idx_users_reachable',
+    User.user_id,
+    postgresql_where=User.blocked_at.is_(None) & User.deactivated_at.is_(None)
+)
\ No newline at end of file
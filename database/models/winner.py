@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import BigInteger, ForeignKey, DateTime
+from sqlalchemy import BigInteger, ForeignKey, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from database.base import Base
 
@@ -8,4 +8,7 @@ class Winner(Base):
 
     giveaway_id: Mapped[int] = mapped_column(ForeignKey("giveaways.id", ondelete="CASCADE"), primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
\ No newline at end of file
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+# Поиск выигрышей пользователя (PK начинается с giveaway_id)
+Index('idx_winners_user_id', Winner.user_id)
@@ -0,0 +1,139 @@
+# database/pool.py
+import logging
+import time
+from uuid import uuid4
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Профили пула: процесс выбирает свой через DB_POOL_PROFILE,
+# отдельные значения можно переопределить DB_POOL_SIZE / DB_MAX_OVERFLOW / ...
+POOL_PROFILES = {
+    # Polling-бот: много коротких транзакций от хендлеров
+    "bot": {"pool_size": 10, "max_overflow": 10, "pool_timeout": 10, "pool_recycle": 1800},
+    # Фоновые задачи планировщика: мало соединений, можно подождать
+    "worker": {"pool_size": 4, "max_overflow": 4, "pool_timeout": 30, "pool_recycle": 1800},
+    # Рассылки: писатель прогресса + потоковый читатель получателей + журнал доставки
+    "broadcast": {"pool_size": 3, "max_overflow": 2, "pool_timeout": 30, "pool_recycle": 1800},
+}
+
+
+class PoolStats:
+    """Счетчики ожидания соединения из пула (для периодического лога метрик)"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 2),
+            "timeouts": self.timeouts,
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Пул, замеряющий время ожидания свободного соединения"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.stats.checkouts += 1
+            self.stats.wait_total += waited
+            self.stats.wait_max = max(self.stats.wait_max, waited)
+
+
+def pool_settings() -> dict:
+    """Параметры пула выбранного профиля с учетом переопределений из настроек"""
+    profile = POOL_PROFILES.get(config.DB_POOL_PROFILE)
+    if profile is None:
+        raise ValueError(f"Unknown DB_POOL_PROFILE: {config.DB_POOL_PROFILE}")
+
+    settings = dict(profile)
+    overrides = {
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+    }
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    return settings
+
+
+def engine_options(dsn: str) -> dict:
+    """
+    Аргументы create_async_engine: пул профиля и режим pgbouncer.
+    В transaction-режиме pgbouncer соединение сервера меняется между транзакциями,
+    поэтому кеш подготовленных выражений asyncpg и SQLAlchemy отключается,
+    а имена выражений делаются уникальными.
+    """
+    url = make_url(dsn)
+    connect_args = {}
+    if config.DB_PGBOUNCER:
+        url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+
+    return {
+        "url": url,
+        "echo": False,
+        "poolclass": InstrumentedQueuePool,
+        # Вместо ping на каждый checkout — recycle; ping включается при нестабильной сети
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+        **pool_settings(),
+    }
+
+
+def pool_metrics(engine) -> dict:
+    """Состояние пула и статистика ожидания с прошлого снимка"""
+    pool = engine.sync_engine.pool
+    metrics = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        metrics.update(stats.snapshot())
+        stats.reset()
+    return metrics
+
+
+async def log_pool_metrics():
+    """Задача планировщика: метрики пулов основной БД и реплики в лог"""
+    from database import engine
+    from database.replica import replica_engine
+
+    logger.info(f"DB pool [{config.DB_POOL_PROFILE}] primary: {pool_metrics(engine)}")
+    if replica_engine is not None:
+        logger.info(f"DB pool [{config.DB_POOL_PROFILE}] replica: {pool_metrics(replica_engine)}")
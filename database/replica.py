@@ -0,0 +1,88 @@
+# database/replica.py
+import logging
+import time
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from config import config
+from database import read_only_session_maker
+from database.pool import engine_options
+
+logger = logging.getLogger(__name__)
+
+# Отставание реплики в секундах. Если реплика догнала мастер (receive == replay),
+# отставание 0 — иначе простаивающий мастер выглядел бы как "отстающая" реплика.
+# На обычном (не реплике) сервере тоже 0: удобно для локальной проверки второй базой.
+LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+replica_engine = None
+replica_session_maker = None
+
+if config.DB_REPLICA_DNS:
+    replica_engine = create_async_engine(
+        **engine_options(config.DB_REPLICA_DNS),
+        isolation_level="AUTOCOMMIT"
+    )
+    replica_session_maker = async_sessionmaker(
+        replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+
+
+class ReplicaRouter:
+    """
+    Выбирает, куда отправить аналитический запрос.
+    Состояние реплики (доступна, отставание) кешируется на DB_REPLICA_CHECK_INTERVAL,
+    обрыв соединения с репликой сразу переключает запросы на основную БД.
+    """
+
+    def __init__(self):
+        self._healthy = False
+        self._checked_at = 0.0
+        if replica_engine is not None:
+            event.listen(replica_engine.sync_engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        if context.is_disconnect:
+            logger.warning("Replica connection lost, routing analytics to primary")
+            self._healthy = False
+            self._checked_at = time.monotonic()
+
+    async def _check(self) -> bool:
+        try:
+            async with replica_engine.connect() as conn:
+                lag = float(await conn.scalar(LAG_QUERY) or 0)
+        except Exception as e:
+            logger.warning(f"Replica is unavailable: {e}")
+            return False
+
+        if lag > config.DB_REPLICA_MAX_LAG_SECONDS:
+            logger.warning(f"Replica lag {lag:.1f}s exceeds {config.DB_REPLICA_MAX_LAG_SECONDS}s")
+            return False
+        return True
+
+    async def is_healthy(self) -> bool:
+        if replica_engine is None:
+            return False
+        if time.monotonic() - self._checked_at >= config.DB_REPLICA_CHECK_INTERVAL:
+            self._checked_at = time.monotonic()
+            self._healthy = await self._check()
+        return self._healthy
+
+    async def analytics_session_maker(self) -> async_sessionmaker:
+        """Реплика, если она доступна и не отстает, иначе read-only сессия основной БД"""
+        if await self.is_healthy():
+            return replica_session_maker
+        return read_only_session_maker
+
+
+replica_router = ReplicaRouter()
@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
+from sqlalchemy.dialects.postgresql import insert
 from database.models.boost_history import BoostTicket
 
 
@@ -14,31 +15,21 @@ async def add_boost_ticket(
     Добавляет запись о выданном буст-билете
     """
     try:
-        # Проверяем, не получал ли пользователь уже этот тип буста за этот розыгрыш
-        existing = await session.execute(
-            select(BoostTicket).where(
-                and_(
-                    BoostTicket.user_id == user_id,
-                    BoostTicket.giveaway_id == giveaway_id,
-                    BoostTicket.boost_type == boost_type
-                )
-            )
-        )
-        existing_ticket = existing.scalar_one_or_none()
-        
-        if existing_ticket:
-            # Пользователь уже получил этот тип буста
-            return False
-        
-        # Создаем новую запись о буст-билете
-        boost_ticket = BoostTicket(
+        # Один INSERT вместо SELECT + INSERT: дубликат отсекает уникальный индекс
+        # (пользователь, розыгрыш, тип буста)
+        stmt = insert(BoostTicket).values(
             user_id=user_id,
             giveaway_id=giveaway_id,
             boost_type=boost_type,
             comment=comment
+        ).on_conflict_do_nothing(
+            index_elements=['user_id', 'giveaway_id', 'boost_type']
         )
+        result = await session.execute(stmt)
+        if result.rowcount == 0:
+            # Пользователь уже получил этот тип буста
+            return False
         
-        session.add(boost_ticket)
         await session.commit()
         
         return True
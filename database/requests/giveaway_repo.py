@@ -2,7 +2,9 @@ from datetime import datetime
 from zoneinfo import ZoneInfo
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, desc, func
+from sqlalchemy.dialects.postgresql import insert
 from database.models.giveaway import Giveaway
+from database.models.winner import Winner
 from database.models.required_channel import GiveawayRequiredChannel
 
 # Определяем UTC как временную зону
@@ -88,6 +90,15 @@ async def set_predetermined_winner(session: AsyncSession, gw_id: int, winner_id:
     await session.execute(stmt)
     # commit будет выполнен в middleware
 
+async def add_winners(session: AsyncSession, gw_id: int, user_ids: list[int]):
+    """Все победители одним многострочным INSERT (повторное завершение ничего не дублирует)"""
+    if not user_ids:
+        return
+    stmt = insert(Winner).values(
+        [{"giveaway_id": gw_id, "user_id": uid} for uid in user_ids]
+    ).on_conflict_do_nothing()
+    await session.execute(stmt)
+
 async def count_giveaways_by_owner(session: AsyncSession, owner_id: int) -> int:
     stmt = select(func.count(Giveaway.id)).where(Giveaway.owner_id == owner_id)
     return await session.scalar(stmt)
@@ -1,7 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc, delete
+from sqlalchemy import select, func, desc, delete, update, union_all, tuple_, and_, exists, literal, false, BigInteger
+from sqlalchemy.orm import aliased
 from sqlalchemy.dialects.postgresql import insert
-from database.models.participant import Participant
+from database.models.participant import Participant, ParticipantArchive
 from database.models.giveaway import Giveaway
 from database.models.winner import Winner
 from database.models.pending_referral import PendingReferral
@@ -21,6 +22,86 @@ async def add_participant(session: AsyncSession, user_id: int, giveaway_id: int,
     # commit будет выполнен в middleware
     return result.rowcount > 0
 
+async def join_giveaway(
+    session: AsyncSession,
+    user_id: int,
+    giveaway_id: int,
+    ticket_code: str,
+    referrals_enabled: bool = True
+) -> tuple[bool, int | None]:
+    """
+    Вступление одним запросом, без внешних блокировок: исход решает PK (user_id, giveaway_id).
+    В том же выражении (CTE):
+    - забирается и удаляется отложенный реферер (pending_referrals);
+    - реферер засчитывается, только если он сам участник, это не он же
+      и не встречное приглашение (реферер приглашен этим пользователем);
+    - реферер получает +1 билет, если вставка прошла.
+    :return: (новый участник, засчитанный реферер)
+    """
+    pending = (
+        delete(PendingReferral)
+        .where(PendingReferral.user_id == user_id, PendingReferral.giveaway_id == giveaway_id)
+        .returning(PendingReferral.referrer_id)
+        .cte("pending")
+    )
+
+    referrer_owner = aliased(Participant)
+    referrer_checks = [
+        pending.c.referrer_id != user_id,
+        exists().where(
+            referrer_owner.user_id == pending.c.referrer_id,
+            referrer_owner.giveaway_id == giveaway_id,
+            referrer_owner.referrer_id.is_distinct_from(user_id)
+        ),
+    ]
+    if not referrals_enabled:
+        referrer_checks.append(false())
+    referrer = select(pending.c.referrer_id).where(*referrer_checks).scalar_subquery()
+
+    joined = (
+        insert(Participant)
+        .from_select(
+            ["user_id", "giveaway_id", "referrer_id", "ticket_code", "tickets_count", "created_at"],
+            select(
+                literal(user_id, BigInteger),
+                literal(giveaway_id),
+                referrer,
+                literal(ticket_code),
+                literal(1),
+                func.now()
+            )
+        )
+        .on_conflict_do_nothing()
+        .returning(Participant.referrer_id)
+        .cte("joined")
+    )
+
+    bonus = (
+        update(Participant)
+        .where(
+            Participant.giveaway_id == giveaway_id,
+            Participant.user_id == select(joined.c.referrer_id).scalar_subquery()
+        )
+        .values(tickets_count=Participant.tickets_count + 1)
+        .returning(Participant.user_id)
+        .cte("bonus")
+    )
+
+    # bonus ни на что не ссылается в SELECT, поэтому подключаем его явно
+    row = (await session.execute(select(joined.c.referrer_id).add_cte(bonus))).first()
+    # commit будет выполнен в middleware
+    if row is None:
+        return False, None
+    return True, row.referrer_id
+
+async def get_ticket_info(session: AsyncSession, user_id: int, giveaway_id: int):
+    """Билет и число шансов участника (только нужные колонки, без загрузки связей)"""
+    stmt = select(Participant.ticket_code, Participant.tickets_count).where(
+        Participant.user_id == user_id,
+        Participant.giveaway_id == giveaway_id
+    )
+    return (await session.execute(stmt)).first()
+
 async def increment_ticket(session: AsyncSession, user_id: int, giveaway_id: int):
     from sqlalchemy import update
     # Это SQL-запрос, он выполняется внутри базы мгновенно и атомарно
@@ -42,12 +123,20 @@ async def is_circular_referral(session: AsyncSession, new_user_id: int, referrer
     return result is not None
 
 async def is_participant_active(session: AsyncSession, user_id: int, giveaway_id: int) -> bool:
-    stmt = select(Participant).where(
+    # SELECT EXISTS по первичному ключу, без загрузки объекта и его selectin-связей
+    stmt = select(exists().where(
         Participant.user_id == user_id,
         Participant.giveaway_id == giveaway_id
+    ))
+    return bool(await session.scalar(stmt))
+
+async def get_active_participant_ids(session: AsyncSession, giveaway_id: int, user_ids: list[int]) -> set[int]:
+    """Кто из user_ids участвует в розыгрыше — один запрос по индексу (giveaway_id, user_id)"""
+    stmt = select(Participant.user_id).where(
+        Participant.giveaway_id == giveaway_id,
+        Participant.user_id.in_(user_ids)
     )
-    result = await session.scalar(stmt)
-    return result is not None
+    return set((await session.scalars(stmt)).all())
 
 # --- Работа с временными рефералами (Pending) ---
 
@@ -59,7 +148,7 @@ async def add_pending_referral(session: AsyncSession, user_id: int, referrer_id:
         referrer_id=referrer_id
     ).on_conflict_do_update(
         index_elements=['user_id', 'giveaway_id'],
-        set_=dict(referrer_id=referrer_id)
+        set_=dict(referrer_id=referrer_id, created_at=func.now())
     )
     await session.execute(stmt)
     # commit будет выполнен в middleware
@@ -85,13 +174,36 @@ async def get_pending_referral(session: AsyncSession, user_id: int, giveaway_id:
 
 # --- Списки и статистика ---
 
+def all_participations(name: str = "participations"):
+    """
+    Участия из горячей таблицы и архива одним подзапросом.
+    Строка живет ровно в одной из таблиц, поэтому UNION ALL без дедупликации;
+    условия по user_id / giveaway_id Postgres проталкивает в обе ветки.
+    :param name: имя подзапроса (если в одном запросе их несколько)
+    """
+    return union_all(
+        select(Participant.user_id, Participant.giveaway_id, Participant.created_at, Participant.tickets_count, Participant.referrer_id),
+        select(ParticipantArchive.user_id, ParticipantArchive.giveaway_id, ParticipantArchive.created_at, ParticipantArchive.tickets_count, ParticipantArchive.referrer_id)
+    ).subquery(name)
+
 async def get_participant_ids(session: AsyncSession, giveaway_id: int) -> list[int]:
     stmt = select(Participant.user_id).where(Participant.giveaway_id == giveaway_id)
     result = await session.execute(stmt)
     return list(result.scalars().all())
 
+async def get_participant_ids_stream(session: AsyncSession, giveaway_id: int, batch_size: int = 10000):
+    """ID участников пачками через серверный курсор (загрузка множества участников в Redis)"""
+    result = await session.stream_scalars(
+        select(Participant.user_id)
+        .where(Participant.giveaway_id == giveaway_id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for batch in result.partitions(batch_size):
+        yield batch
+
 async def get_participants_count(session: AsyncSession, giveaway_id: int) -> int:
-    stmt = select(func.count(Participant.user_id)).where(Participant.giveaway_id == giveaway_id)
+    p = all_participations()
+    stmt = select(func.count(p.c.user_id)).where(p.c.giveaway_id == giveaway_id)
     return await session.scalar(stmt)
 
 async def get_weighted_candidates(session: AsyncSession, giveaway_id: int, limit: int = 100) -> list[int]:
@@ -117,15 +229,84 @@ async def get_all_participant_ids(session: AsyncSession, giveaway_id: int) -> li
 
 async def get_user_participations_detailed(session: AsyncSession, user_id: int, status: str = None, limit: int = 5, offset: int = 0):
     from sqlalchemy.orm import selectinload
-    stmt = select(Giveaway).join(Participant).where(Participant.user_id == user_id)
+    p = all_participations()
+    stmt = select(Giveaway).join(p, p.c.giveaway_id == Giveaway.id).where(p.c.user_id == user_id)
     if status:
         stmt = stmt.where(Giveaway.status == status)
     stmt = stmt.options(selectinload(Giveaway.required_channels)).order_by(desc(Giveaway.finish_time)).limit(limit).offset(offset)
     result = await session.execute(stmt)
     return result.scalars().all()
 
+async def get_participation_summary(session: AsyncSession, user_id: int) -> dict:
+    """
+    Все счетчики хаба "Розыгрыши" одним запросом:
+    участия (активные / завершенные / выигрыши) и созданные розыгрыши.
+    """
+    p = all_participations()
+    participated = (
+        select(
+            func.count().filter(Giveaway.status == "active").label("active"),
+            func.count().filter(Giveaway.status == "finished").label("finished"),
+            func.count(Winner.user_id).label("won")
+        )
+        .select_from(p)
+        .join(Giveaway, Giveaway.id == p.c.giveaway_id)
+        .outerjoin(Winner, and_(Winner.giveaway_id == p.c.giveaway_id, Winner.user_id == p.c.user_id))
+        .where(p.c.user_id == user_id)
+        .subquery("participated")
+    )
+    created = (
+        select(
+            func.count().filter(Giveaway.status == "active").label("created_active"),
+            func.count().filter(Giveaway.status == "finished").label("created_finished")
+        )
+        .where(Giveaway.owner_id == user_id)
+        .subquery("created")
+    )
+    row = (await session.execute(select(participated, created))).one()
+    return dict(row._mapping)
+
+async def get_user_participations_page(
+    session: AsyncSession,
+    user_id: int,
+    status: str,
+    limit: int = 5,
+    after: tuple | None = None,
+    before: tuple | None = None
+) -> list[tuple[Giveaway, bool]]:
+    """
+    Страница участий с keyset-пагинацией по (finish_time, id), от новых к старым.
+    :param after: курсор последнего элемента предыдущей страницы (листаем вперед)
+    :param before: курсор первого элемента следующей страницы (листаем назад)
+    :return: [(розыгрыш, выиграл ли пользователь)]
+    """
+    from sqlalchemy.orm import selectinload, noload
+    p = all_participations()
+    won = (Winner.user_id.is_not(None)).label("won")
+    key = tuple_(Giveaway.finish_time, Giveaway.id)
+    stmt = (
+        select(Giveaway, won)
+        .join(p, p.c.giveaway_id == Giveaway.id)
+        .outerjoin(Winner, and_(Winner.giveaway_id == Giveaway.id, Winner.user_id == user_id))
+        .where(p.c.user_id == user_id, Giveaway.status == status)
+        # Список участников розыгрыша для строки списка не нужен (selectin по умолчанию)
+        .options(selectinload(Giveaway.required_channels), noload(Giveaway.participants))
+        .limit(limit)
+    )
+    if before is not None:
+        # Назад: ближайшие более новые, затем разворачиваем в обычный порядок
+        stmt = stmt.where(key > tuple_(*before)).order_by(Giveaway.finish_time, Giveaway.id)
+        rows = list(reversed((await session.execute(stmt)).all()))
+    else:
+        if after is not None:
+            stmt = stmt.where(key < tuple_(*after))
+        stmt = stmt.order_by(desc(Giveaway.finish_time), desc(Giveaway.id))
+        rows = (await session.execute(stmt)).all()
+    return [(gw, bool(is_won)) for gw, is_won in rows]
+
 async def count_user_participations(session: AsyncSession, user_id: int, status: str = None) -> int:
-    stmt = select(func.count(Giveaway.id)).join(Participant).where(Participant.user_id == user_id)
+    p = all_participations()
+    stmt = select(func.count(Giveaway.id)).join(p, p.c.giveaway_id == Giveaway.id).where(p.c.user_id == user_id)
     if status:
         stmt = stmt.where(Giveaway.status == status)
     return await session.scalar(stmt)
@@ -136,10 +317,11 @@ async def get_participants_for_export(session: AsyncSession, giveaway_id: int):
     from sqlalchemy import select
     from database.models.user import User
     
+    p = all_participations()
     stmt = (
-        select(Participant.user_id, Participant.created_at, User.username, User.full_name)
-        .join(User, Participant.user_id == User.user_id)
-        .where(Participant.giveaway_id == giveaway_id)
+        select(p.c.user_id, p.c.created_at, User.username, User.full_name)
+        .join(User, p.c.user_id == User.user_id)
+        .where(p.c.giveaway_id == giveaway_id)
     )
     result = await session.execute(stmt)
     return result.all()
\ No newline at end of file
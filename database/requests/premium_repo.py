@@ -1,8 +1,12 @@
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, and_, or_
+from sqlalchemy import select, update, and_, or_, func, distinct, exists
+from sqlalchemy.orm import aliased
 from sqlalchemy.dialects.postgresql import insert
 from database.models import User, Giveaway, Participant, ConversionFunnel, GiveawayHistory, ChannelAnalytics, SubscriptionTier, UserSubscription, PremiumFeatureUsage
+from database.models.boost_history import BoostTicket
+from database.models.required_channel import GiveawayRequiredChannel
+from database.requests.participant_repo import all_participations
 
 
 # --- Функции для работы с премиум-подписками ---
@@ -249,6 +253,78 @@ async def update_conversion_funnel(
     await session.commit()
 
 
+async def get_giveaway_finish_stats(session: AsyncSession, giveaway_id: int) -> dict:
+    """
+    Итоговые метрики розыгрыша: общий агрегат по участиям (с учетом архива)
+    и сгруппированный по каналам спонсоров.
+    Кто на кого подписался, бот не хранит, поэтому "новые" для канала — участники,
+    которые раньше не участвовали ни в одном розыгрыше с этим же каналом в условиях.
+    """
+    p = all_participations()
+    boosters = select(func.count(distinct(BoostTicket.user_id))).where(
+        BoostTicket.giveaway_id == giveaway_id
+    ).scalar_subquery()
+
+    stmt = select(
+        func.count().label("total"),
+        func.count(distinct(p.c.user_id)).label("unique"),
+        func.coalesce(func.sum(p.c.tickets_count), 0).label("tickets"),
+        func.count(distinct(p.c.referrer_id)).label("referrers"),
+        boosters.label("boosters"),
+    ).where(p.c.giveaway_id == giveaway_id)
+    row = (await session.execute(stmt)).one()
+
+    sponsor = aliased(GiveawayRequiredChannel)
+    earlier_sponsor = aliased(GiveawayRequiredChannel)
+    earlier = all_participations("earlier_participations")
+    seen_before = exists().where(
+        earlier.c.user_id == p.c.user_id,
+        earlier.c.created_at < p.c.created_at,
+        earlier_sponsor.giveaway_id == earlier.c.giveaway_id,
+        earlier_sponsor.channel_id == sponsor.channel_id
+    )
+    per_channel = (
+        select(sponsor.channel_id, func.count(p.c.user_id).filter(~seen_before))
+        .select_from(sponsor)
+        .outerjoin(p, p.c.giveaway_id == sponsor.giveaway_id)
+        .where(sponsor.giveaway_id == giveaway_id)
+        .group_by(sponsor.channel_id)
+        .order_by(sponsor.channel_id)
+    )
+    new_per_channel = dict((await session.execute(per_channel)).all())
+
+    total = row.total or 0
+    return {
+        "total_participants": total,
+        "unique_participants": row.unique or 0,
+        "total_tickets": int(row.tickets),
+        "avg_tickets_per_user": round(int(row.tickets) / total, 2) if total else 0.0,
+        "referral_conversion": round((row.referrers or 0) / total, 4) if total else 0.0,
+        "boost_participants": row.boosters or 0,
+        "sponsors_channels": list(new_per_channel),
+        # Ключи JSON — строки
+        "new_subs_per_channel": {str(channel_id): count for channel_id, count in new_per_channel.items()},
+    }
+
+
+async def save_giveaway_history(session: AsyncSession, giveaway_id: int, finished_at: datetime):
+    """
+    Запись истории розыгрыша без commit — выполняется в транзакции завершения.
+    Повторный вызов обновляет метрики, а не падает на unique(giveaway_id).
+    """
+    stats = await get_giveaway_finish_stats(session, giveaway_id)
+    stmt = insert(GiveawayHistory).values(
+        giveaway_id=giveaway_id,
+        finished_at=finished_at,
+        **stats
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[GiveawayHistory.giveaway_id],
+        set_={**stats, "finished_at": finished_at, "updated_at": datetime.utcnow()}
+    )
+    await session.execute(stmt)
+
+
 async def create_giveaway_history(session: AsyncSession, giveaway_id: int):
     """
     Создание записи истории розыгрыша
@@ -256,24 +332,14 @@ async def create_giveaway_history(session: AsyncSession, giveaway_id: int):
     giveaway = await session.get(Giveaway, giveaway_id)
     if not giveaway:
         return None
-    
-    # Считаем количество участников
-    participants_count = await session.execute(
-        select(Participant).where(Participant.giveaway_id == giveaway_id)
-    )
-    participants_count = len(participants_count.scalars().all())
-    
-    history = GiveawayHistory(
-        giveaway_id=giveaway_id,
-        finished_at=giveaway.finish_time,
-        total_participants=participants_count,
-        unique_participants=participants_count,
-        total_tickets=participants_count  # Предполагаем 1 билет на участника
-    )
-    session.add(history)
+
+    await save_giveaway_history(session, giveaway_id, giveaway.finish_time)
     await session.commit()
-    
-    return history
+
+    result = await session.execute(
+        select(GiveawayHistory).where(GiveawayHistory.giveaway_id == giveaway_id)
+    )
+    return result.scalar_one_or_none()
 
 
 async def update_channel_analytics(
@@ -1,5 +1,5 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, update, func
 from sqlalchemy.dialects.postgresql import insert
 from database.models.user import User
 from database.models.giveaway import Giveaway
@@ -9,7 +9,8 @@ async def register_user(session: AsyncSession, user_id: int, username: str, full
         user_id=user_id, username=username, full_name=full_name
     ).on_conflict_do_update(
         index_elements=['user_id'],
-        set_=dict(username=username, full_name=full_name)
+        # Пользователь написал боту -> он снова достижим
+        set_=dict(username=username, full_name=full_name, blocked_at=None, deactivated_at=None)
     )
     await session.execute(stmt)
     # commit будет выполнен в middleware
@@ -27,3 +28,46 @@ async def get_user_stats(session: AsyncSession, user_id: int) -> dict:
     row = result.fetchone()
     
     return {"active": row.active or 0, "finished": row.finished or 0}
+
+
+def reachable_users_clause():
+    """Условие "пользователю можно доставить сообщение" (для фильтрации аудиторий)"""
+    return User.blocked_at.is_(None) & User.deactivated_at.is_(None)
+
+async def mark_users_delivered(session: AsyncSession, user_ids: list[int]):
+    """Массово отмечает успешную доставку"""
+    if not user_ids:
+        return
+    await session.execute(
+        update(User)
+        .where(User.user_id.in_(user_ids))
+        .values(last_delivered_at=func.now(), blocked_at=None, deactivated_at=None)
+    )
+
+async def mark_users_blocked(session: AsyncSession, user_ids: list[int]):
+    """Массово отмечает пользователей, заблокировавших бота"""
+    if not user_ids:
+        return
+    await session.execute(
+        update(User)
+        .where(User.user_id.in_(user_ids), User.blocked_at.is_(None))
+        .values(blocked_at=func.now())
+    )
+
+async def mark_users_deactivated(session: AsyncSession, user_ids: list[int]):
+    """Массово отмечает удаленные аккаунты"""
+    if not user_ids:
+        return
+    await session.execute(
+        update(User)
+        .where(User.user_id.in_(user_ids), User.deactivated_at.is_(None))
+        .values(deactivated_at=func.now())
+    )
+
+async def mark_user_reachable(session: AsyncSession, user_id: int):
+    """Снимает отметки недоступности (пользователь разблокировал бота)"""
+    await session.execute(
+        update(User)
+        .where(User.user_id == user_id)
+        .values(blocked_at=None, deactivated_at=None)
+    )
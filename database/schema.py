@@ -0,0 +1,34 @@
+# database/schema.py
+from pathlib import Path
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+
+def get_alembic_config() -> Config:
+    return Config(str(ALEMBIC_INI))
+
+
+def _current_heads(connection) -> set[str]:
+    return set(MigrationContext.configure(connection).get_current_heads())
+
+
+async def verify_schema_revision(engine: AsyncEngine):
+    """
+    Проверяет, что база на последней ревизии миграций.
+    Схема меняется только через alembic, бот ее не создает и не правит.
+    """
+    expected = set(ScriptDirectory.from_config(get_alembic_config()).get_heads())
+    async with engine.connect() as conn:
+        current = await conn.run_sync(_current_heads)
+
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema is at revision {sorted(current) or 'none'}, "
+            f"expected {sorted(expected)}. Run `alembic upgrade head` "
+            f"(existing database without alembic_version: `alembic stamp 0001_baseline` first)."
+        )
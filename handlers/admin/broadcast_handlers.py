@@ -6,7 +6,8 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.filters import Command
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, delete
+from sqlalchemy import select, func, delete, update
+from redis.asyncio import Redis
 
 from handlers.admin.admin_router import admin_router
 from keyboards.admin_broadcast_keyboards import (
@@ -16,7 +17,8 @@ from keyboards.admin_broadcast_keyboards import (
     get_broadcast_detail_keyboard,
     get_scheduled_detail_keyboard,
     get_cancel_broadcast_creation_keyboard,
-    get_cancel_schedule_keyboard
+    get_cancel_schedule_keyboard,
+    get_broadcast_audience_keyboard
 )
 from keyboards.admin_broadcast_time_keyboards import (
     get_broadcast_date_picker_keyboard,
@@ -24,12 +26,21 @@ from keyboards.admin_broadcast_time_keyboards import (
     get_manual_time_input_keyboard
 )
 from services.admin_broadcast_service import BroadcastService
+from services.broadcast_audience import (
+    AllUsers,
+    PremiumUsers,
+    ActiveCreators,
+    ActiveUsers,
+    GiveawayParticipants,
+    audience_from_spec,
+    count_recipients
+)
 from utils.admin_logger import log_admin_action
 from database.models import Broadcast
+from config import config
 
 # Импорты инструментов
 from core.tools.timezone import MSK, get_now_msk, to_utc, strip_tz
-from core.tools.broadcast_scheduler import schedule_broadcast_task, broadcast_scheduler
 
 
 class BroadcastState(StatesGroup):
@@ -40,6 +51,39 @@ class BroadcastState(StatesGroup):
     waiting_for_recipient_filter = State()
 
 
+redis = Redis.from_url(config.REDIS_URL)
+
+# Сколько живут собранные ID сообщений альбома
+ALBUM_TTL_SECONDS = 3600
+
+
+# Готовые сегменты аудитории (ключ из callback -> аудитория)
+AUDIENCE_PRESETS = {
+    "all": lambda: AllUsers(),
+    "premium": lambda: PremiumUsers(),
+    "creators": lambda: ActiveCreators(),
+    "active_7": lambda: ActiveUsers(7),
+    "active_30": lambda: ActiveUsers(30),
+    "active_30_free": lambda: ActiveUsers(30) - PremiumUsers(),
+}
+
+
+async def render_broadcast_preview(state: FSMContext, session: AsyncSession) -> str:
+    """Текст предпросмотра рассылки с выбранной аудиторией и числом получателей"""
+    data = await state.get_data()
+    broadcast_data = data.get('broadcast_data', {})
+    audience = audience_from_spec(data.get('audience'))
+    recipients = await count_recipients(session, audience)
+
+    preview_text = "📋 Предпросмотр:\n\n"
+    if 'text' in broadcast_data:
+        preview_text += broadcast_data['text']
+    else:
+        preview_text += "[Медиа сообщение]"
+    preview_text += f"\n\n🎯 Аудитория: {audience.title}\n👥 Получателей: {recipients}"
+    return preview_text
+
+
 # Вспомогательная функция для кнопки "Назад" (если список пуст)
 def get_back_to_broadcast_menu_kb() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
@@ -66,39 +110,99 @@ async def start_create_broadcast(callback: CallbackQuery, state: FSMContext):
 
 
 @admin_router.message(BroadcastState.waiting_for_message)
-async def process_broadcast_message(message: Message, state: FSMContext):
-    broadcast_data = {}
-    
-    if message.text:
-        broadcast_data['text'] = message.text
-    elif message.photo:
-        broadcast_data['photo'] = message.photo[-1].file_id
-        if message.caption:
-            broadcast_data['text'] = message.caption
-    elif message.video:
-        broadcast_data['video'] = message.video.file_id
-        if message.caption:
-            broadcast_data['text'] = message.caption
-    elif message.document:
-        broadcast_data['document'] = message.document.file_id
-        if message.caption:
-            broadcast_data['text'] = message.caption
-    else:
-        await message.answer("❌ Поддерживаемые типы: текст, фото, видео, документы")
-        return
+async def process_broadcast_message(message: Message, state: FSMContext, session: AsyncSession):
+    # Рассылка копирует исходное сообщение (copy_message), поэтому подходит любой тип контента
+    broadcast_data = {
+        'source_chat_id': message.chat.id,
+        'source_message_ids': [message.message_id],
+    }
+    text = message.text or message.caption
+    if text:
+        broadcast_data['text'] = text
+    
+    if message.media_group_id:
+        # Альбом приходит несколькими апдейтами: собираем ID сообщений в Redis,
+        # предпросмотр показываем только на первом элементе
+        album_key = f"broadcast_album:{message.chat.id}:{message.media_group_id}"
+        album_size = await redis.rpush(album_key, message.message_id)
+        await redis.expire(album_key, ALBUM_TTL_SECONDS)
+        if text:
+            await redis.set(f"{album_key}:text", text, ex=ALBUM_TTL_SECONDS)
+        if album_size > 1:
+            return
+        broadcast_data['album_key'] = album_key
     
     await state.update_data(broadcast_data=broadcast_data)
     
     keyboard = get_broadcast_preview_keyboard()
-    preview_text = "📋 Предпросмотр:\n\n"
-    if 'text' in broadcast_data:
-        preview_text += broadcast_data['text']
-    else:
-        preview_text += "[Медиа сообщение]"
+    preview_text = await render_broadcast_preview(state, session)
     
     await message.answer(preview_text, reply_markup=keyboard)
 
 
+async def resolve_broadcast_source(broadcast_data: dict) -> tuple[list[int], str]:
+    """Возвращает ID исходных сообщений (весь альбом) и текст рассылки"""
+    message_ids = broadcast_data.get('source_message_ids', [])
+    text = broadcast_data.get('text', '')
+    
+    album_key = broadcast_data.get('album_key')
+    if album_key:
+        album_ids = await redis.lrange(album_key, 0, -1)
+        if album_ids:
+            message_ids = sorted(int(mid) for mid in album_ids)
+        album_text = await redis.get(f"{album_key}:text")
+        if album_text and not text:
+            text = album_text.decode()
+    return message_ids, text
+
+
+# --- ВЫБОР АУДИТОРИИ ---
+@admin_router.callback_query(F.data == "admin_broadcast_audience")
+async def choose_broadcast_audience(callback: CallbackQuery, state: FSMContext):
+    data = await state.get_data()
+    if not data.get('broadcast_data'):
+        await callback.answer("❌ Данные устарели", show_alert=True)
+        return
+    await callback.message.edit_text("🎯 Кому отправить рассылку?", reply_markup=get_broadcast_audience_keyboard())
+    await callback.answer()
+
+
+@admin_router.callback_query(F.data.startswith("admin_bc_aud:"))
+async def set_broadcast_audience(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
+    preset = callback.data.split(":", 1)[1]
+    
+    if preset == "giveaway":
+        await state.set_state(BroadcastState.waiting_for_recipient_filter)
+        await callback.message.edit_text(
+            "🎟 Введите ID розыгрыша, участникам которого нужно отправить рассылку:",
+            reply_markup=get_cancel_broadcast_creation_keyboard()
+        )
+        await callback.answer()
+        return
+    
+    if preset in AUDIENCE_PRESETS:
+        await state.update_data(audience=AUDIENCE_PRESETS[preset]().to_spec())
+    
+    preview_text = await render_broadcast_preview(state, session)
+    await callback.message.edit_text(preview_text, reply_markup=get_broadcast_preview_keyboard())
+    await callback.answer()
+
+
+@admin_router.message(BroadcastState.waiting_for_recipient_filter)
+async def process_recipient_filter(message: Message, state: FSMContext, session: AsyncSession):
+    try:
+        giveaway_id = int(message.text.strip().lstrip("#"))
+    except (ValueError, AttributeError):
+        await message.answer("❌ Введите числовой ID розыгрыша")
+        return
+    
+    await state.update_data(audience=GiveawayParticipants(giveaway_id).to_spec())
+    await state.set_state(BroadcastState.waiting_for_message)
+    
+    preview_text = await render_broadcast_preview(state, session)
+    await message.answer(preview_text, reply_markup=get_broadcast_preview_keyboard())
+
+
 @admin_router.callback_query(F.data == "admin_send_broadcast_now")
 async def send_broadcast_now(callback: CallbackQuery, state: FSMContext, session: AsyncSession, bot: Bot):
     data = await state.get_data()
@@ -108,25 +212,25 @@ async def send_broadcast_now(callback: CallbackQuery, state: FSMContext, session
         await callback.answer("❌ Данные устарели", show_alert=True)
         return
 
+    message_ids, text = await resolve_broadcast_source(broadcast_data)
     service = BroadcastService(bot, session)
     broadcast = await service.create_broadcast(
-        message_text=broadcast_data.get('text', ''),
-        photo_file_id=broadcast_data.get('photo'),
-        video_file_id=broadcast_data.get('video'),
-        document_file_id=broadcast_data.get('document'),
-        admin_id=callback.from_user.id
+        message_text=text,
+        source_chat_id=broadcast_data.get('source_chat_id'),
+        source_message_ids=message_ids,
+        admin_id=callback.from_user.id,
+        audience=data.get('audience')
     )
     
     if not broadcast:
         await callback.answer("❌ Ошибка при создании рассылки в БД", show_alert=True)
         return
 
-    await service.send_broadcast(broadcast.id)
-    
+    # Отправку выполнит поллер очереди рассылок, хендлер не блокируется
     # --- ИЗМЕНЕНИЕ: Возвращаем меню вместо тупика ---
     keyboard = get_broadcast_menu_keyboard()
     await callback.message.edit_text(
-        f"✅ <b>Рассылка #{broadcast.id} успешно отправлена!</b>\n\n📢 Меню рассылки",
+        f"✅ <b>Рассылка #{broadcast.id} поставлена в очередь на отправку!</b>\n\n📢 Меню рассылки",
         reply_markup=keyboard
     )
     
@@ -188,22 +292,21 @@ async def select_broadcast_time(callback: CallbackQuery, state: FSMContext, sess
             await state.clear()
             return
         
+        message_ids, text = await resolve_broadcast_source(broadcast_data)
         service = BroadcastService(bot, session)
         broadcast = await service.create_broadcast(
-            message_text=broadcast_data.get('text', ''),
-            photo_file_id=broadcast_data.get('photo'),
-            video_file_id=broadcast_data.get('video'),
-            document_file_id=broadcast_data.get('document'),
+            message_text=text,
+            source_chat_id=broadcast_data.get('source_chat_id'),
+            source_message_ids=message_ids,
             admin_id=callback.from_user.id,
-            scheduled_time=schedule_time_db
+            scheduled_time=schedule_time_db,
+            audience=data.get('audience')
         )
         
         if not broadcast:
             await callback.answer("❌ Ошибка базы данных!", show_alert=True)
             return
         
-        await schedule_broadcast_task(broadcast.id, schedule_time)
-        
         # --- ИЗМЕНЕНИЕ: Возвращаем меню вместо тупика ---
         time_str = schedule_time.strftime('%Y-%m-%d %H:%M')
         keyboard = get_broadcast_menu_keyboard()
@@ -252,22 +355,21 @@ async def process_manual_time_input(message: Message, state: FSMContext, session
             await state.clear()
             return
         
+        message_ids, text = await resolve_broadcast_source(broadcast_data)
         service = BroadcastService(bot, session)
         broadcast = await service.create_broadcast(
-            message_text=broadcast_data.get('text', ''),
-            photo_file_id=broadcast_data.get('photo'),
-            video_file_id=broadcast_data.get('video'),
-            document_file_id=broadcast_data.get('document'),
+            message_text=text,
+            source_chat_id=broadcast_data.get('source_chat_id'),
+            source_message_ids=message_ids,
             admin_id=message.from_user.id,
-            scheduled_time=schedule_time_db
+            scheduled_time=schedule_time_db,
+            audience=data.get('audience')
         )
         
         if not broadcast:
             await message.answer("❌ Ошибка при сохранении.")
             return
         
-        await schedule_broadcast_task(broadcast.id, schedule_time)
-        
         # --- ИЗМЕНЕНИЕ: Возвращаем меню (отправляем новое сообщение, так как это message handler) ---
         time_str = schedule_time.strftime('%Y-%m-%d %H:%M')
         keyboard = get_broadcast_menu_keyboard()
@@ -382,11 +484,41 @@ async def show_broadcast_detail(callback: CallbackQuery, session: AsyncSession):
         f"📝 <b>Рассылка #{broadcast.id}</b>\n"
         f"📅 Дата: {created_str}\n"
         f"📊 Статус: {broadcast.status}\n"
-        f"📨 Отправлено: {broadcast.sent_count}/{broadcast.total_count}\n\n"
+        f"📨 Отправлено: {broadcast.sent_count}/{broadcast.total_count}\n"
+        f"🚫 Заблокировали бота: {broadcast.blocked_count}\n"
+        f"⚠️ Ошибки доставки: {broadcast.failed_count}\n\n"
         f"📄 <b>Сообщение:</b>\n{broadcast.message_text}"
     )
     
-    await callback.message.edit_text(info_text, reply_markup=get_broadcast_detail_keyboard(broadcast_id))
+    keyboard = get_broadcast_detail_keyboard(broadcast_id, has_failed=broadcast.failed_count > 0)
+    await callback.message.edit_text(info_text, reply_markup=keyboard)
+    await callback.answer()
+
+
+# --- ПОВТОР ТОЛЬКО ДЛЯ НЕУДАЧНЫХ ---
+@admin_router.callback_query(F.data.startswith("admin_retry_failed_broadcast_"))
+async def retry_failed_broadcast(callback: CallbackQuery, session: AsyncSession, bot: Bot):
+    try:
+        broadcast_id = int(callback.data.split("_")[-1])
+    except ValueError:
+        await callback.answer("Ошибка ID")
+        return
+    
+    service = BroadcastService(bot, session)
+    try:
+        retry = await service.create_retry_broadcast(broadcast_id, callback.from_user.id)
+    finally:
+        await service.close()
+    
+    if not retry:
+        await callback.answer("Рассылка не найдена", show_alert=True)
+        return
+    
+    await callback.message.edit_text(
+        f"✅ <b>Рассылка #{retry.id} (повтор неудачных из #{broadcast_id}) поставлена в очередь!</b>\n\n📢 Меню рассылки",
+        reply_markup=get_broadcast_menu_keyboard()
+    )
+    await log_admin_action(session, callback.from_user.id, "broadcast_retry_failed", retry.id, {"source": broadcast_id})
     await callback.answer()
 
 
@@ -428,28 +560,23 @@ async def force_send_scheduled_broadcast(callback: CallbackQuery, session: Async
             await callback.answer("Рассылка не найдена", show_alert=True)
             return
 
-        # Удаляем задачу из планировщика
-        from core.tools.broadcast_scheduler import broadcast_scheduler
-        job_id = f"broadcast_{broadcast_id}"
-        if broadcast_scheduler.get_job(job_id):
-            broadcast_scheduler.remove_job(job_id)
-            
-        # Отправляем немедленно
-        service = BroadcastService(bot, session)
-        await callback.message.edit_text("⏳ Начинаю отправку...")
-        
-        success = await service.send_broadcast(broadcast_id)
+        # Переносим время на "сейчас" — поллер заберет ее первой
+        result = await session.execute(
+            update(Broadcast)
+            .where(Broadcast.id == broadcast_id, Broadcast.status == "pending")
+            .values(scheduled_time=func.now())
+        )
         
-        if success:
+        if result.rowcount:
             # --- ИЗМЕНЕНИЕ: Возвращаем меню вместо тупика ---
             keyboard = get_broadcast_menu_keyboard()
             await callback.message.edit_text(
-                f"✅ <b>Рассылка #{broadcast_id} успешно запущена вне очереди!</b>\n\n📢 Меню рассылки",
+                f"✅ <b>Рассылка #{broadcast_id} запущена вне очереди!</b>\n\n📢 Меню рассылки",
                 reply_markup=keyboard
             )
             await log_admin_action(session, callback.from_user.id, "broadcast_force_sent", broadcast_id)
         else:
-            await callback.message.edit_text("❌ Ошибка при запуске рассылки.")
+            await callback.answer("Рассылка уже отправляется или завершена", show_alert=True)
             
     except Exception as e:
         print(f"Error force sending scheduled: {e}")
@@ -462,14 +589,8 @@ async def delete_scheduled_broadcast(callback: CallbackQuery, session: AsyncSess
     try:
         broadcast_id = int(callback.data.split("_")[-1])
         
-        # 1. Удаляем задачу из планировщика
-        from core.tools.broadcast_scheduler import broadcast_scheduler
-        job_id = f"broadcast_{broadcast_id}"
-        if broadcast_scheduler.get_job(job_id):
-            broadcast_scheduler.remove_job(job_id)
-            
-        # 2. Удаляем из БД
-        stmt = delete(Broadcast).where(Broadcast.id == broadcast_id)
+        # Удаляем из очереди (только если воркер еще не взял ее в работу)
+        stmt = delete(Broadcast).where(Broadcast.id == broadcast_id, Broadcast.status == "pending")
         await session.execute(stmt)
         
         await callback.answer("🗑 Рассылка удалена", show_alert=True)
@@ -1,3 +1,4 @@
+import math
 from aiogram import F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
@@ -16,6 +17,9 @@ from keyboards.admin_giveaways_keyboards import (
 )
 from services.admin_giveaway_service import GiveawayService
 from utils.admin_logger import log_admin_action
+from middlewares.db_session import DB_ANALYTICS
+from services.admin_pagination import PAGE_PREFIX, page_callback, parse_page_callback
+from services.admin_search import SEARCH_LIMIT
 
 
 class GiveawaySearchState(StatesGroup):
@@ -53,7 +57,7 @@ async def start_giveaway_search(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@admin_router.message(GiveawaySearchState.waiting_for_search_query)
+@admin_router.message(GiveawaySearchState.waiting_for_search_query, flags={"db": DB_ANALYTICS})
 async def process_giveaway_search(message: Message, state: FSMContext, session: AsyncSession):
     search_query = message.text.strip()
     
@@ -73,31 +77,65 @@ async def process_giveaway_search(message: Message, state: FSMContext, session:
     else:
         # Если найдено несколько розыгрышей, показываем список
         keyboard = get_giveaway_search_results_keyboard(giveaways)
-        await message.answer("Найденные розыгрыши:", reply_markup=keyboard)
+        note = f" (первые {SEARCH_LIMIT}, уточните запрос)" if len(giveaways) >= SEARCH_LIMIT else ""
+        await message.answer(f"Найденные розыгрыши{note}:", reply_markup=keyboard)
     
     await state.clear()
 
 
-@admin_router.callback_query(F.data.startswith("admin_list_giveaways_"))
+GIVEAWAYS_PAGE_SIZE = 10
+# Имя списка в подписанном курсоре (adm_pg:g:...)
+GIVEAWAYS_LIST = "g"
+
+
+@admin_router.callback_query(
+    F.data.startswith("admin_list_giveaways_") | F.data.startswith(f"{PAGE_PREFIX}:{GIVEAWAYS_LIST}:"),
+    flags={"db": DB_ANALYTICS}
+)
 async def show_giveaways_list(callback: CallbackQuery, session: AsyncSession):
-    page = int(callback.data.split("_")[-1])
+    # admin_list_giveaways_N — вход в список (первая страница), дальше — по курсору
+    request = None
+    page = 1
+    if callback.data.startswith(PAGE_PREFIX):
+        request = parse_page_callback(callback.data, GiveawayService.LIST_KEY)
+        if request is None:
+            await callback.answer("❌ Ссылка на страницу устарела.", show_alert=True)
+            return
+        page = request.page
     
     service = GiveawayService(session, None)  # bot не требуется для пагинации
-    giveaways, total_count = await service.get_giveaways_paginated(page=page)
+    giveaways, has_next = await service.get_giveaways_page(request, GIVEAWAYS_PAGE_SIZE)
+    estimate = await service.estimate_giveaways_total()
     
     message_text = "Список розыгрышей:\n\n"
     for giveaway in giveaways:
         message_text += f"🎁 [{giveaway.id}] \"{giveaway.prize_text}\" - владелец {giveaway.owner_id} - {giveaway.status}\n"
     
-    # Убедимся, что total_count - это int
-    total_count = int(total_count) if total_count is not None else 0
-    
-    keyboard = get_giveaways_pagination_keyboard(page, total_count)
+    prev_data = None
+    if page > 1 and giveaways:
+        first = giveaways[0]
+        prev_data = "admin_list_giveaways_1" if page == 2 else page_callback(
+            GIVEAWAYS_LIST, "b", page - 1, (first.finish_time, first.id)
+        )
+    next_data = None
+    if has_next:
+        last = giveaways[-1]
+        next_data = page_callback(GIVEAWAYS_LIST, "a", page + 1, (last.finish_time, last.id))
+    # Примерное число страниц по статистике планировщика, точное — по кнопке
+    total_label = f"~{max(math.ceil(estimate / GIVEAWAYS_PAGE_SIZE), page)}" if estimate is not None else "?"
+    
+    keyboard = get_giveaways_pagination_keyboard(page, prev_data, next_data, total_label)
     await callback.message.edit_text(message_text, reply_markup=keyboard)
     await callback.answer()
 
 
-@admin_router.callback_query(F.data.startswith("admin_giveaway_detail_"))
+@admin_router.callback_query(F.data == "admin_count_giveaways", flags={"db": DB_ANALYTICS})
+async def show_giveaways_exact_count(callback: CallbackQuery, session: AsyncSession):
+    total = await GiveawayService(session, None).count_giveaways()
+    await callback.answer(f"🎁 Всего розыгрышей: {total}", show_alert=True)
+
+
+@admin_router.callback_query(F.data.startswith("admin_giveaway_detail_"), flags={"db": DB_ANALYTICS})
 async def show_giveaway_detail(callback: CallbackQuery, session: AsyncSession):
     giveaway_id = int(callback.data.split("_")[-1])
     
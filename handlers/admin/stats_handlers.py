@@ -11,6 +11,7 @@ from keyboards.admin_stats_keyboards import (
 )
 from services.admin_statistics_service import CachedStatisticsService
 from utils.admin_logger import log_admin_action
+from middlewares.db_session import DB_ANALYTICS
 
 
 @admin_router.callback_query(F.data == "admin_stats")
@@ -20,7 +21,7 @@ async def show_stats_menu(callback: CallbackQuery):
     await callback.answer()
 
 
-@admin_router.callback_query(F.data == "admin_general_stats")
+@admin_router.callback_query(F.data == "admin_general_stats", flags={"db": DB_ANALYTICS})
 async def show_general_stats(callback: CallbackQuery, session: AsyncSession):
     service = CachedStatisticsService(session)
     stats = await service.get_general_stats()
@@ -38,7 +39,7 @@ async def show_general_stats(callback: CallbackQuery, session: AsyncSession):
     await callback.answer()
 
 
-@admin_router.callback_query(F.data == "admin_user_growth")
+@admin_router.callback_query(F.data == "admin_user_growth", flags={"db": DB_ANALYTICS})
 async def show_user_growth_stats(callback: CallbackQuery, session: AsyncSession):
     service = CachedStatisticsService(session)
     stats = await service.get_user_growth_stats()
@@ -56,7 +57,7 @@ async def show_user_growth_stats(callback: CallbackQuery, session: AsyncSession)
 
 
 # Обработчики для временных фильтров
-@admin_router.callback_query(F.data.startswith("admin_general_stats_"))
+@admin_router.callback_query(F.data.startswith("admin_general_stats_"), flags={"db": DB_ANALYTICS})
 async def show_general_stats_filtered(callback: CallbackQuery, session: AsyncSession):
     # Получаем временной период из callback_data
     period = callback.data.split("_")[-1]
@@ -79,7 +80,7 @@ async def show_general_stats_filtered(callback: CallbackQuery, session: AsyncSes
 
 
 # Заглушка для остальных видов статистики
-@admin_router.callback_query(F.data == "admin_premium_stats")
+@admin_router.callback_query(F.data == "admin_premium_stats", flags={"db": DB_ANALYTICS})
 async def show_premium_stats(callback: CallbackQuery, session: AsyncSession):
     # В реальной реализации должен быть метод для получения премиум статистики
     message_text = """
@@ -92,7 +93,7 @@ async def show_premium_stats(callback: CallbackQuery, session: AsyncSession):
     await callback.answer()
 
 
-@admin_router.callback_query(F.data == "admin_giveaway_stats")
+@admin_router.callback_query(F.data == "admin_giveaway_stats", flags={"db": DB_ANALYTICS})
 async def show_giveaway_stats(callback: CallbackQuery, session: AsyncSession):
     # В реальной реализации должен быть метод для получения статистики розыгрышей
     message_text = """
@@ -105,7 +106,7 @@ async def show_giveaway_stats(callback: CallbackQuery, session: AsyncSession):
     await callback.answer()
 
 
-@admin_router.callback_query(F.data == "admin_participation_stats")
+@admin_router.callback_query(F.data == "admin_participation_stats", flags={"db": DB_ANALYTICS})
 async def show_participation_stats(callback: CallbackQuery, session: AsyncSession):
     # В реальной реализации должен быть метод для получения статистики участий
     message_text = """
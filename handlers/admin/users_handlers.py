@@ -1,3 +1,4 @@
+import math
 from aiogram import F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
@@ -20,6 +21,9 @@ from keyboards.admin_users_keyboards import (
 from services.admin_user_service import UserService
 from services.admin_giveaway_service import GiveawayService
 from utils.admin_logger import log_admin_action
+from middlewares.db_session import DB_ANALYTICS
+from services.admin_pagination import PAGE_PREFIX, page_callback, parse_page_callback
+from services.admin_search import SEARCH_LIMIT
 
 
 class UserSearchState(StatesGroup):
@@ -41,7 +45,7 @@ async def start_user_search(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@admin_router.message(UserSearchState.waiting_for_search_query)
+@admin_router.message(UserSearchState.waiting_for_search_query, flags={"db": DB_ANALYTICS})
 async def process_user_search(message: Message, state: FSMContext, session: AsyncSession):
     search_query = message.text.strip()
     
@@ -61,7 +65,8 @@ async def process_user_search(message: Message, state: FSMContext, session: Asyn
     else:
         # Если найдено несколько пользователей, показываем список
         keyboard = get_user_search_results_keyboard(users)
-        await message.answer("Найденные пользователи:", reply_markup=keyboard)
+        note = f" (первые {SEARCH_LIMIT}, уточните запрос)" if len(users) >= SEARCH_LIMIT else ""
+        await message.answer(f"Найденные пользователи{note}:", reply_markup=keyboard)
     
     await state.clear()
 
@@ -81,7 +86,7 @@ def format_user_info(user_info: dict) -> str:
     """.strip()
 
 
-@admin_router.callback_query(F.data.startswith("admin_user_detail_"))
+@admin_router.callback_query(F.data.startswith("admin_user_detail_"), flags={"db": DB_ANALYTICS})
 async def show_user_detail(callback: CallbackQuery, session: AsyncSession):
     user_id = int(callback.data.split("_")[-1])
     
@@ -100,26 +105,53 @@ async def show_user_detail(callback: CallbackQuery, session: AsyncSession):
     await callback.answer()
 
 
-@admin_router.callback_query(F.data.startswith("admin_list_users_"))
+USERS_PAGE_SIZE = 10
+# Имя списка в подписанном курсоре (adm_pg:u:...)
+USERS_LIST = "u"
+
+
+@admin_router.callback_query(
+    F.data.startswith("admin_list_users_") | F.data.startswith(f"{PAGE_PREFIX}:{USERS_LIST}:"),
+    flags={"db": DB_ANALYTICS}
+)
 async def show_users_list(callback: CallbackQuery, session: AsyncSession):
-    page = int(callback.data.split("_")[-1])
+    # admin_list_users_N — вход в список (первая страница), дальше — по курсору
+    request = None
+    page = 1
+    if callback.data.startswith(PAGE_PREFIX):
+        request = parse_page_callback(callback.data, UserService.LIST_KEY)
+        if request is None:
+            await callback.answer("❌ Ссылка на страницу устарела.", show_alert=True)
+            return
+        page = request.page
     
     service = UserService(session)
-    users, total_count = await service.get_users_paginated(page=page)
+    users, has_next = await service.get_users_page(request, USERS_PAGE_SIZE)
+    estimate = await service.estimate_users_total()
     
     message_text = "Список пользователей:\n\n"
     for user in users:
         premium_status = "💎" if user.is_premium else "👤"
         message_text += f"{premium_status} [{user.user_id}] @{user.username or 'без_ника'} ({user.full_name})\n"
     
-    # Убедимся, что total_count - это int
-    total_count = int(total_count) if total_count is not None else 0
+    prev_data = None
+    if page > 1 and users:
+        prev_data = "admin_list_users_1" if page == 2 else page_callback(USERS_LIST, "b", page - 1, (users[0].user_id,))
+    next_data = page_callback(USERS_LIST, "a", page + 1, (users[-1].user_id,)) if has_next else None
+    # Примерное число страниц по статистике планировщика, точное — по кнопке
+    total_label = f"~{max(math.ceil(estimate / USERS_PAGE_SIZE), page)}" if estimate is not None else "?"
     
-    keyboard = get_users_pagination_keyboard(page, total_count)
+    keyboard = get_users_pagination_keyboard(page, prev_data, next_data, total_label)
     await callback.message.edit_text(message_text, reply_markup=keyboard)
     await callback.answer()
 
 
+@admin_router.callback_query(F.data == "admin_count_users", flags={"db": DB_ANALYTICS})
+async def show_users_exact_count(callback: CallbackQuery, session: AsyncSession):
+    total = await UserService(session).count_users()
+    await callback.answer(f"👥 Всего пользователей: {total}", show_alert=True)
+
+
 @admin_router.callback_query(F.data.startswith("admin_grant_premium_"))
 async def confirm_grant_premium(callback: CallbackQuery):
     user_id = int(callback.data.split("_")[-1])
@@ -179,7 +211,7 @@ async def process_premium_change(callback: CallbackQuery, session: AsyncSession)
     await callback.answer()
 
 
-@admin_router.callback_query(F.data.startswith("admin_user_giveaways_"))
+@admin_router.callback_query(F.data.startswith("admin_user_giveaways_"), flags={"db": DB_ANALYTICS})
 async def show_user_giveaways(callback: CallbackQuery, session: AsyncSession, bot: Bot):
     # Разбираем callback_data в формате "admin_user_giveaways_{user_id}_{page}"
     parts = callback.data.split("_")
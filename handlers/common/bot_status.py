@@ -0,0 +1,21 @@
+from aiogram import Router, F
+from aiogram.enums import ChatType
+from aiogram.filters import ChatMemberUpdatedFilter, KICKED, MEMBER
+from aiogram.types import ChatMemberUpdated
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.requests.user_repo import mark_users_blocked, mark_user_reachable
+
+router = Router()
+# Нас интересуют только личные чаты с ботом
+router.my_chat_member.filter(F.chat.type == ChatType.PRIVATE)
+
+@router.my_chat_member(ChatMemberUpdatedFilter(member_status_changed=KICKED))
+async def user_blocked_bot(event: ChatMemberUpdated, session: AsyncSession):
+    """Пользователь заблокировал бота — исключаем его из рассылок"""
+    await mark_users_blocked(session, [event.from_user.id])
+
+@router.my_chat_member(ChatMemberUpdatedFilter(member_status_changed=MEMBER))
+async def user_unblocked_bot(event: ChatMemberUpdated, session: AsyncSession):
+    """Пользователь разблокировал бота — снова доступен"""
+    await mark_user_reachable(session, event.from_user.id)
@@ -11,10 +11,11 @@ from database.models.winner import Winner
 # Импортируем главную функцию входа (она теперь называется try_join_giveaway)
 from handlers.participant.join import try_join_giveaway
 from core.services.ref_service import resolve_ref_link
+from middlewares.throttling import THROTTLE_JOIN
 
 router = Router()
 
-@router.message(CommandStart())
+@router.message(CommandStart(), flags={"throttle": THROTTLE_JOIN})
 async def cmd_start(
     message: Message,
     command: CommandObject,
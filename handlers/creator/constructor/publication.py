@@ -9,6 +9,7 @@ from keyboards.inline.participation import join_keyboard
 from core.tools.scheduler import scheduler
 from core.logic.game_actions import finish_giveaway_task
 from core.tools.formatters import format_giveaway_caption
+from core.services.participation_summary_service import invalidate_summary
 from core.tools.timezone import to_utc
 from handlers.creator.constructor.message_manager import get_message_manager
 
@@ -70,6 +71,9 @@ async def publish_giveaway(call: types.CallbackQuery, state: FSMContext, session
         try: await bot.delete_message(main_ch['id'], msg.message_id)
         except: pass
         return await call.answer("❌ Критическая ошибка БД", show_alert=True)
+    # Сводку владельца сбрасываем после COMMIT в middleware, иначе в кеш вернутся старые счетчики
+    owner_id = call.from_user.id
+    session.after_commit(lambda: invalidate_summary(owner_id))
 
     # 3. Обновление кнопки (добавляем ID розыгрыша)
     try:
@@ -6,7 +6,7 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from core.services.boost_service import BoostService
-from database.requests.participant_repo import is_participant_active
+from core.services.membership_service import is_participant
 from keyboards.inline.participation import join_keyboard
 
 router = Router()
@@ -50,8 +50,8 @@ async def show_boost_options(call: CallbackQuery, session: AsyncSession):
     giveaway_id = int(call.data.split(":")[1])
     
     # Проверяем, является ли пользователь участником розыгрыша
-    is_participant = await is_participant_active(session, call.from_user.id, giveaway_id)
-    if not is_participant:
+    joined = await is_participant(session, call.from_user.id, giveaway_id)
+    if not joined:
         await call.answer("❌ Вы не участвуете в этом розыгрыше!", show_alert=True)
         return
     
@@ -81,8 +81,8 @@ async def handle_story_boost(call: CallbackQuery, session: AsyncSession):
     giveaway_id = int(call.data.split(":")[1])
     
     # Проверяем, является ли пользователь участником розыгрыша
-    is_participant = await is_participant_active(session, call.from_user.id, giveaway_id)
-    if not is_participant:
+    joined = await is_participant(session, call.from_user.id, giveaway_id)
+    if not joined:
         await call.answer("❌ Вы не участвуете в этом розыгрыше!", show_alert=True)
         return
     
@@ -142,8 +142,8 @@ async def handle_channel_boost(call: CallbackQuery, session: AsyncSession):
     giveaway_id = int(call.data.split(":")[1])
     
     # Проверяем, является ли пользователь участником розыгрыша
-    is_participant = await is_participant_active(session, call.from_user.id, giveaway_id)
-    if not is_participant:
+    joined = await is_participant(session, call.from_user.id, giveaway_id)
+    if not joined:
         await call.answer("❌ Вы не участвуете в этом розыгрыше!", show_alert=True)
         return
     
@@ -203,15 +203,15 @@ async def show_referral_info(call: CallbackQuery, session: AsyncSession, bot):
     giveaway_id = int(call.data.split(":")[1])
     
     # Проверяем, является ли пользователь участником розыгрыша
-    is_participant = await is_participant_active(session, call.from_user.id, giveaway_id)
-    if not is_participant:
+    joined = await is_participant(session, call.from_user.id, giveaway_id)
+    if not joined:
         await call.answer("❌ Вы не участвуете в этом розыгрыше!", show_alert=True)
         return
     
     from core.services.ref_service import create_ref_link
     
     bot_username = (await bot.get_me()).username
-    token = await create_ref_link(call.from_user.id)
+    token = create_ref_link(call.from_user.id)
     ref_link = f"https://t.me/{bot_username}?start=gw_{giveaway_id}_{token}"
     
     text = (
@@ -4,31 +4,24 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, Message, CallbackQuery
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from redis.asyncio import Redis
-from config import config
 
-from database.models.participant import Participant
 from database.models.giveaway import Giveaway
 from database.requests.giveaway_repo import get_giveaway_by_id, get_required_channels
 from database.requests.participant_repo import (
-    add_participant,
-    increment_ticket,
-    is_circular_referral,
-    is_participant_active,
+    join_giveaway,
+    get_ticket_info,
     add_pending_referral, # <---
-    get_pending_referral  # <---
 )
 from keyboards.inline.participation import check_subscription_kb
 from core.logic.ticket_gen import get_unique_ticket
 from core.services.ref_service import create_ref_link
-from core.services.checker_service import is_user_subscribed
+from middlewares.throttling import THROTTLE_JOIN
+from core.services.checker_service import are_user_subscribed
+from core.services.participation_summary_service import invalidate_summary
+from core.services.membership_service import add_member
 
 router = Router()
 
-# Инициализация Redis для распределенной блокировки
-redis = Redis.from_url(config.REDIS_URL)
-
 class JoinState(StatesGroup):
     captcha = State()
     subscribing = State()
@@ -66,23 +59,19 @@ async def try_join_giveaway(
     if user.id == gw.owner_id:
         return await message.answer("⚠️ Вы организатор этого розыгрыша.")
 
-    # Проверяем, не участвует ли пользователь уже, используя уникальный индекс
-    existing_stmt = select(Participant).where(
-        Participant.user_id == user.id,
-        Participant.giveaway_id == gw_id
-    )
-    existing = await session.scalar(existing_stmt)
-    
-    bot_username = (await bot.get_me()).username
+    # Уже участвует? (PK по (user_id, giveaway_id); окончательно решает INSERT ... ON CONFLICT
+    # в finalize_registration, поэтому параллельные нажатия не требуют блокировки)
+    existing = await get_ticket_info(session, user.id, gw_id)
 
     if existing:
+        bot_username = (await bot.get_me()).username
         text = (
             f"👋 <b>Ты уже в игре!</b>\n\n"
             f"🎫 Твой билет: <code>{existing.ticket_code}</code>\n"
             f"⚡️ Шансов на победу: <b>{existing.tickets_count}</b>"
         )
         if gw.is_referral_enabled:
-            token = await create_ref_link(user.id)
+            token = create_ref_link(user.id)
             ref_link = f"https://t.me/{bot_username}?start=gw_{gw_id}_{token}"
             text += f"\n\n🔗 Твоя реф. ссылка:\n<code>{ref_link}</code>"
         
@@ -90,54 +79,23 @@ async def try_join_giveaway(
         except Exception: pass
         return
 
-    # Используем Redis Lock для предотвращения race condition при регистрации
-    lock_key = f"join_lock:{gw_id}:{user.id}"
-    lock = redis.lock(lock_key, timeout=10, blocking_timeout=5)
+    # Сохраняем реферала в БД (надежно)
+    if referrer_id:
+        await add_pending_referral(session, user.id, referrer_id, gw_id)
     
-    try:
-        # Пытаемся получить блокировку
-        acquired = await lock.acquire(blocking=False)
-        if not acquired:
-            return await message.answer("⏳ Пожалуйста, подождите немного и попробуйте снова.")
-        
-        # Повторная проверка на случай, если пользователь успел зарегистрироваться
-        # пока мы ждали блокировку
-        existing = await session.scalar(existing_stmt)
-        if existing:
-            text = (
-                f"👋 <b>Ты уже в игре!</b>\n\n"
-                f"🎫 Твой билет: <code>{existing.ticket_code}</code>\n"
-                f"⚡️ Шансов на победу: <b>{existing.tickets_count}</b>"
-            )
-            if gw.is_referral_enabled:
-                token = await create_ref_link(user.id)
-                ref_link = f"https://t.me/{bot_username}?start=gw_{gw_id}_{token}"
-                text += f"\n\n🔗 Твоя реф. ссылка:\n<code>{ref_link}</code>"
-            
-            try: await message.answer(text, disable_web_page_preview=True)
-            except Exception: pass
-            return
+    await state.update_data(gw_id=gw_id)
 
-        # Сохраняем реферала в БД (надежно)
-        if referrer_id:
-            await add_pending_referral(session, user.id, referrer_id, gw_id)
-        
-        await state.update_data(gw_id=gw_id)
-
-        if gw.is_captcha_enabled:
-            await state.set_state(JoinState.captcha)
-            kb = InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🤖 Я не робот", callback_data="captcha_solved")]
-            ])
-            await message.answer("🛡 <b>Проверка на бота</b>\nНажмите кнопку ниже.", reply_markup=kb)
-            return
+    if gw.is_captcha_enabled:
+        await state.set_state(JoinState.captcha)
+        kb = InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="🤖 Я не робот", callback_data="captcha_solved")]
+        ])
+        await message.answer("🛡 <b>Проверка на бота</b>\nНажмите кнопку ниже.", reply_markup=kb)
+        return
 
-        await check_subscriptions_step(message, user.id, gw, session, bot, state)
-    finally:
-        # В любом случае освобождаем блокировку
-        await lock.release()
+    await check_subscriptions_step(message, user.id, gw, session, bot, state)
 
-@router.callback_query(JoinState.captcha, F.data == "captcha_solved")
+@router.callback_query(JoinState.captcha, F.data == "captcha_solved", flags={"throttle": THROTTLE_JOIN})
 async def captcha_solved(call: CallbackQuery, state: FSMContext, session: AsyncSession, bot: Bot):
     data = await state.get_data()
     gw_id = data.get("gw_id")
@@ -173,9 +131,14 @@ async def check_subscriptions_step(message: Message, user_id: int, gw: Giveaway,
             return f"⚠️ <b>Ошибка доступа!</b>\nБот был удален или заблокирован в канале (ID: {channel_id}).\nРозыгрыш приостановлен."
     # -----------------------------------------------------
 
+    # Все подписки одной пакетной проверкой (кеш — один MGET, промахи — параллельно)
+    statuses = await are_user_subscribed(
+        bot, user_id, [gw.channel_id] + [r.channel_id for r in reqs], force_check=force_check
+    )
+
     # 1. Основной канал
     try:
-        is_sub = await is_user_subscribed(bot, gw.channel_id, user_id, force_check=force_check)
+        is_sub = statuses[gw.channel_id]
         
         # ЕСЛИ ПОДПИСКИ НЕТ -> ПРОВЕРЯЕМ, ЖИВ ЛИ БОТ
         if not is_sub:
@@ -205,7 +168,7 @@ async def check_subscriptions_step(message: Message, user_id: int, gw: Giveaway,
     if not critical_error:
         # 2. Спонсоры
         for r in reqs:
-            is_sub = await is_user_subscribed(bot, r.channel_id, user_id, force_check=force_check)
+            is_sub = statuses[r.channel_id]
             
             # ЕСЛИ ПОДПИСКИ НЕТ -> ПРОВЕРЯЕМ, ЖИВ ЛИ БОТ
             if not is_sub:
@@ -261,7 +224,7 @@ async def check_subscriptions_step(message: Message, user_id: int, gw: Giveaway,
         
         await finalize_registration(message, user_id, gw, session, bot, state)
 
-@router.callback_query(F.data.startswith("check_sub:"))
+@router.callback_query(F.data.startswith("check_sub:"), flags={"throttle": THROTTLE_JOIN})
 async def on_check_subscription_btn(call: CallbackQuery, session: AsyncSession, bot: Bot, state: FSMContext):
     gw_id = int(call.data.split(":")[-1])
     gw = await get_giveaway_by_id(session, gw_id)
@@ -280,30 +243,21 @@ async def finalize_registration(
     bot: Bot,
     state: FSMContext
 ):
-    # Достаем реферера из БД (надежно)
-    referrer_id = await get_pending_referral(session, user_id, gw.id)
-    
-    final_referrer = None
-    
-    if gw.is_referral_enabled and referrer_id:
-        if referrer_id == user_id:
-            referrer_id = None
-        elif await is_circular_referral(session, user_id, referrer_id, gw.id):
-            referrer_id = None
-        elif not await is_participant_active(session, referrer_id, gw.id):
-            referrer_id = None
-        else:
-            final_referrer = referrer_id
-
+    # Одно выражение: вставка участника, списание отложенного реферера и бонус ему
     ticket = await get_unique_ticket(session, gw.id)
-    is_new = await add_participant(session, user_id, gw.id, final_referrer, ticket)
+    is_new, final_referrer = await join_giveaway(
+        session, user_id, gw.id, ticket, referrals_enabled=gw.is_referral_enabled
+    )
     
     if not is_new:
-        p = await session.scalar(select(Participant).where(Participant.user_id==user_id, Participant.giveaway_id==gw.id))
-        ticket = p.ticket_code if p else "ERROR"
+        existing = await get_ticket_info(session, user_id, gw.id)
+        ticket = existing.ticket_code if existing else "ERROR"
     else:
+        # Сводку и множество участников трогаем только после COMMIT: до него параллельное
+        # чтение вернет в кеш старые счетчики, а откат оставит в множестве лишний id
+        session.after_commit(lambda: invalidate_summary(user_id))
+        session.after_commit(lambda: add_member(gw.id, user_id))
         if final_referrer:
-            await increment_ticket(session, final_referrer, gw.id)
             try:
                 await bot.send_message(final_referrer, f"👤 По вашей ссылке в розыгрыше #{gw.id} новый участник! (+1 билет)")
             except Exception as e:
@@ -320,7 +274,7 @@ async def finalize_registration(
 
     if gw.is_referral_enabled:
         bot_username = (await bot.get_me()).username
-        token = await create_ref_link(user_id)
+        token = create_ref_link(user_id)
         ref_link = f"https://t.me/{bot_username}?start=gw_{gw.id}_{token}"
         text += (
             f"\n\n🚀 <b>Увеличь шансы на победу!</b>\n"
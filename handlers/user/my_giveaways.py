@@ -8,6 +8,7 @@ from sqlalchemy import delete
 
 from database.requests.giveaway_repo import get_giveaways_by_owner, get_giveaway_by_id, count_giveaways_by_status
 from database.requests.participant_repo import get_participants_for_export
+from middlewares.db_session import DB_ANALYTICS
 from database.models.giveaway import Giveaway
 from database.models.user import User
 from database.models.winner import Winner
@@ -17,6 +18,8 @@ from keyboards.inline.dashboard import my_giveaways_hub_kb, giveaways_list_kb, a
 from core.logic.game_actions import finish_giveaway_task
 from keyboards.inline.participation import join_keyboard
 from core.tools.formatters import format_giveaway_caption
+from core.services.participation_summary_service import giveaway_member_ids, invalidate_summary
+from core.services.membership_service import drop_giveaway
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -172,6 +175,9 @@ async def delete_gw(call: types.CallbackQuery, session: AsyncSession, bot: Bot):
     
     # Транзакционное удаление из БД
     try:
+        # Сводки хаба участников и владельца сбросим после COMMIT; участников собираем до удаления
+        user_ids = [gw.owner_id, *await giveaway_member_ids(session, gw_id)]
+        session.after_commit(lambda: invalidate_summary(*user_ids))
         # Удаляем зависимые записи
         await session.execute(delete(Winner).where(Winner.giveaway_id == gw_id))
         await session.execute(delete(Participant).where(Participant.giveaway_id == gw_id))
@@ -181,6 +187,7 @@ async def delete_gw(call: types.CallbackQuery, session: AsyncSession, bot: Bot):
         
         # Используем flush вместо commit, так как мы внутри middleware транзакции
         await session.flush()
+        await drop_giveaway(gw_id)
         
         await call.answer("🗑 Розыгрыш удален.", show_alert=True)
         
@@ -195,7 +202,7 @@ async def delete_gw(call: types.CallbackQuery, session: AsyncSession, bot: Bot):
         await call.answer("❌ Ошибка БД при удалении.", show_alert=True)
 
 # 4. ЭКСПОРТ УЧАСТНИКОВ
-@router.callback_query(F.data.startswith("gw_act:export:"))
+@router.callback_query(F.data.startswith("gw_act:export:"), flags={"db": DB_ANALYTICS})
 async def export_participants(call: types.CallbackQuery, session: AsyncSession, bot: Bot):
     from datetime import datetime
     gw_id = int(call.data.split(":")[2])
@@ -1,26 +1,26 @@
 import math
+from datetime import datetime, timedelta, timezone
 from aiogram import Router, types, F, Bot
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from database.models.winner import Winner
-from database.requests.participant_repo import get_user_participations_detailed, count_user_participations
+from database.requests.participant_repo import get_user_participations_page
 from database.requests.giveaway_repo import get_giveaway_by_id, get_giveaways_by_owner, count_giveaways_by_owner
-from database.requests.user_repo import get_user_stats
+from core.services.participation_summary_service import get_summary
 from keyboards.inline.user_panel import giveaways_hub_kb, universal_list_kb, participation_details_kb, detail_back_kb
+from middlewares.db_session import DB_READ_ONLY
 
 router = Router()
 
 # 1. ХАБ (ГЛАВНОЕ МЕНЮ РАЗДЕЛА)
-@router.callback_query(F.data.in_({"my_participations", "giveaways_hub"}))
-async def show_hub(call: types.CallbackQuery, session: AsyncSession):
+@router.callback_query(F.data.in_({"my_participations", "giveaways_hub"}), flags={"db": DB_READ_ONLY})
+async def show_hub(call: types.CallbackQuery, session: AsyncSession, bot: Bot):
     user_id = call.from_user.id
     
-    stats = await get_user_stats(session, user_id)
-    has_created = (stats['active'] + stats['finished']) > 0
-    
-    active_count = await count_user_participations(session, user_id, "active")
-    finished_count = await count_user_participations(session, user_id, "finished")
+    # Все счетчики одним запросом (с кешем в Redis)
+    summary = await get_summary(session, user_id)
+    has_created = (summary['created_active'] + summary['created_finished']) > 0
     
     # Удаляем старое сообщение (особенно если там была картинка)
     from core.services.message_service import MessageHandler
@@ -31,39 +31,57 @@ async def show_hub(call: types.CallbackQuery, session: AsyncSession):
     await call.message.answer(
         "🎁 <b>Раздел: Розыгрыши</b>\n\n"
         "Здесь отображаются розыгрыши, в которых вы принимаете участие.",
-        reply_markup=giveaways_hub_kb(has_created, active_count, finished_count)
+        reply_markup=giveaways_hub_kb(has_created, summary['active'], summary['finished'])
     )
 
+# Курсор keyset-пагинации: (finish_time, id) -> "микросекунды:id"
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def encode_cursor(gw) -> str:
+    return f"{(gw.finish_time - EPOCH) // timedelta(microseconds=1)}:{gw.id}"
+
+def decode_cursor(ts: str, gw_id: str) -> tuple[datetime, int]:
+    return EPOCH + timedelta(microseconds=int(ts)), int(gw_id)
+
 # 2. СПИСОК УЧАСТИЙ
-@router.callback_query(F.data.startswith("part_list:"))
-async def show_participation_list(call: types.CallbackQuery, session: AsyncSession):
+# part_list:{status}:{page}                    — первая страница
+# part_list:{status}:{page}:a:{ts}:{id}        — после курсора (вперед)
+# part_list:{status}:{page}:b:{ts}:{id}        — до курсора (назад)
+@router.callback_query(F.data.startswith("part_list:"), flags={"db": DB_READ_ONLY})
+async def show_participation_list(call: types.CallbackQuery, session: AsyncSession, bot: Bot):
     parts = call.data.split(":")
     status = parts[1]
     page = int(parts[2])
+    direction = parts[3] if len(parts) > 5 else None
+    cursor = decode_cursor(parts[4], parts[5]) if direction else None
     
     limit = 5
-    offset = page * limit
     user_id = call.from_user.id
     
-    giveaways = await get_user_participations_detailed(session, user_id, status, limit, offset)
-    total_count = await count_user_participations(session, user_id, status)
+    if direction == "b":
+        rows = await get_user_participations_page(session, user_id, status, limit, before=cursor)
+        has_next = True
+    else:
+        # Берем на один больше, чтобы знать, есть ли следующая страница
+        rows = await get_user_participations_page(session, user_id, status, limit + 1, after=cursor)
+        has_next = len(rows) > limit
+        rows = rows[:limit]
     
-    if total_count == 0:
+    if not rows:
         return await call.answer("📭 Здесь пока пусто.", show_alert=True)
-        
-    total_pages = math.ceil(total_count / limit)
+    
+    summary = await get_summary(session, user_id)
+    total_pages = max(math.ceil(summary.get(status, 0) / limit), page + 1 + int(has_next))
     status_text = "В которых участвую" if status == 'active' else "Завершенные (Участие)"
     prefix = f"part_list:{status}"
     
-    won_ids = set()
-    if status == 'finished' and giveaways:
-        gw_ids = [gw.id for gw in giveaways]
-        stmt = select(Winner.giveaway_id).where(
-            Winner.giveaway_id.in_(gw_ids),
-            Winner.user_id == user_id
-        )
-        result = await session.execute(stmt)
-        won_ids = set(result.scalars().all())
+    giveaways = [gw for gw, _ in rows]
+    won_ids = {gw.id for gw, is_won in rows if is_won}
+    
+    prev_data = None
+    if page > 0:
+        prev_data = f"{prefix}:0" if page == 1 else f"{prefix}:{page - 1}:b:{encode_cursor(giveaways[0])}"
+    next_data = f"{prefix}:{page + 1}:a:{encode_cursor(giveaways[-1])}" if has_next else None
     
     from core.services.message_service import MessageHandler
     try:
@@ -72,11 +90,11 @@ async def show_participation_list(call: types.CallbackQuery, session: AsyncSessi
 
     await call.message.answer(
         f"📂 <b>{status_text}</b>\nСтраница {page+1} из {total_pages}",
-        reply_markup=universal_list_kb(giveaways, page, total_pages, prefix, won_ids=won_ids)
+        reply_markup=universal_list_kb(giveaways, page, total_pages, prefix, won_ids=won_ids, nav=(prev_data, next_data))
     )
 
 # 3. СПИСОК СОЗДАННЫХ
-@router.callback_query(F.data.startswith("created_list:"))
+@router.callback_query(F.data.startswith("created_list:"), flags={"db": DB_READ_ONLY})
 async def show_created_list(call: types.CallbackQuery, session: AsyncSession):
     page = int(call.data.split(":")[1])
     limit = 5
@@ -100,7 +118,7 @@ async def show_created_list(call: types.CallbackQuery, session: AsyncSession):
     )
 
 # 4. ПРОСМОТР ДЕТАЛЕЙ (УЧАСТИЕ)
-@router.callback_query(F.data.startswith("part_view:"))
+@router.callback_query(F.data.startswith("part_view:"), flags={"db": DB_READ_ONLY})
 async def view_participation(call: types.CallbackQuery, session: AsyncSession, bot: Bot):
     gw_id = int(call.data.split(":")[-1])
     gw = await get_giveaway_by_id(session, gw_id)
@@ -166,7 +184,7 @@ async def view_participation(call: types.CallbackQuery, session: AsyncSession, b
     )
 
 # 5. ПРОСМОТР ДЕТАЛЕЙ (СОЗДАННЫЙ)
-@router.callback_query(F.data.startswith("view_created:"))
+@router.callback_query(F.data.startswith("view_created:"), flags={"db": DB_READ_ONLY})
 async def view_created(call: types.CallbackQuery, session: AsyncSession, bot: Bot):
     gw_id = int(call.data.split(":")[-1])
     gw = await get_giveaway_by_id(session, gw_id)
@@ -20,6 +20,9 @@ def get_broadcast_menu_keyboard() -> InlineKeyboardMarkup:
 
 def get_broadcast_preview_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
+    builder.row(
+        InlineKeyboardButton(text="🎯 Выбрать аудиторию", callback_data="admin_broadcast_audience")
+    )
     builder.row(
         InlineKeyboardButton(text="📤 Отправить сейчас", callback_data="admin_send_broadcast_now"),
         InlineKeyboardButton(text="⏰ Отложенная отправка", callback_data="admin_schedule_broadcast")
@@ -28,6 +31,22 @@ def get_broadcast_preview_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+def get_broadcast_audience_keyboard() -> InlineKeyboardMarkup:
+    """Готовые сегменты аудитории рассылки"""
+    builder = InlineKeyboardBuilder()
+    builder.row(InlineKeyboardButton(text="👥 Все пользователи", callback_data="admin_bc_aud:all"))
+    builder.row(InlineKeyboardButton(text="💎 Премиум", callback_data="admin_bc_aud:premium"))
+    builder.row(InlineKeyboardButton(text="🎁 Создатели активных розыгрышей", callback_data="admin_bc_aud:creators"))
+    builder.row(
+        InlineKeyboardButton(text="🔥 Активные 7 дн.", callback_data="admin_bc_aud:active_7"),
+        InlineKeyboardButton(text="📅 Активные 30 дн.", callback_data="admin_bc_aud:active_30")
+    )
+    builder.row(InlineKeyboardButton(text="📅 Активные 30 дн. без премиум", callback_data="admin_bc_aud:active_30_free"))
+    builder.row(InlineKeyboardButton(text="🎟 Участники розыгрыша...", callback_data="admin_bc_aud:giveaway"))
+    builder.row(InlineKeyboardButton(text="◀️ Назад", callback_data="admin_bc_aud:back"))
+    return builder.as_markup()
+
+
 def get_cancel_broadcast_creation_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.row(InlineKeyboardButton(text="❌ Отмена", callback_data="admin_broadcast"))
@@ -96,12 +115,16 @@ def get_scheduled_broadcasts_pagination_keyboard(current_page: int, total_count:
 
 # --- ДЕТАЛЬНЫЙ ПРОСМОТР ---
 
-def get_broadcast_detail_keyboard(broadcast_id: int) -> InlineKeyboardMarkup:
+def get_broadcast_detail_keyboard(broadcast_id: int, has_failed: bool = False) -> InlineKeyboardMarkup:
     """Для истории (завершенные)"""
     builder = InlineKeyboardBuilder()
     builder.row(
         InlineKeyboardButton(text="🔄 Отправить повторно", callback_data=f"admin_resend_broadcast_{broadcast_id}")
     )
+    if has_failed:
+        builder.row(
+            InlineKeyboardButton(text="🔁 Повторить для неудачных", callback_data=f"admin_retry_failed_broadcast_{broadcast_id}")
+        )
     builder.row(
         InlineKeyboardButton(text="🔙 Назад к списку", callback_data="admin_broadcast_history_1")
     )
@@ -105,31 +105,44 @@ def get_back_to_users_menu_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
-def get_users_pagination_keyboard(current_page: int, total_count: int, page_size: int = 10) -> InlineKeyboardMarkup:
+def get_users_pagination_keyboard(
+    current_page: int,
+    prev_data: str | None,
+    next_data: str | None,
+    total_label: str
+) -> InlineKeyboardMarkup:
+    """
+    Пагинация по курсору: prev_data/next_data — подписанные callback соседних страниц
+    (None — кнопки нет), total_label — примерное число страниц ("~42" или "?")
+    """
     builder = InlineKeyboardBuilder()
     
-    total_pages = (total_count + page_size - 1) // page_size
-    
-    if current_page > 1:
+    if prev_data:
         builder.button(
             text="⏪ Назад",
-            callback_data=f"admin_list_users_{current_page - 1}"
+            callback_data=prev_data
         )
     
     builder.button(
-        text=f"{current_page}/{total_pages}",
-        callback_data="admin_ignore"  # Заглушка, просто для отображения
+        text=f"{current_page}/{total_label}",
+        callback_data="admin_ignore"
     )
     
-    if current_page < total_pages:
+    if next_data:
         builder.button(
             text="Вперед ⏩",
-            callback_data=f"admin_list_users_{current_page + 1}"
+            callback_data=next_data
         )
     
-    builder.adjust(3)  # Располагаем кнопки в одной строке
+    builder.adjust(3)
     
-    # Кнопка "Назад к меню"
+    # Точный COUNT(*) — только по запросу
+    builder.row(
+        InlineKeyboardButton(
+            text="🔢 Точное количество",
+            callback_data="admin_count_users"
+        )
+    )
     builder.row(
         InlineKeyboardButton(
             text="◀️ Назад к пользователям",
@@ -44,10 +44,13 @@ def universal_list_kb(
     current_page: int, 
     total_pages: int, 
     prefix: str, 
-    won_ids: set = None
+    won_ids: set = None,
+    nav: tuple[str | None, str | None] | None = None
 ) -> InlineKeyboardMarkup:
     """
     Универсальная клавиатура для списков розыгрышей
+    :param nav: callback_data кнопок ⬅️/➡️ для keyset-пагинации (None — кнопки нет);
+                без него страницы листаются по номеру
     """
     if won_ids is None:
         won_ids = set()
@@ -69,11 +72,17 @@ def universal_list_kb(
     
     # Добавляем пагинацию
     nav_buttons = []
-    if current_page > 0:
+    if nav is None:
+        prev_data = f"{prefix}:{current_page - 1}" if current_page > 0 else None
+        next_data = f"{prefix}:{current_page + 1}" if current_page < total_pages - 1 else None
+    else:
+        prev_data, next_data = nav
+
+    if prev_data:
         nav_buttons.append(
             InlineKeyboardButton(
                 text="⬅️",
-                callback_data=f"{prefix}:{current_page - 1}"
+                callback_data=prev_data
             )
         )
     
@@ -84,11 +93,11 @@ def universal_list_kb(
         )
     )
     
-    if current_page < total_pages - 1:
+    if next_data:
         nav_buttons.append(
             InlineKeyboardButton(
                 text="➡️",
-                callback_data=f"{prefix}:{current_page + 1}"
+                callback_data=next_data
             )
         )
     
@@ -4,25 +4,31 @@ import logging
 import signal
 from aiogram import Bot, Dispatcher, BaseMiddleware
 from aiogram.client.default import DefaultBotProperties
-from aiogram.fsm.storage.redis import RedisStorage
 from aiogram.types import Message, CallbackQuery
 from redis.asyncio import Redis
 
 from config import config
-from database import engine, Base
+from database import engine
+from database.schema import verify_schema_revision
 from core.tools.scheduler import start_scheduler, scheduler, shutdown_scheduler
-from core.tools.broadcast_scheduler import start_broadcast_scheduler, broadcast_scheduler, shutdown_broadcast_scheduler
+from core.tools.broadcast_poller import broadcast_poller
 from core.logic.game_actions import smart_update_giveaway_task, process_expired_giveaways
+from core.tools.archiver import archive_finished_giveaways
+from database.pool import log_pool_metrics
 from services.admin_broadcast_service import recover_stuck_broadcasts
 
-from middlewares.db_session import DbSessionMiddleware
+from middlewares.db_session import DbSessionMiddleware, DbIntentMiddleware
 from middlewares.throttling import ThrottlingMiddleware
 from middlewares.error_handler import ErrorMiddleware
 # --- ИЗМЕНЕНИЕ: Импорт фильтра ---
 from middlewares.updates_filter import UpdatesFilterMiddleware
+from middlewares.request_coalescing import single_flight
+from core.tools.fsm_storage import FlowRedisStorage, log_fsm_keyspace_report
+from core.tools.maintenance import run_maintenance
+from core.services.checker_service import log_cache_stats
 
 # Импорты Роутеров
-from handlers.common import start
+from handlers.common import start, bot_status
 from handlers.participant import join
 from handlers.user import dashboard, my_channels, my_participations, my_giveaways, premium
 from handlers.creator import constructor
@@ -55,10 +61,10 @@ async def graceful_shutdown(signum=None, frame=None):
         logger.error(f"Error shutting down scheduler: {e}")
     
     try:
-        await shutdown_broadcast_scheduler()
-        logger.info("Broadcast scheduler shutdown completed")
+        await broadcast_poller.stop()
+        logger.info("Broadcast poller shutdown completed")
     except Exception as e:
-        logger.error(f"Error shutting down broadcast scheduler: {e}")
+        logger.error(f"Error shutting down broadcast poller: {e}")
 
 async def main():
     logging.basicConfig(level=logging.INFO)
@@ -67,13 +73,15 @@ async def main():
     logging.getLogger("apscheduler.executors.default").setLevel(logging.WARNING)
     logging.getLogger("apscheduler.scheduler").setLevel(logging.WARNING)
     
-    # Инициализация БД
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Схема создается миграциями (alembic upgrade head), здесь только проверка ревизии
+    await verify_schema_revision(engine)
 
     redis = Redis.from_url(config.REDIS_URL)
     bot = Bot(token=config.BOT_TOKEN.get_secret_value(), default=DefaultBotProperties(parse_mode="HTML"))
-    dp = Dispatcher(storage=RedisStorage(redis=redis))
+    # Одинаковые одновременные get_me / get_chat / get_chat_member — одним запросом
+    bot.session.middleware(single_flight)
+    # FSM с TTL по сценариям: брошенные капчи и черновики не копятся в Redis вечно
+    dp = Dispatcher(storage=FlowRedisStorage(redis=redis))
     
     # --- Middleware ---
     # 1. Сначала фильтруем старые апдейты (outer_middleware срабатывает ДО всего)
@@ -82,12 +90,16 @@ async def main():
     # 2. Обработчик ошибок
     dp.update.middleware(ErrorMiddleware())
     
-    # 3. Сессия БД
+    # 3. Сессия БД (ленивая) и намерение хендлера из флага db
     dp.update.middleware(DbSessionMiddleware())
+    dp.message.middleware(DbIntentMiddleware())
+    dp.callback_query.middleware(DbIntentMiddleware())
     
     # 4. Анти-спам
-    dp.message.middleware(ThrottlingMiddleware(redis, rate_limit=1.0))
-    dp.callback_query.middleware(ThrottlingMiddleware(redis, rate_limit=1.0))
+    # Один экземпляр на оба типа событий: общий локальный кеш отказов
+    throttling = ThrottlingMiddleware(redis)
+    dp.message.middleware(throttling)
+    dp.callback_query.middleware(throttling)
 
     # --- Подключение Роутеров ---
     dp.include_router(admin_router)
@@ -100,6 +112,7 @@ async def main():
     
     dp.include_router(join.router)
     dp.include_router(start.router)
+    dp.include_router(bot_status.router)
 
     # --- SAFETY NET ---
     await process_expired_giveaways()
@@ -116,8 +129,57 @@ async def main():
         replace_existing=True,
         max_instances=1 # Защита: не запускать новый, если старый завис
     )
+    # Перенос участников старых завершенных розыгрышей в архив
+    scheduler.add_job(
+        archive_finished_giveaways,
+        "interval",
+        hours=1,
+        id="participants_archiver",
+        replace_existing=True,
+        max_instances=1
+    )
+    # Метрики пула соединений (ожидание checkout, занятые/свободные соединения)
+    if config.DB_POOL_METRICS_INTERVAL:
+        scheduler.add_job(
+            log_pool_metrics,
+            "interval",
+            seconds=config.DB_POOL_METRICS_INTERVAL,
+            id="db_pool_metrics",
+            replace_existing=True,
+            max_instances=1
+        )
+    # Статистика кеша проверок подписки (hit / stale / miss / предохранители)
+    scheduler.add_job(
+        log_cache_stats,
+        "interval",
+        minutes=10,
+        id="sub_cache_stats",
+        replace_existing=True,
+        max_instances=1
+    )
+    # Обслуживание: брошенные pending_referrals, VACUUM горячих таблиц, отчет по Redis
+    if config.MAINTENANCE_INTERVAL_MINUTES:
+        scheduler.add_job(
+            run_maintenance,
+            "interval",
+            minutes=config.MAINTENANCE_INTERVAL_MINUTES,
+            id="maintenance",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+    # Отчет по ключам FSM (раз в сутки) и TTL для старых ключей без него
+    scheduler.add_job(
+        log_fsm_keyspace_report,
+        "interval",
+        hours=24,
+        id="fsm_keyspace_report",
+        replace_existing=True,
+        max_instances=1
+    )
     await start_scheduler()
-    await start_broadcast_scheduler()
+    # Очередь рассылок (таблица broadcasts) разбирает поллер с общим ботом
+    await broadcast_poller.start(bot)
 
     dp.message.middleware(UserIdMiddleware())
     dp.callback_query.middleware(UserIdMiddleware())
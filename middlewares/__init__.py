@@ -3,11 +3,13 @@ from .throttling import ThrottlingMiddleware
 from .error_handler import ErrorMiddleware
 from .admin_middleware import AdminRateLimitMiddleware
 from .updates_filter import UpdatesFilterMiddleware  # <--- Добавлено
+from .request_coalescing import SingleFlightMiddleware
 
 __all__ = [
     "DbSessionMiddleware",
     "ThrottlingMiddleware", 
     "ErrorMiddleware",
     "AdminRateLimitMiddleware",
-    "UpdatesFilterMiddleware" # <--- Добавлено
+    "UpdatesFilterMiddleware", # <--- Добавлено
+    "SingleFlightMiddleware"
 ]
\ No newline at end of file
@@ -19,10 +19,10 @@ class AdminRateLimitMiddleware:
         data: Dict[str, Any]
     ) -> Any:
         # Проверяем рейт-лимит для администратора
-        if not admin_rate_limiter.is_allowed(event.from_user.id):
-            reset_time = admin_rate_limiter.get_reset_time(event.from_user.id)
+        reset_time = await admin_rate_limiter.hit(event.from_user.id)
+        if reset_time:
             # Отправляем ответ на коллбэк
-            await event.answer(f"❌ Слишком много запросов. Попробуйте через {int(reset_time)} сек.", show_alert=True)
+            await event.answer(f"❌ Слишком много запросов. Попробуйте через {max(1, int(reset_time))} сек.", show_alert=True)
             return
         
         # Если всё в порядке, продолжаем обработку
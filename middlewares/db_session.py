@@ -1,10 +1,122 @@
 # middlewares/db_session.py
+import logging
 from typing import Callable, Awaitable, Dict, Any
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
 from aiogram.types import TelegramObject
-from database import async_session_maker
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.selectable import CTE
+from database import async_session_maker, read_only_session_maker
+from database.replica import replica_router
 from core.exceptions import error_handler
 
+logger = logging.getLogger(__name__)
+
+# Значения флага db у хендлера: @router.callback_query(..., flags={"db": DB_READ_ONLY})
+DB_READ_ONLY = "read_only"
+# Тяжелые выборки (статистика, поиск, экспорт) — на реплику, с откатом на основную БД
+DB_ANALYTICS = "analytics"
+
+
+def writes_data(statement) -> bool:
+    """
+    SELECT поверх CTE с INSERT / UPDATE / DELETE (WITH ... RETURNING) тоже пишет,
+    хотя для ORM это select (так устроен join_giveaway)
+    """
+    return any(
+        isinstance(element, CTE) and isinstance(element.element, UpdateBase)
+        for element in visitors.iterate(statement)
+    )
+
+
+class LazySession:
+    """
+    Прокси над AsyncSession: настоящая сессия (и соединение из пула)
+    создается только при первом обращении к ней.
+    Запоминает, были ли изменения, чтобы не делать COMMIT впустую:
+    записью считаются flush ORM, DML, text() и SELECT с DML в CTE (writes_data).
+    Запись, которую не видно ни одним из этих способов, должна сама выставить has_writes.
+    """
+
+    def __init__(self):
+        self.read_only = False
+        self.has_writes = False
+        # Фабрика сессий, выбранная по флагу хендлера (реплика); None — по read_only
+        self.maker = None
+        self._session: AsyncSession | None = None
+        # Действия, которые имеют смысл только для сохраненных данных (кеши, множества в Redis)
+        self._after_commit: list[Callable[[], Awaitable[Any]]] = []
+
+    @property
+    def is_active(self) -> bool:
+        return self._session is not None
+
+    def _materialize(self) -> AsyncSession:
+        if self._session is None:
+            maker = self.maker or (read_only_session_maker if self.read_only else async_session_maker)
+            self._session = maker()
+            event.listen(self._session.sync_session, "do_orm_execute", self._on_execute)
+            event.listen(self._session.sync_session, "after_flush", self._on_flush)
+        return self._session
+
+    def _on_execute(self, orm_execute_state):
+        # SELECT ничего не меняет (если в нем нет DML-CTE); text() и DML считаем записью
+        if self.has_writes:
+            return
+        if not orm_execute_state.is_select or writes_data(orm_execute_state.statement):
+            self.has_writes = True
+
+    def _on_flush(self, session, flush_context):
+        self.has_writes = True
+
+    def __getattr__(self, name):
+        return getattr(self._materialize(), name)
+
+    def after_commit(self, callback: Callable[[], Awaitable[Any]]):
+        """Выполнить callback после успешного COMMIT в finish(); при откате он отбрасывается"""
+        self._after_commit.append(callback)
+
+    # commit/rollback/close у несозданной сессии — пустые операции
+    async def commit(self):
+        if self._session is not None:
+            await self._session.commit()
+
+    async def rollback(self):
+        if self._session is not None:
+            await self._session.rollback()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+    async def finish(self):
+        """Завершение апдейта: COMMIT только если что-то записывали"""
+        if self._session is None:
+            return
+        committed = False
+        try:
+            if self.has_writes or self._session.new or self._session.dirty or self._session.deleted:
+                if self.read_only:
+                    logger.warning("Write in a handler declared as read_only, committing anyway")
+                await self._session.commit()
+                committed = True
+        finally:
+            await self._session.close()
+
+        # Без COMMIT записанного нет — и отражать в кешах нечего
+        if not committed:
+            if self._after_commit:
+                logger.warning("After-commit callbacks dropped: nothing was committed")
+            return
+        for callback in self._after_commit:
+            try:
+                await callback()
+            except Exception as e:
+                logger.warning(f"After-commit callback failed: {e}")
+
 
 class DbSessionMiddleware(BaseMiddleware):
     async def __call__(
@@ -13,23 +125,47 @@ class DbSessionMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: Dict[str, Any]
     ) -> Any:
-        async with async_session_maker() as session:
-            async with session.begin():  # Начинаем транзакцию
-                try:
-                    data["session"] = session
-                    result = await handler(event, data)
-                    # commit будет выполнен автоматически при выходе из блока if no exception
-                    return result
-                except Exception as e:
-                    # Откатываем транзакцию в случае ошибки
-                    await session.rollback()
-                    # Получаем user_id из события
-                    user_id = None
-                    if hasattr(event, 'from_user') and event.from_user:
-                        user_id = event.from_user.id
-                    elif hasattr(event, 'user') and event.user:
-                        user_id = event.user.id
-                    
-                    # Обрабатываем ошибку через централизованный обработчик
-                    await error_handler.handle_error(e, user_id, "db_session_middleware")
-                    raise e
+        # Соединение берется из пула только при первом запросе хендлера,
+        # отброшенные анти-спамом и фильтрами апдейты БД не трогают
+        session = LazySession()
+        data["session"] = session
+        try:
+            result = await handler(event, data)
+            await session.finish()
+            return result
+        except Exception as e:
+            # Откатываем транзакцию в случае ошибки
+            await session.rollback()
+            await session.close()
+            # Получаем user_id из события
+            user_id = None
+            if hasattr(event, 'from_user') and event.from_user:
+                user_id = event.from_user.id
+            elif hasattr(event, 'user') and event.user:
+                user_id = event.user.id
+
+            # Обрабатываем ошибку через централизованный обработчик
+            await error_handler.handle_error(e, user_id, "db_session_middleware")
+            raise e
+
+
+class DbIntentMiddleware(BaseMiddleware):
+    """
+    Передает сессии намерение хендлера из флага db:
+    read_only -> AUTOCOMMIT-соединение, analytics -> реплика (если доступна).
+    Регистрируется как inner middleware роутеров событий: только там известен хендлер.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        session = data.get("session")
+        if isinstance(session, LazySession) and not session.is_active:
+            intent = get_flag(data, "db")
+            session.read_only = intent in (DB_READ_ONLY, DB_ANALYTICS)
+            if intent == DB_ANALYTICS:
+                session.maker = await replica_router.analytics_session_maker()
+        return await handler(event, data)
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import GetMe, GetChat, GetChatMember, GetChatMemberCount, GetChatAdministrators
+from aiogram.methods.base import Response, TelegramMethod, TelegramType
+
+# Только чтение: одинаковые параллельные вызовы безопасно склеивать
+COALESCED_METHODS = (GetMe, GetChat, GetChatMember, GetChatMemberCount, GetChatAdministrators)
+
+
+class SingleFlightMiddleware(BaseRequestMiddleware):
+    """
+    Middleware сессии бота (bot.session.middleware).
+    Одинаковые одновременные запросы на чтение уходят в Telegram один раз,
+    остальные ждут тот же ответ. Часть ответов дополнительно живет в
+    коротком кеше процесса (см. _ttl). Ошибки не кешируются.
+    """
+
+    def __init__(self, cache_size: int = 5000):
+        self.cache_size = cache_size
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        self._cache: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+
+    @staticmethod
+    def _ttl(bot: Bot, method: TelegramMethod) -> float:
+        if isinstance(method, GetMe):
+            return 3600
+        if isinstance(method, GetChat):
+            return 60
+        # Права самого бота в канале меняются редко; статус пользователя не кешируем —
+        # он нужен свежим сразу после подписки ("Проверить подписку")
+        if isinstance(method, GetChatMember) and method.user_id == bot.id:
+            return 60
+        return 0
+
+    def _cached(self, key: tuple) -> Any:
+        item = self._cache.get(key)
+        if item is None:
+            return None
+        expires_at, response = item
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        return response
+
+    def _store(self, key: tuple, response: Any, ttl: float):
+        self._cache[key] = (time.monotonic() + ttl, response)
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if not isinstance(method, COALESCED_METHODS):
+            return await make_request(bot, method)
+
+        key = (bot.id, method.__api_method__, method.model_dump_json(exclude_none=True))
+        ttl = self._ttl(bot, method)
+        if ttl:
+            cached = self._cached(key)
+            if cached is not None:
+                return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(make_request(bot, method))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # shield: отмена одного ожидающего не должна отменять общий запрос
+        response = await asyncio.shield(task)
+        if ttl:
+            self._store(key, response, ttl)
+        return response
+
+
+# Общий экземпляр: воркеры создают своих Bot, но кеш и запросы в полете — на весь процесс
+single_flight = SingleFlightMiddleware()
@@ -1,15 +1,121 @@
+import time
+import uuid
+from dataclasses import dataclass
 from typing import Callable, Awaitable, Dict, Any
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
 from aiogram.types import CallbackQuery, Message
 from redis.asyncio import Redis
 
+from config import config
 from core.exceptions import error_handler
 
+# Политики хендлеров (флаг throttle): flags={"throttle": THROTTLE_JOIN}
+THROTTLE_DEFAULT = "default"
+THROTTLE_JOIN = "join"
+THROTTLE_NAV = "nav"
+THROTTLE_ADMIN = "admin"
+
+
+@dataclass(frozen=True)
+class ThrottlePolicy:
+    limit: int       # сколько действий разрешено
+    window_ms: int   # за какое скользящее окно
+
+
+POLICIES = {
+    # Сообщения и команды — как раньше, одно действие в секунду
+    THROTTLE_DEFAULT: ThrottlePolicy(limit=1, window_ms=1000),
+    # Вход в розыгрыш, капча, проверка подписки — дорогие (Bot API + запись в БД)
+    THROTTLE_JOIN: ThrottlePolicy(limit=1, window_ms=2000),
+    # Кнопки навигации: листание списков допускает короткие серии
+    THROTTLE_NAV: ThrottlePolicy(limit=4, window_ms=1000),
+    # Админам лимит только от случайных двойных нажатий
+    THROTTLE_ADMIN: ThrottlePolicy(limit=10, window_ms=1000),
+}
+
+# Сколько помним решение по альбому (элементы приходят в течение ~секунды)
+ALBUM_TTL_MS = 10000
+
+# Скользящее окно на ZSET за один вызов: чистим старые отметки, считаем,
+# добавляем текущую. Возвращает 0 (пропустить) или мс до освобождения окна.
+# Для альбома (KEYS[2] = album:{media_group_id}) решение принимается по первому
+# элементу и сохраняется (SET NX): остальные элементы его повторяют, не тратя лимит.
+SLIDING_WINDOW_LUA = """
+local key = KEYS[1]
+local album = KEYS[2]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+if album then
+    local decided = redis.call('GET', album)
+    if decided then
+        return tonumber(decided)
+    end
+end
+local result = 0
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+if redis.call('ZCARD', key) < limit then
+    redis.call('ZADD', key, now, ARGV[4])
+    redis.call('PEXPIRE', key, window)
+else
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    result = math.max(1, tonumber(oldest[2]) + window - now)
+end
+if album then
+    redis.call('SET', album, result, 'PX', ARGV[5], 'NX')
+end
+return result
+"""
+
 
 class ThrottlingMiddleware(BaseMiddleware):
-    def __init__(self, redis: Redis, rate_limit: float = 1.0):
+    """
+    Один экземпляр на message и callback_query.
+    Решение принимает один атомарный вызов Lua-скрипта в Redis;
+    отклоненные ключи запоминаются в процессе до конца окна,
+    так что повторные нажатия отсекаются вообще без Redis.
+    """
+
+    # Предел локального кеша отказов (чистится от истекших при переполнении)
+    BLOCKED_CACHE_SIZE = 10000
+
+    def __init__(self, redis: Redis):
         self.redis = redis
-        self.rate_limit = rate_limit
+        self.script = redis.register_script(SLIDING_WINDOW_LUA)
+        self._blocked_until: dict[str, float] = {}
+
+    def _policy_name(self, event: Message | CallbackQuery, data: Dict[str, Any]) -> str:
+        flag = get_flag(data, "throttle")
+        if flag:
+            return flag
+        if event.from_user.id in config.ADMIN_IDS:
+            return THROTTLE_ADMIN
+        return THROTTLE_NAV if isinstance(event, CallbackQuery) else THROTTLE_DEFAULT
+
+    def _remember_blocked(self, key: str, retry_after_ms: int, now: float):
+        if len(self._blocked_until) >= self.BLOCKED_CACHE_SIZE:
+            self._blocked_until = {k: v for k, v in self._blocked_until.items() if v > now}
+        self._blocked_until[key] = now + retry_after_ms / 1000
+
+    async def is_throttled(self, key: str, policy: ThrottlePolicy, album_key: str | None = None) -> bool:
+        now = time.monotonic()
+        # Альбом целиком решает Redis: иначе окно может закончиться посреди альбома
+        blocked_until = None if album_key else self._blocked_until.get(key)
+        if blocked_until:
+            if blocked_until > now:
+                return True
+            del self._blocked_until[key]
+
+        keys = [key, album_key] if album_key else [key]
+        retry_after_ms = int(await self.script(
+            keys=keys,
+            args=[int(time.time() * 1000), policy.window_ms, policy.limit, uuid.uuid4().hex[:8], ALBUM_TTL_MS]
+        ))
+        if retry_after_ms:
+            self._remember_blocked(key, retry_after_ms, now)
+            return True
+        return False
 
     async def __call__(
         self,
@@ -18,25 +124,25 @@ class ThrottlingMiddleware(BaseMiddleware):
         data: Dict[str, Any]
     ) -> Any:
         try:
-            # Работаем только с колбэками (кнопки) или командами
-            user_id = event.from_user.id
-            
-            # Ключ анти-спама: throttle:USER_ID
-            key = f"throttle:{user_id}"
-            
-            # Проверяем наличие ключа в Redis
-            if await self.redis.get(key):
-                # Если ключ есть, значит прошло меньше rate_limit секунд
+            policy_name = self._policy_name(event, data)
+            policy = POLICIES.get(policy_name, POLICIES[THROTTLE_DEFAULT])
+
+            # Ключ анти-спама: throttle:POLICY:USER_ID
+            key = f"throttle:{policy_name}:{event.from_user.id}"
+
+            # Элементы альбома приходят пачкой апдейтов — это одно действие пользователя
+            album_key = None
+            if isinstance(event, Message) and event.media_group_id:
+                album_key = f"album:{event.media_group_id}"
+
+            if await self.is_throttled(key, policy, album_key):
                 if isinstance(event, CallbackQuery):
                     await event.answer("⏳ Не так быстро!", show_alert=True)
                 return # Прерываем обработку, хендлер не запустится
-                
-            # Устанавливаем ключ с временем жизни (TTL) = rate_limit
-            await self.redis.set(key, "1", ex=int(self.rate_limit))
-            
+
             # Пропускаем дальше
             return await handler(event, data)
         except Exception as e:
             # Обрабатываем ошибку через централизованный обработчик
             await error_handler.handle_error(e, event.from_user.id if event.from_user else None, "throttling_middleware")
-            raise e
\ No newline at end of file
+            raise e
@@ -0,0 +1,331 @@
+"""baseline: схема, которую создавал Base.metadata.create_all
+
+Существующие базы помечаются этой ревизией без выполнения:
+    alembic stamp 0001_baseline
+после чего применяются остальные миграции (alembic upgrade head).
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0001_baseline"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("user_id", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column("username", sa.String(), nullable=True),
+        sa.Column("full_name", sa.String(), nullable=False),
+        sa.Column("is_premium", sa.Boolean(), nullable=False),
+        sa.Column("premium_until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.create_index("idx_users_username", "users", ["username"])
+    op.create_index("idx_users_premium", "users", ["is_premium"])
+    op.create_index("idx_users_created_at", "users", [sa.text("created_at DESC")])
+
+    op.create_table(
+        "giveaways",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("owner_id", sa.BigInteger(), nullable=False),
+        sa.Column("channel_id", sa.BigInteger(), nullable=False),
+        sa.Column("message_id", sa.BigInteger(), nullable=False),
+        sa.Column("short_description", sa.String(length=255), nullable=True),
+        sa.Column("prize_text", sa.Text(), nullable=False),
+        sa.Column("winners_count", sa.Integer(), nullable=False),
+        sa.Column("finish_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("predetermined_winner_id", sa.BigInteger(), nullable=True),
+        sa.Column("media_file_id", sa.String(), nullable=True),
+        sa.Column("media_type", sa.String(), nullable=True),
+        sa.Column("is_referral_enabled", sa.Boolean(), nullable=False),
+        sa.Column("is_captcha_enabled", sa.Boolean(), nullable=False),
+        sa.Column("is_paid", sa.Boolean(), nullable=False),
+        sa.Column("is_participants_hidden", sa.Boolean(), nullable=False),
+        sa.Column("last_update_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.user_id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("idx_giveaways_status", "giveaways", ["status"])
+    op.create_index("idx_giveaways_owner_id", "giveaways", ["owner_id"])
+    op.create_index("idx_giveaways_created_at", "giveaways", [sa.text("finish_time DESC")])
+    op.create_index("idx_giveaways_status_paused_error", "giveaways", [sa.text("(status = 'paused_error')")])
+
+    op.create_table(
+        "participants",
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("giveaway_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("tickets_count", sa.Integer(), nullable=False),
+        sa.Column("referrer_id", sa.BigInteger(), nullable=True),
+        sa.Column("ticket_code", sa.String(length=10), nullable=True),
+        sa.ForeignKeyConstraint(["giveaway_id"], ["giveaways.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.user_id"]),
+        sa.PrimaryKeyConstraint("user_id", "giveaway_id"),
+        sa.UniqueConstraint("user_id", "giveaway_id", name="unique_user_giveaway"),
+    )
+
+    op.create_table(
+        "winners",
+        sa.Column("giveaway_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["giveaway_id"], ["giveaways.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.user_id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("giveaway_id", "user_id"),
+    )
+
+    op.create_table(
+        "channels",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("channel_id", sa.BigInteger(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("username", sa.String(), nullable=True),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("invite_link", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.user_id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_table(
+        "giveaway_required_channels",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("giveaway_id", sa.Integer(), nullable=False),
+        sa.Column("channel_id", sa.BigInteger(), nullable=False),
+        sa.Column("channel_title", sa.String(), nullable=False),
+        sa.Column("channel_link", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["giveaway_id"], ["giveaways.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_table(
+        "pending_referrals",
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("giveaway_id", sa.Integer(), nullable=False),
+        sa.Column("referrer_id", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["giveaway_id"], ["giveaways.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "giveaway_id"),
+    )
+
+    op.create_table(
+        "admin_logs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("admin_id", sa.BigInteger(), nullable=False),
+        sa.Column("action", sa.String(), nullable=False),
+        sa.Column("target_id", sa.BigInteger(), nullable=True),
+        sa.Column("details", sa.JSON(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_table(
+        "broadcasts",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("message_text", sa.Text(), nullable=False),
+        sa.Column("photo_file_id", sa.String(), nullable=True),
+        sa.Column("video_file_id", sa.String(), nullable=True),
+        sa.Column("document_file_id", sa.String(), nullable=True),
+        sa.Column("scheduled_time", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("sent_count", sa.Integer(), nullable=False),
+        sa.Column("total_count", sa.Integer(), nullable=False),
+        sa.Column("failed_count", sa.Integer(), nullable=False),
+        sa.Column("blocked_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_by", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_table(
+        "scheduled_broadcasts",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("message_text", sa.Text(), nullable=False),
+        sa.Column("photo_file_id", sa.String(), nullable=True),
+        sa.Column("video_file_id", sa.String(), nullable=True),
+        sa.Column("document_file_id", sa.String(), nullable=True),
+        sa.Column("scheduled_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_by", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_table(
+        "conversion_funnels",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("giveaway_id", sa.Integer(), nullable=False),
+        sa.Column("post_views", sa.Integer(), nullable=False),
+        sa.Column("unique_clicks", sa.Integer(), nullable=False),
+        sa.Column("started_join", sa.Integer(), nullable=False),
+        sa.Column("checked_first_channel", sa.Integer(), nullable=False),
+        sa.Column("subscribed_all_required", sa.Integer(), nullable=False),
+        sa.Column("dropped_at_channel_n", sa.JSON(), nullable=False),
+        sa.Column("completed_captcha", sa.Integer(), nullable=False),
+        sa.Column("invited_referrals", sa.Integer(), nullable=False),
+        sa.Column("fully_participated", sa.Integer(), nullable=False),
+        sa.Column("avg_time_to_complete", sa.Interval(), nullable=False),
+        sa.Column("bounce_rate", sa.Numeric(5, 4), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["giveaway_id"], ["giveaways.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_table(
+        "giveaway_histories",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("giveaway_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("total_participants", sa.Integer(), nullable=False),
+        sa.Column("unique_participants", sa.Integer(), nullable=False),
+        sa.Column("new_subscribers", sa.Integer(), nullable=False),
+        sa.Column("total_tickets", sa.Integer(), nullable=False),
+        sa.Column("sponsors_channels", sa.JSON(), nullable=False),
+        sa.Column("new_subs_per_channel", sa.JSON(), nullable=False),
+        sa.Column("avg_tickets_per_user", sa.Numeric(10, 2), nullable=False),
+        sa.Column("referral_conversion", sa.Numeric(5, 4), nullable=False),
+        sa.Column("boost_participants", sa.Integer(), nullable=False),
+        sa.Column("still_subscribed_after_7d", sa.Integer(), nullable=False),
+        sa.Column("still_subscribed_after_30d", sa.Integer(), nullable=False),
+        sa.Column("prize_cost", sa.Numeric(12, 2), nullable=False),
+        sa.Column("cost_per_participant", sa.Numeric(12, 2), nullable=False),
+        sa.Column("roi_subscribers", sa.Numeric(12, 2), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["giveaway_id"], ["giveaways.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("giveaway_id"),
+    )
+
+    op.create_table(
+        "channel_analytics",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("channel_telegram_id", sa.BigInteger(), nullable=False),
+        sa.Column("channel_title", sa.String(), nullable=False),
+        sa.Column("times_used_as_sponsor", sa.Integer(), nullable=False),
+        sa.Column("total_giveaways", sa.JSON(), nullable=False),
+        sa.Column("new_subscribers_brought", sa.Integer(), nullable=False),
+        sa.Column("avg_conversion", sa.Numeric(5, 4), nullable=False),
+        sa.Column("immediate_unsub_rate", sa.Numeric(5, 4), nullable=False),
+        sa.Column("retention_7d", sa.Numeric(5, 4), nullable=False),
+        sa.Column("retention_30d", sa.Numeric(5, 4), nullable=False),
+        sa.Column("engagement_score", sa.Numeric(5, 4), nullable=False),
+        sa.Column("failed_checks", sa.Integer(), nullable=False),
+        sa.Column("avg_check_time", sa.Interval(), nullable=False),
+        sa.Column("rank_by_conversion", sa.Integer(), nullable=False),
+        sa.Column("rank_by_retention", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("channel_ref_id", sa.BigInteger(), nullable=True),
+        sa.ForeignKeyConstraint(["channel_ref_id"], ["channels.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("idx_channel_analytics_channel_telegram_id", "channel_analytics", ["channel_telegram_id"])
+    op.create_index("idx_channel_analytics_channel_ref_id", "channel_analytics", ["channel_ref_id"])
+
+    op.create_table(
+        "subscription_tiers",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("name", sa.String(length=50), nullable=False),
+        sa.Column("display_name", sa.String(length=100), nullable=False),
+        sa.Column("max_concurrent_giveaways", sa.Integer(), nullable=False),
+        sa.Column("max_sponsor_channels", sa.Integer(), nullable=False),
+        sa.Column("max_participants_export", sa.Integer(), nullable=False),
+        sa.Column("has_advanced_analytics", sa.Boolean(), nullable=False),
+        sa.Column("has_custom_branding", sa.Boolean(), nullable=False),
+        sa.Column("has_priority_support", sa.Boolean(), nullable=False),
+        sa.Column("max_concurrent_giveaways_premium", sa.Integer(), nullable=False),
+        sa.Column("max_sponsor_channels_premium", sa.Integer(), nullable=False),
+        sa.Column("max_participants_export_premium", sa.Integer(), nullable=False),
+        sa.Column("has_realtime_subscription_check", sa.Boolean(), nullable=False),
+        sa.Column("price_monthly", sa.Numeric(10, 2), nullable=False),
+        sa.Column("price_yearly", sa.Numeric(10, 2), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("sort_order", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+
+    op.create_table(
+        "user_subscriptions",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("tier_id", sa.Integer(), nullable=False),
+        sa.Column("start_date", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("end_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("auto_renew", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["tier_id"], ["subscription_tiers.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.user_id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_table(
+        "premium_feature_usage",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("feature_name", sa.String(length=100), nullable=False),
+        sa.Column("usage_count", sa.Integer(), nullable=False),
+        sa.Column("usage_limit", sa.Integer(), nullable=True),
+        sa.Column("reset_period", sa.String(length=20), nullable=True),
+        sa.Column("last_reset", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.user_id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_table(
+        "boost_tickets",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("giveaway_id", sa.Integer(), nullable=False),
+        sa.Column("boost_type", sa.String(length=50), nullable=False),
+        sa.Column("issued_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("is_verified", sa.Boolean(), nullable=False),
+        sa.Column("comment", sa.String(length=255), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["giveaway_id"], ["giveaways.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.user_id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    for table in (
+        "boost_tickets",
+        "premium_feature_usage",
+        "user_subscriptions",
+        "subscription_tiers",
+        "channel_analytics",
+        "giveaway_histories",
+        "conversion_funnels",
+        "scheduled_broadcasts",
+        "broadcasts",
+        "admin_logs",
+        "pending_referrals",
+        "giveaway_required_channels",
+        "channels",
+        "winners",
+        "participants",
+        "giveaways",
+        "users",
+    ):
+        op.drop_table(table)
@@ -0,0 +1,89 @@
+"""reachability пользователей, очередь рассылок, журнал доставки
+
+Revision ID: 0002_broadcast_queue
+Revises: 0001_baseline
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0002_broadcast_queue"
+down_revision: Union[str, None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Все колонки nullable — ALTER без перезаписи таблицы
+    op.add_column("users", sa.Column("blocked_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("users", sa.Column("deactivated_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("users", sa.Column("last_delivered_at", sa.DateTime(timezone=True), nullable=True))
+
+    op.add_column("broadcasts", sa.Column("source_chat_id", sa.BigInteger(), nullable=True))
+    op.add_column("broadcasts", sa.Column("source_message_ids", sa.JSON(), nullable=True))
+    op.add_column("broadcasts", sa.Column("audience", sa.JSON(), nullable=True))
+    op.add_column("broadcasts", sa.Column("claimed_by", sa.String(), nullable=True))
+    op.add_column("broadcasts", sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True))
+
+    # Отложенные рассылки теперь живут в broadcasts (status='pending' + scheduled_time)
+    op.execute(
+        """
+        INSERT INTO broadcasts (message_text, photo_file_id, video_file_id, document_file_id,
+                                scheduled_time, status, sent_count, total_count, failed_count,
+                                blocked_count, created_at, created_by)
+        SELECT message_text, photo_file_id, video_file_id, document_file_id,
+               scheduled_time, 'pending', 0, 0, 0, 0, created_at, created_by
+        FROM scheduled_broadcasts
+        WHERE status = 'pending'
+        """
+    )
+    op.drop_table("scheduled_broadcasts")
+
+    op.create_table(
+        "broadcast_deliveries",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("broadcast_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("outcome", sa.String(length=16), nullable=False),
+        sa.Column("error_code", sa.SmallInteger(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["broadcast_id"], ["broadcasts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # Таблица новая и пустая — индекс можно строить сразу
+    op.create_index(
+        "idx_broadcast_deliveries_broadcast_outcome",
+        "broadcast_deliveries",
+        ["broadcast_id", "outcome"],
+    )
+
+    # Дубликаты участников исключает первичный ключ (user_id, giveaway_id)
+    op.execute("ALTER TABLE participants DROP CONSTRAINT IF EXISTS unique_user_giveaway")
+
+
+def downgrade() -> None:
+    op.create_unique_constraint("unique_user_giveaway", "participants", ["user_id", "giveaway_id"])
+
+    op.drop_index("idx_broadcast_deliveries_broadcast_outcome", table_name="broadcast_deliveries")
+    op.drop_table("broadcast_deliveries")
+
+    op.create_table(
+        "scheduled_broadcasts",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("message_text", sa.Text(), nullable=False),
+        sa.Column("photo_file_id", sa.String(), nullable=True),
+        sa.Column("video_file_id", sa.String(), nullable=True),
+        sa.Column("document_file_id", sa.String(), nullable=True),
+        sa.Column("scheduled_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_by", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    for column in ("heartbeat_at", "claimed_by", "audience", "source_message_ids", "source_chat_id"):
+        op.drop_column("broadcasts", column)
+    for column in ("last_delivered_at", "deactivated_at", "blocked_at"):
+        op.drop_column("users", column)
@@ -0,0 +1,95 @@
+"""индексы горячих запросов (CREATE INDEX CONCURRENTLY)
+
+Индексы строятся без блокировки записи, поэтому миграция идет
+вне транзакции (autocommit_block). Если построение прервалось,
+невалидный индекс удаляется и строится заново — повторный запуск безопасен.
+
+Revision ID: 0003_hot_path_indexes
+Revises: 0002_broadcast_queue
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0003_hot_path_indexes"
+down_revision: Union[str, None] = "0002_broadcast_queue"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Сколько дубликатов бустов удалять за один проход
+DEDUPE_BATCH_SIZE = 5000
+
+# имя -> определение (после "ON")
+INDEXES = {
+    "idx_users_reachable":
+        "users (user_id) WHERE blocked_at IS NULL AND deactivated_at IS NULL",
+    "idx_broadcasts_status_scheduled":
+        "broadcasts (status, scheduled_time)",
+    "idx_participants_giveaway_id":
+        "participants (giveaway_id, user_id)",
+    "idx_winners_user_id":
+        "winners (user_id)",
+    "idx_giveaways_status_finish_time":
+        "giveaways (status, finish_time)",
+    "idx_giveaways_active_last_update":
+        "giveaways (last_update_at) WHERE status = 'active'",
+    "idx_giveaways_paused_error":
+        "giveaways (id) WHERE status = 'paused_error'",
+    "idx_required_channels_giveaway_id":
+        "giveaway_required_channels (giveaway_id)",
+}
+
+UNIQUE_INDEXES = {
+    "uq_boost_tickets_user_giveaway_type":
+        "boost_tickets (user_id, giveaway_id, boost_type)",
+}
+
+
+def _dedupe_boost_tickets() -> None:
+    """Удаляет повторные бусты (оставляя самый ранний) пачками, чтобы не держать долгих блокировок"""
+    bind = op.get_bind()
+    while True:
+        result = bind.exec_driver_sql(
+            f"""
+            DELETE FROM boost_tickets WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, row_number() OVER (
+                        PARTITION BY user_id, giveaway_id, boost_type ORDER BY id
+                    ) AS rn
+                    FROM boost_tickets
+                ) ranked
+                WHERE rn > 1
+                LIMIT {DEDUPE_BATCH_SIZE}
+            )
+            """
+        )
+        if result.rowcount < DEDUPE_BATCH_SIZE:
+            break
+
+
+def _create_concurrently(name: str, definition: str, unique: bool = False) -> None:
+    # Остаток неудачного CONCURRENTLY-построения помечен invalid — пересоздаем
+    op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    op.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY {name} ON {definition}")
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        _dedupe_boost_tickets()
+        for name, definition in UNIQUE_INDEXES.items():
+            _create_concurrently(name, definition, unique=True)
+        for name, definition in INDEXES.items():
+            _create_concurrently(name, definition)
+        # Заменен частичным idx_giveaways_paused_error
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_giveaways_status_paused_error")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_giveaways_status_paused_error "
+            "ON giveaways ((status = 'paused_error'))"
+        )
+        for name in [*INDEXES, *UNIQUE_INDEXES]:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,45 @@
+"""архив участников завершенных розыгрышей
+
+Revision ID: 0004_participants_archive
+Revises: 0003_hot_path_indexes
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0004_participants_archive"
+down_revision: Union[str, None] = "0003_hot_path_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "participants_archive",
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("giveaway_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("tickets_count", sa.Integer(), nullable=False),
+        sa.Column("referrer_id", sa.BigInteger(), nullable=True),
+        sa.ForeignKeyConstraint(["giveaway_id"], ["giveaways.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "giveaway_id"),
+    )
+    op.create_index("idx_participants_archive_giveaway_id", "participants_archive", ["giveaway_id"])
+
+    op.add_column("giveaways", sa.Column("participants_archived_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    # Возвращаем архив в горячую таблицу, чтобы не потерять участников
+    op.execute(
+        """
+        INSERT INTO participants (user_id, giveaway_id, created_at, tickets_count, referrer_id)
+        SELECT user_id, giveaway_id, created_at, tickets_count, referrer_id FROM participants_archive
+        ON CONFLICT DO NOTHING
+        """
+    )
+    op.drop_column("giveaways", "participants_archived_at")
+    op.drop_index("idx_participants_archive_giveaway_id", table_name="participants_archive")
+    op.drop_table("participants_archive")
@@ -0,0 +1,25 @@
+"""индекс для keyset-пагинации розыгрышей в админке
+
+Revision ID: 0005_giveaways_keyset_index
+Revises: 0004_participants_archive
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0005_giveaways_keyset_index"
+down_revision: Union[str, None] = "0004_participants_archive"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_giveaways_finish_time_id")
+        op.execute("CREATE INDEX CONCURRENTLY idx_giveaways_finish_time_id ON giveaways (finish_time, id)")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_giveaways_finish_time_id")
@@ -0,0 +1,34 @@
+"""триграммные индексы для поиска в админке
+
+Revision ID: 0006_search_trigram_indexes
+Revises: 0005_giveaways_keyset_index
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0006_search_trigram_indexes"
+down_revision: Union[str, None] = "0005_giveaways_keyset_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "idx_users_username_trgm": "users USING gin (username gin_trgm_ops)",
+    "idx_users_full_name_trgm": "users USING gin (full_name gin_trgm_ops)",
+    "idx_giveaways_prize_text_trgm": "giveaways USING gin (prize_text gin_trgm_ops)",
+}
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES.items():
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            op.execute(f"CREATE INDEX CONCURRENTLY {name} ON {definition}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
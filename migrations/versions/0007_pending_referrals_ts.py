@@ -0,0 +1,33 @@
+"""время записи pending_referrals для очистки брошенных вступлений
+
+Revision ID: 0007_pending_referrals_ts
+Revises: 0006_search_trigram_indexes
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0007_pending_referrals_ts"
+down_revision: Union[str, None] = "0006_search_trigram_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Существующие строки получают now() из server_default (поэтому NOT NULL сразу)
+    # и уйдут при первой очистке после истечения срока
+    op.add_column(
+        "pending_referrals",
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_pending_referrals_created_at")
+        op.execute("CREATE INDEX CONCURRENTLY idx_pending_referrals_created_at ON pending_referrals (created_at)")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_pending_referrals_created_at")
+    op.drop_column("pending_referrals", "created_at")
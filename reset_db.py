@@ -1,28 +1,24 @@
 import asyncio
+from alembic import command
 from redis.asyncio import Redis
-from database import engine, Base
+from sqlalchemy import text
+from database import engine
+from database.schema import get_alembic_config
 from config import config
 
-# Импортируем ВСЕ модели, чтобы SQLAlchemy знала, что создавать
-from database.models.user import User
-from database.models.giveaway import Giveaway
-from database.models.participant import Participant
-from database.models.channel import Channel
-from database.models.required_channel import GiveawayRequiredChannel
-from database.models.winner import Winner # <--- Важно! Новая таблица
-from database.models.boost_history import BoostTicket
 
 async def reset_database():
     print("🗑 Удаляю старые таблицы PostgreSQL...")
     async with engine.begin() as conn:
-        # Удаляем все таблицы с использованием CASCADE для разрешения зависимостей
-        for table in reversed(Base.metadata.sorted_tables):
-            await conn.execute(table.delete())  # Удаляем данные
-        # Затем удаляем сами таблицы
-        await conn.run_sync(Base.metadata.drop_all)
-        # Создаем все таблицы заново с новыми полями
-        await conn.run_sync(Base.metadata.create_all)
-    
+        # Пересоздаем схему целиком: таблицы, индексы и alembic_version
+        await conn.execute(text("DROP SCHEMA public CASCADE"))
+        await conn.execute(text("CREATE SCHEMA public"))
+    await engine.dispose()
+
+    print("🛠 Применяю миграции...")
+    # env.py сам запускает event loop, поэтому выполняем в отдельном потоке
+    await asyncio.to_thread(command.upgrade, get_alembic_config(), "head")
+
     print("🗑 Очищаю Redis...")
     redis = Redis.from_url(config.REDIS_URL)
     await redis.flushdb()
@@ -31,4 +27,4 @@ async def reset_database():
     print("✅ База данных полностью обновлена!")
 
 if __name__ == "__main__":
-    asyncio.run(reset_database())
\ No newline at end of file
+    asyncio.run(reset_database())
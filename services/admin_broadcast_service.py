@@ -1,41 +1,81 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
-from database.models import Broadcast, ScheduledBroadcast, User
+from sqlalchemy import select, update, func, or_
+from database.models import Broadcast, User
 from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import CopyMessage, CopyMessages
 import asyncio
 import logging
+import time
 import traceback
 
 # Добавляем импорт для создания сессии внутри функции восстановления
 from database import async_session_maker
+from services.broadcast_audience import (
+    FailedRecipients,
+    audience_from_spec,
+    count_recipients,
+    iter_recipient_batches
+)
+from services.broadcast_delivery_log import DeliveryLogWriter, get_delivery_stats
+from core.services.reachability_service import (
+    classify_delivery_error,
+    delivery_error_code,
+    OUTCOME_SENT,
+    OUTCOME_BLOCKED,
+    OUTCOME_DEACTIVATED
+)
 
 from redis.asyncio import Redis
 from config import config
 
+# Если воркер не обновлял heartbeat дольше этого времени, рассылка считается зависшей
+BROADCAST_STALE_MINUTES = 15
+# Как часто обновлять heartbeat, пока рассылка ждет (Светофор, RetryAfter)
+HEARTBEAT_INTERVAL_SECONDS = 30
+
+
+class BroadcastStopped(Exception):
+    """Рассылка больше не in_progress (восстановлена как зависшая или изменена вручную)"""
+
 class BroadcastService:
     def __init__(self, bot: Bot, session: AsyncSession):
         self.bot = bot
         self.session = session
         self.logger = logging.getLogger('broadcast')
         self.redis = Redis.from_url(config.REDIS_URL)
+        self._heartbeat_at = 0.0
     
     async def create_broadcast(self, message_text: str = None, photo_file_id: str = None,
                               video_file_id: str = None, document_file_id: str = None,
-                              admin_id: int = None, scheduled_time: datetime = None) -> Broadcast:
+                              admin_id: int = None, scheduled_time: datetime = None,
+                              audience: dict = None, source_chat_id: int = None,
+                              source_message_ids: list[int] = None) -> Broadcast:
         """
-        Создание новой рассылки
+        Создание новой рассылки.
+        Если передан источник (source_chat_id + source_message_ids), рассылка
+        отправляется через copy_message, а file_id-поля не используются.
         """
         try:
+            if source_chat_id and source_message_ids:
+                source_chat_id, source_message_ids = await self.stage_content(
+                    source_chat_id, sorted(source_message_ids)
+                )
+            
             # Создаем объект
             broadcast = Broadcast(
                 message_text=message_text or '',
                 photo_file_id=photo_file_id,
                 video_file_id=video_file_id,
                 document_file_id=document_file_id,
-                scheduled_time=scheduled_time,
+                source_chat_id=source_chat_id,
+                source_message_ids=source_message_ids,
+                # Немедленная рассылка — это задача с наступившим временем, ее заберет поллер
+                scheduled_time=scheduled_time or datetime.now(timezone.utc),
+                audience=audience,
                 created_by=admin_id,
-                status="pending" if scheduled_time else "in_progress"
+                status="pending"
             )
             
             self.session.add(broadcast)
@@ -52,80 +92,225 @@ class BroadcastService:
             traceback.print_exc()
             return None
     
+    async def create_retry_broadcast(self, broadcast_id: int, admin_id: int) -> Broadcast | None:
+        """
+        Создает повторную рассылку того же контента только тем,
+        у кого в журнале доставки исход failed.
+        """
+        original = await self.session.get(Broadcast, broadcast_id)
+        if not original:
+            return None
+        
+        broadcast = Broadcast(
+            message_text=original.message_text,
+            photo_file_id=original.photo_file_id,
+            video_file_id=original.video_file_id,
+            document_file_id=original.document_file_id,
+            source_chat_id=original.source_chat_id,
+            source_message_ids=original.source_message_ids,
+            scheduled_time=datetime.now(timezone.utc),
+            audience=FailedRecipients(broadcast_id).to_spec(),
+            created_by=admin_id,
+            status="pending"
+        )
+        self.session.add(broadcast)
+        await self.session.flush()
+        return broadcast
+    
+    async def stage_content(self, chat_id: int, message_ids: list[int]) -> tuple[int, list[int]]:
+        """
+        Публикует контент рассылки в служебный чат (один раз),
+        чтобы исходное сообщение админа можно было удалить.
+        """
+        staging_chat_id = config.BROADCAST_STAGING_CHAT_ID
+        if not staging_chat_id:
+            return chat_id, message_ids
+        
+        try:
+            copied = await self.bot.copy_messages(
+                chat_id=staging_chat_id,
+                from_chat_id=chat_id,
+                message_ids=message_ids
+            )
+            return staging_chat_id, [m.message_id for m in copied]
+        except Exception as e:
+            self.logger.error(f"Failed to stage broadcast content, using admin chat as source: {e}")
+            return chat_id, message_ids
+    
+    @staticmethod
+    def _build_copy_payload(broadcast: Broadcast) -> CopyMessage | CopyMessages | None:
+        """
+        Готовит запрос копирования один раз на всю рассылку,
+        для каждого получателя подменяется только chat_id.
+        """
+        if not broadcast.source_chat_id or not broadcast.source_message_ids:
+            return None
+        if len(broadcast.source_message_ids) == 1:
+            return CopyMessage(
+                chat_id=0,
+                from_chat_id=broadcast.source_chat_id,
+                message_id=broadcast.source_message_ids[0]
+            )
+        # Альбом: copy_messages сохраняет группировку медиа
+        return CopyMessages(
+            chat_id=0,
+            from_chat_id=broadcast.source_chat_id,
+            message_ids=broadcast.source_message_ids
+        )
+    
+    async def claim_due_broadcast(self, worker_id: str) -> Broadcast | None:
+        """
+        Забирает одну рассылку, время которой наступило.
+        SKIP LOCKED позволяет нескольким воркерам разбирать очередь без гонок.
+        """
+        stmt = (
+            select(Broadcast)
+            .where(Broadcast.status == "pending", Broadcast.scheduled_time <= func.now())
+            .order_by(Broadcast.scheduled_time)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        broadcast = await self.session.scalar(stmt)
+        if not broadcast:
+            return None
+        
+        broadcast.status = "in_progress"
+        broadcast.claimed_by = worker_id
+        broadcast.heartbeat_at = datetime.now(timezone.utc)
+        await self.session.commit()
+        return broadcast
+    
+    async def _save_progress(self, broadcast_id: int, **values):
+        """
+        Сохраняет счетчики и heartbeat, коммитит, чтобы прогресс был виден снаружи.
+        Обновляется только рассылка в статусе in_progress; если ее там уже нет —
+        BroadcastStopped: отправку надо прекратить, а не перезаписывать чужой статус.
+        """
+        result = await self.session.execute(
+            update(Broadcast)
+            .where(Broadcast.id == broadcast_id, Broadcast.status == "in_progress")
+            .values(heartbeat_at=func.now(), **values)
+        )
+        await self.session.commit()
+        self._heartbeat_at = time.monotonic()
+        if result.rowcount == 0:
+            raise BroadcastStopped(broadcast_id)
+    
+    async def _keep_alive(self, broadcast_id: int):
+        """heartbeat во время ожиданий, не чаще HEARTBEAT_INTERVAL_SECONDS"""
+        if time.monotonic() - self._heartbeat_at >= HEARTBEAT_INTERVAL_SECONDS:
+            await self._save_progress(broadcast_id)
+    
+    async def _sleep(self, broadcast_id: int, seconds: float):
+        """Долгая пауза кусками с обновлением heartbeat, чтобы рассылку не сочли зависшей"""
+        deadline = time.monotonic() + seconds
+        while (left := deadline - time.monotonic()) > 0:
+            await asyncio.sleep(min(left, HEARTBEAT_INTERVAL_SECONDS))
+            await self._keep_alive(broadcast_id)
+    
     async def send_broadcast(self, broadcast_id: int) -> bool:
         """
-        Отправка рассылки всем пользователям
+        Отправка рассылки аудитории.
+        Получатели читаются страницами отдельной сессией, а прогресс коммитится пачками.
         """
         try:
             broadcast = await self.session.get(Broadcast, broadcast_id)
             if not broadcast:
                 return False
-            
-            # Если рассылка была отложена, меняем статус на in_progress перед началом
-            if broadcast.status == "pending":
-                broadcast.status = "in_progress"
-                await self.session.flush()
 
-            # Получаем всех пользователей
-            result = await self.session.execute(select(User.user_id))
-            user_ids = result.scalars().all()
-            
-            total_count = len(user_ids)
+            # Аудитория считается одним SQL-запросом (заблокировавшие бота отсеиваются там же)
+            audience = audience_from_spec(broadcast.audience)
+            total_count = await count_recipients(self.session, audience)
             sent_count = 0
             failed_count = 0
             blocked_count = 0
+            delivery_log = DeliveryLogWriter(broadcast_id)
+            payload = self._build_copy_payload(broadcast)
             
             # Обновляем общее количество
-            await self.session.execute(
-                update(Broadcast)
-                .where(Broadcast.id == broadcast_id)
-                .values(total_count=total_count)
-            )
+            await self._save_progress(broadcast_id, total_count=total_count)
             
-            # Отправляем сообщение каждому пользователю
-            for user_id in user_ids:
-                # ПРОВЕРКА СВЕТОФОРА
-                # Если идет выбор победителя, ждем, пока он закончит
-                while await self.redis.get("system:high_load"):
-                    await asyncio.sleep(2)  # Спим 2 секунды и проверяем снова
-                
-                try:
-                    success = await self._send_single_message(user_id, broadcast)
-                    if success:
-                        sent_count += 1
-                    else:
-                        failed_count += 1
-                except Exception as e:
-                    blocked_count += 1
-                
-                # ОГРАНИЧИТЕЛЬ СКОРОСТИ (чтобы не забить канал полностью)
-                # 0.1 сек = 10 сообщений в секунду. Оставляем запас для юзеров.
-                await asyncio.sleep(0.1)
+            # Отправляем сообщение каждому пользователю (получатели читаются страницами)
+            async with async_session_maker() as reader:
+                async for user_ids in iter_recipient_batches(reader, audience):
+                    for user_id in user_ids:
+                        # ПРОВЕРКА СВЕТОФОРА
+                        # Если идет выбор победителя, ждем, пока он закончит
+                        while await self.redis.get("system:high_load"):
+                            await asyncio.sleep(2)  # Спим 2 секунды и проверяем снова
+                            await self._keep_alive(broadcast_id)
+                    
+                        outcome, error_code = await self._send_single_message(user_id, broadcast, payload)
+                        delivery_log.record(user_id, outcome, error_code)
+                        if outcome == OUTCOME_SENT:
+                            sent_count += 1
+                        elif outcome in (OUTCOME_BLOCKED, OUTCOME_DEACTIVATED):
+                            blocked_count += 1
+                        else:
+                            failed_count += 1
+                    
+                        if delivery_log.is_full():
+                            await delivery_log.flush()
+                            await self._save_progress(
+                                broadcast_id,
+                                sent_count=sent_count,
+                                failed_count=failed_count,
+                                blocked_count=blocked_count
+                            )
+                    
+                        # ОГРАНИЧИТЕЛЬ СКОРОСТИ (чтобы не забить канал полностью)
+                        # 0.1 сек = 10 сообщений в секунду. Оставляем запас для юзеров.
+                        await asyncio.sleep(0.1)
             
-            # Обновляем статистику и завершаем
-            await self.session.execute(
-                update(Broadcast)
-                .where(Broadcast.id == broadcast_id)
-                .values(
-                    sent_count=sent_count,
-                    failed_count=failed_count,
-                    blocked_count=blocked_count,
-                    status="completed",
-                    completed_at=datetime.now()
-                )
+            await delivery_log.flush(wait=True)
+            
+            # Итоговые счетчики берем из журнала доставки
+            stats = await get_delivery_stats(self.session, broadcast_id)
+            await self._save_progress(
+                broadcast_id,
+                **stats,
+                status="completed",
+                completed_at=func.now()
             )
             
             return True
+        except BroadcastStopped:
+            self.logger.warning(f"Broadcast #{broadcast_id} is no longer in progress, stopping")
+            # Уже отправленное должно попасть в журнал (повтор по неудачным строится по нему)
+            try:
+                await delivery_log.flush(wait=True)
+            except Exception as e:
+                self.logger.error(f"Failed to flush delivery log of stopped broadcast #{broadcast_id}: {e}")
+            return False
         except Exception as e:
             self.logger.error(f"Error sending broadcast: {e}")
+            await self._mark_failed(broadcast_id)
             return False
     
-    async def _send_single_message(self, user_id: int, broadcast: Broadcast) -> bool:
+    async def _mark_failed(self, broadcast_id: int):
+        """Рассылка прервана ошибкой (например, не записался журнал доставки)"""
+        try:
+            await self.session.rollback()
+            await self.session.execute(
+                update(Broadcast)
+                .where(Broadcast.id == broadcast_id, Broadcast.status == "in_progress")
+                .values(status="failed", heartbeat_at=func.now())
+            )
+            await self.session.commit()
+        except Exception as e:
+            self.logger.error(f"Failed to mark broadcast #{broadcast_id} as failed: {e}")
+    
+    async def _send_single_message(self, user_id: int, broadcast: Broadcast,
+                                   payload: CopyMessage | CopyMessages | None = None,
+                                   retry: bool = True) -> tuple[str, int | None]:
         """
-        Отправка одного сообщения пользователю
+        Отправка одного сообщения пользователю.
+        Возвращает исход доставки (sent / blocked / deactivated / failed) и код ошибки
         """
         try:
-            if broadcast.photo_file_id:
+            if payload is not None:
+                await self.bot(payload.model_copy(update={"chat_id": user_id}))
+            elif broadcast.photo_file_id:
                 await self.bot.send_photo(
                     chat_id=user_id,
                     photo=broadcast.photo_file_id,
@@ -148,12 +333,15 @@ class BroadcastService:
                     chat_id=user_id,
                     text=broadcast.message_text
                 )
-            return True
+            return OUTCOME_SENT, None
+        except TelegramRetryAfter as e:
+            # Упёрлись в лимит Telegram — ждем и пробуем один раз повторно
+            if not retry:
+                return classify_delivery_error(e), delivery_error_code(e)
+            await self._sleep(broadcast.id, e.retry_after)
+            return await self._send_single_message(user_id, broadcast, payload, retry=False)
         except Exception as e:
-            # Проверяем тип ошибки, чтобы определить, заблокирован ли бот
-            if "blocked" in str(e).lower() or "not found" in str(e).lower():
-                return False
-            return True
+            return classify_delivery_error(e), delivery_error_code(e)
     
     async def get_broadcast_history(self, page: int = 1, page_size: int = 10) -> tuple[list[Broadcast], int]:
         try:
@@ -176,37 +364,49 @@ class BroadcastService:
         except Exception:
             return [], 0
     
-    async def get_scheduled_broadcasts(self, page: int = 1, page_size: int = 10) -> tuple[list[ScheduledBroadcast], int]:
+    async def get_scheduled_broadcasts(self, page: int = 1, page_size: int = 10) -> tuple[list[Broadcast], int]:
         try:
-            from sqlalchemy import func
             offset = (page - 1) * page_size
             
             result = await self.session.execute(
-                select(ScheduledBroadcast)
-                .order_by(ScheduledBroadcast.scheduled_time.asc())
+                select(Broadcast)
+                .where(Broadcast.status == "pending")
+                .order_by(Broadcast.scheduled_time.asc())
                 .offset(offset).limit(page_size)
             )
             scheduled_broadcasts = result.scalars().all()
             
             result_count = await self.session.execute(
-                select(func.count(ScheduledBroadcast.id))
+                select(func.count(Broadcast.id)).where(Broadcast.status == "pending")
             )
             total_count = result_count.scalar()
             
             return scheduled_broadcasts, total_count or 0
         except Exception:
             return [], 0
+    
+    async def close(self):
+        """Закрытие соединения с Redis"""
+        await self.redis.aclose()
 
-# --- НОВАЯ ФУНКЦИЯ ВОССТАНОВЛЕНИЯ ---
+# --- ВОССТАНОВЛЕНИЕ ЗАВИСШИХ ---
 async def recover_stuck_broadcasts(bot: Bot):
     """
-    Ищет зависшие рассылки (in_progress) при старте бота,
+    Ищет зависшие рассылки (in_progress без heartbeat дольше BROADCAST_STALE_MINUTES),
     меняет их статус на interrupted и уведомляет админа.
+    Живые рассылки других воркеров не трогаются.
     """
     async with async_session_maker() as session:
         try:
-            # Ищем зависшие
-            stmt = select(Broadcast).where(Broadcast.status == "in_progress")
+            stale_before = datetime.now(timezone.utc) - timedelta(minutes=BROADCAST_STALE_MINUTES)
+            stmt = (
+                select(Broadcast)
+                .where(
+                    Broadcast.status == "in_progress",
+                    or_(Broadcast.heartbeat_at.is_(None), Broadcast.heartbeat_at < stale_before)
+                )
+                .with_for_update(skip_locked=True)
+            )
             result = await session.execute(stmt)
             stuck_broadcasts = result.scalars().all()
             
@@ -224,7 +424,7 @@ async def recover_stuck_broadcasts(bot: Bot):
                     await bot.send_message(
                         bc.created_by,
                         f"⚠️ <b>Внимание!</b>\n\n"
-                        f"Рассылка #{bc.id} была прервана из-за перезагрузки бота.\n"
+                        f"Рассылка #{bc.id} была прервана (воркер перестал отвечать).\n"
                         f"Статус изменен на 'Прервано'.\n"
                         f"Отправлено: {bc.sent_count}/{bc.total_count}.\n\n"
                         f"Вы можете создать новую рассылку или повторить эту из меню 'История'."
@@ -237,7 +437,3 @@ async def recover_stuck_broadcasts(bot: Bot):
             
         except Exception as e:
             logging.error(f"Error during broadcast recovery: {e}")
-    
-    async def close(self):
-        """Закрытие соединения с Redis"""
-        await self.redis.aclose()
\ No newline at end of file
@@ -1,7 +1,11 @@
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, update, or_, String
-from database.models import Giveaway, Participant, User
+from sqlalchemy.orm import noload
+from database.models import Giveaway, User
+from database.requests.participant_repo import all_participations
+from services import admin_search
+from services.admin_pagination import PageRequest, fetch_keyset_page, estimate_total, count_exact
 from aiogram import Bot
 from typing import List, Dict, Optional
 
@@ -13,61 +17,38 @@ class GiveawayService:
     
     async def search_giveaways(self, query: str) -> List[Giveaway]:
         """
-        Поиск розыгрышей по названию приза, ID владельца или статусу
+        Поиск розыгрышей по ID, ID владельца или тексту приза (см. services/admin_search.py)
         """
-        try:
-            # Попробуем сначала найти по ID (если query - число)
-            try:
-                giveaway_id = int(query)
-                result = await self.session.execute(
-                    select(Giveaway).where(Giveaway.id == giveaway_id)
-                )
-                giveaways = result.scalars().all()
-                if giveaways:
-                    return giveaways
-            except ValueError:
-                pass  # Если query не число, продолжаем поиск по другим полям
-            
-            # Поиск по тексту приза или ID владельца
-            result = await self.session.execute(
-                select(Giveaway).where(
-                    or_(
-                        Giveaway.prize_text.ilike(f"%{query}%"),
-                        func.cast(Giveaway.owner_id, String).ilike(f"%{query}%")
-                    )
-                )
-            )
-            return result.scalars().all()
-        except Exception:
-            # Обработка любых других ошибок (например, связанных с базой данных)
-            return []
+        return await admin_search.search_giveaways(self.session, query)
     
-    async def get_giveaways_paginated(self, page: int = 1, page_size: int = 10) -> tuple[List[Giveaway], int]:
+    # Ключ сортировки списка розыгрышей (keyset-пагинация, индекс idx_giveaways_finish_time_id)
+    LIST_KEY = [Giveaway.finish_time, Giveaway.id]
+
+    def _giveaways_query(self):
+        # Участники розыгрыша (selectin по умолчанию) для строки списка не нужны
+        return select(Giveaway).options(noload(Giveaway.participants))
+
+    async def get_giveaways_page(self, request: PageRequest | None = None,
+                                 page_size: int = 10) -> tuple[List[Giveaway], bool]:
         """
-        Получение списка розыгрышей с пагинацией
+        Страница розыгрышей (поздние сверху) по курсору, без OFFSET и COUNT
+        :return: (розыгрыши, есть ли следующая страница)
         """
         try:
-            offset = (page - 1) * page_size
-            
-            # Получение розыгрышей
-            result = await self.session.execute(
-                select(Giveaway)
-                .order_by(Giveaway.finish_time.desc())
-                .offset(offset)
-                .limit(page_size)
-            )
-            giveaways = result.scalars().all()
-            
-            # Получение общего количества
-            result_count = await self.session.execute(
-                select(func.count(Giveaway.id))
+            return await fetch_keyset_page(
+                self.session, self._giveaways_query(), self.LIST_KEY, page_size, request
             )
-            total_count = result_count.scalar()
-            
-            return giveaways, total_count or 0
         except Exception:
             # Обработка любых ошибок (например, связанных с базой данных)
-            return [], 0
+            return [], False
+
+    async def estimate_giveaways_total(self) -> int | None:
+        """Примерное число розыгрышей из статистики планировщика"""
+        return await estimate_total(self.session, "giveaways")
+
+    async def count_giveaways(self) -> int:
+        """Точное число розыгрышей (только по запросу админа)"""
+        return await count_exact(self.session, self._giveaways_query())
     
     async def get_giveaway_detailed_info(self, giveaway_id: int) -> Optional[Dict]:
         """
@@ -83,8 +64,9 @@ class GiveawayService:
                 return None
             
             # Подсчет количества участников
+            participations = all_participations()
             participant_count = await self.session.scalar(
-                select(func.count(Participant.user_id)).where(Participant.giveaway_id == giveaway_id)
+                select(func.count(participations.c.user_id)).where(participations.c.giveaway_id == giveaway_id)
             )
             
             # Получение информации о владельце
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+from sqlalchemy import select, func, text, tuple_, DateTime
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.security.hmac_signer import sign_payload, verify_payload
+
+# Callback страниц: adm_pg:{список}:{a|b}:{номер}:{курсор}:{подпись}
+# a — после курсора (вперед), b — до курсора (назад). Курсор — значения ключа сортировки.
+PAGE_PREFIX = "adm_pg"
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class PageRequest(NamedTuple):
+    list_name: str
+    direction: str
+    page: int
+    cursor: tuple
+
+
+def _encode_value(value) -> str:
+    if isinstance(value, datetime):
+        return str((value - EPOCH) // timedelta(microseconds=1))
+    return str(value)
+
+
+def _decode_value(raw: str, column):
+    if isinstance(column.type, DateTime):
+        return EPOCH + timedelta(microseconds=int(raw))
+    return int(raw)
+
+
+def page_callback(list_name: str, direction: str, page: int, cursor: tuple) -> str:
+    """callback_data кнопки перехода на страницу с подписанным курсором"""
+    payload = f"{list_name}:{direction}:{page}:{'.'.join(_encode_value(v) for v in cursor)}"
+    return f"{PAGE_PREFIX}:{payload}:{sign_payload(payload)}"
+
+
+def parse_page_callback(data: str, key_columns: list) -> PageRequest | None:
+    """Разбирает callback страницы; None — подпись не сошлась или формат битый"""
+    try:
+        prefix, rest = data.split(":", 1)
+        payload, sig = rest.rsplit(":", 1)
+        if prefix != PAGE_PREFIX or not verify_payload(payload, sig):
+            return None
+        list_name, direction, page, raw_cursor = payload.split(":")
+        raw_values = raw_cursor.split(".")
+        if direction not in ("a", "b") or len(raw_values) != len(key_columns):
+            return None
+        cursor = tuple(_decode_value(raw, col) for raw, col in zip(raw_values, key_columns))
+        return PageRequest(list_name, direction, int(page), cursor)
+    except (ValueError, IndexError):
+        return None
+
+
+async def fetch_keyset_page(
+    session: AsyncSession,
+    stmt,
+    key_columns: list,
+    page_size: int,
+    request: PageRequest | None = None
+) -> tuple[list, bool]:
+    """
+    Страница по убыванию ключа (key_columns) без OFFSET: WHERE (ключ) < курсор LIMIT n.
+    Стоимость не зависит от глубины страницы при индексе по ключу.
+    :return: (строки страницы, есть ли страница дальше)
+    """
+    key = tuple_(*key_columns)
+    if request and request.direction == "b":
+        # Назад: ближайшие бо́льшие значения по возрастанию, затем разворачиваем
+        stmt = stmt.where(key > tuple_(*request.cursor)).order_by(*key_columns).limit(page_size)
+        rows = list(reversed((await session.execute(stmt)).scalars().all()))
+        return rows, True
+
+    if request:
+        stmt = stmt.where(key < tuple_(*request.cursor))
+    stmt = stmt.order_by(*(col.desc() for col in key_columns)).limit(page_size + 1)
+    rows = list((await session.execute(stmt)).scalars().all())
+    return rows[:page_size], len(rows) > page_size
+
+
+async def estimate_total(session: AsyncSession, table_name: str) -> int | None:
+    """
+    Примерное число строк из статистики планировщика (pg_class.reltuples).
+    None — таблица еще не анализировалась, точное число — только по кнопке.
+    """
+    estimate = await session.scalar(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": table_name}
+    )
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+async def count_exact(session: AsyncSession, stmt) -> int:
+    """Точный COUNT(*) по тому же запросу, что и список (без сортировки)"""
+    return int(await session.scalar(
+        select(func.count()).select_from(stmt.order_by(None).subquery())
+    ) or 0)
@@ -0,0 +1,139 @@
+import logging
+from contextlib import asynccontextmanager
+from sqlalchemy import select, func, or_, case
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
+
+from database.models import User, Giveaway
+
+logger = logging.getLogger(__name__)
+
+# Жесткий предел выдачи (кнопки в одном сообщении)
+SEARCH_LIMIT = 20
+# Потолок времени одного поискового запроса, мс
+SEARCH_TIMEOUT_MS = 2000
+# Короче трех символов триграммный индекс не работает — такие запросы не выполняем
+MIN_TRIGRAM_LENGTH = 3
+# Границы колонок: Giveaway.id — INTEGER, user_id / owner_id — BIGINT.
+# Число вне диапазона asyncpg не примет вовсе, и поиск молча вернул бы пусто
+INT32_MAX = 2 ** 31 - 1
+INT64_MAX = 2 ** 63 - 1
+
+
+def escape_like(value: str) -> str:
+    """Экранирует спецсимволы LIKE во вводе админа"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@asynccontextmanager
+async def statement_timeout(session: AsyncSession, timeout_ms: int = SEARCH_TIMEOUT_MS):
+    """
+    statement_timeout на время поиска.
+    SET (не LOCAL) работает и на AUTOCOMMIT-соединении реплики; в обычной транзакции
+    его отменит откат, если запрос упал по таймауту и RESET выполнить нельзя.
+    """
+    conn = await session.connection()
+    await conn.exec_driver_sql(f"SET statement_timeout = {int(timeout_ms)}")
+    try:
+        yield
+    finally:
+        try:
+            await conn.exec_driver_sql("RESET statement_timeout")
+        except DBAPIError:
+            pass
+
+
+async def _run_search(session: AsyncSession, stmt) -> list:
+    try:
+        async with statement_timeout(session):
+            return list((await session.execute(stmt.limit(SEARCH_LIMIT))).scalars().all())
+    except DBAPIError as e:
+        logger.warning(f"Admin search failed or timed out: {e}")
+        return []
+
+
+async def search_users(session: AsyncSession, query: str) -> list[User]:
+    """
+    Поиск пользователей:
+    - число — точный ID (первичный ключ);
+    - @username — точное совпадение или префикс (от трех символов);
+    - текст — подстрока username / имени по триграммным индексам, по убыванию сходства.
+    """
+    query = query.strip()
+    if not query:
+        return []
+
+    # isdecimal, а не isdigit: "²" — digit, но int() его не разберет
+    if query.isdecimal():
+        value = int(query)
+        if value > INT64_MAX:
+            return []
+        return await _run_search(session, select(User).where(User.user_id == value))
+
+    if len(query.lstrip("@")) < MIN_TRIGRAM_LENGTH:
+        # Такой запрос не использует индекс и привел бы к полному сканированию
+        return []
+
+    if query.startswith("@"):
+        name = query.lstrip("@")
+        stmt = (
+            select(User)
+            .where(User.username.ilike(f"{escape_like(name)}%"))
+            # Точное совпадение первым, затем короткие (ближе к запросу)
+            .order_by(
+                case((func.lower(User.username) == name.lower(), 0), else_=1),
+                func.length(User.username)
+            )
+        )
+        return await _run_search(session, stmt)
+
+    pattern = f"%{escape_like(query)}%"
+    rank = func.greatest(
+        func.similarity(func.coalesce(User.username, ""), query),
+        func.similarity(User.full_name, query)
+    )
+    stmt = (
+        select(User)
+        .where(or_(User.username.ilike(pattern), User.full_name.ilike(pattern)))
+        .order_by(rank.desc(), User.user_id.desc())
+    )
+    return await _run_search(session, stmt)
+
+
+async def search_giveaways(session: AsyncSession, query: str) -> list[Giveaway]:
+    """
+    Поиск розыгрышей:
+    - число (или #число) — ID розыгрыша либо ID владельца (оба по индексам);
+    - текст — подстрока приза по триграммному индексу, по убыванию сходства.
+    """
+    query = query.strip()
+    if not query:
+        return []
+
+    # Участники розыгрыша (selectin по умолчанию) для выдачи поиска не нужны
+    base = select(Giveaway).options(noload(Giveaway.participants))
+
+    number = query.lstrip("#")
+    if number.isdecimal():
+        value = int(number)
+        if value > INT64_MAX:
+            return []
+        if value > INT32_MAX:
+            # Такого ID розыгрыша быть не может — только владелец (ID Telegram бывают > 2^31)
+            stmt = base.where(Giveaway.owner_id == value).order_by(Giveaway.finish_time.desc())
+        else:
+            stmt = (
+                base.where(or_(Giveaway.id == value, Giveaway.owner_id == value))
+                .order_by(case((Giveaway.id == value, 0), else_=1), Giveaway.finish_time.desc())
+            )
+        return await _run_search(session, stmt)
+
+    if len(query) < MIN_TRIGRAM_LENGTH:
+        return []
+
+    stmt = (
+        base.where(Giveaway.prize_text.ilike(f"%{escape_like(query)}%"))
+        .order_by(func.similarity(Giveaway.prize_text, query).desc(), Giveaway.finish_time.desc())
+    )
+    return await _run_search(session, stmt)
@@ -1,7 +1,8 @@
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, update
-from database.models import User, Giveaway, Participant, AdminLog
+from database.models import User, Giveaway, AdminLog
+from database.requests.participant_repo import all_participations
 from typing import Dict, Any
 
 
@@ -22,8 +23,9 @@ class StatisticsService:
         )
         
         # Всего участий
+        participations = all_participations()
         total_participations = await self.session.scalar(
-            select(func.count(Participant.user_id))
+            select(func.count(participations.c.user_id))
         )
         
         # Пользователей без username (потенциально боты)
@@ -109,8 +111,9 @@ class CachedStatisticsService(StatisticsService):
         )
         
         # Всего участий
+        participations = all_participations()
         total_participations = await self.session.scalar(
-            select(func.count(Participant.user_id))
+            select(func.count(participations.c.user_id))
         )
         
         # Пользователей без username (потенциально боты)
@@ -1,7 +1,10 @@
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, update, or_
-from database.models import User, Giveaway, Participant
+from database.models import User, Giveaway
+from database.requests.participant_repo import all_participations
+from services import admin_search
+from services.admin_pagination import PageRequest, fetch_keyset_page, estimate_total, count_exact
 from typing import List, Dict, Optional
 
 
@@ -11,87 +14,49 @@ class UserService:
     
     async def search_users(self, query: str) -> List[User]:
         """
-        Поиск пользователей по ID, username или имени
+        Поиск пользователей по ID, @username или имени (см. services/admin_search.py)
         """
-        # Попробуем сначала найти по ID (если query - число)
-        try:
-            user_id = int(query)
-            result = await self.session.execute(
-                select(User).where(User.user_id == user_id)
-            )
-            users = result.scalars().all()
-            if users:
-                return users
-        except ValueError:
-            pass  # Если query не число, продолжаем поиск по другим полям
-        except Exception:
-            # Обработка любых других ошибок (например, связанных с базой данных)
-            return []
-        
-        # Поиск по username или имени
-        try:
-            result = await self.session.execute(
-                select(User).where(
-                    or_(
-                        User.username.ilike(f"%{query}%"),
-                        User.full_name.ilike(f"%{query}%")
-                    )
-                )
-            )
-            return result.scalars().all()
-        except Exception:
-            # Обработка любых других ошибок (например, связанных с базой данных)
-            return []
+        return await admin_search.search_users(self.session, query)
     
-    async def get_users_paginated(self, page: int = 1, page_size: int = 10,
-                                 filters: dict = None) -> tuple[List[User], int]:
+    # Ключ сортировки списка пользователей (keyset-пагинация)
+    LIST_KEY = [User.user_id]
+
+    def _users_query(self, filters: dict = None):
+        """Запрос списка пользователей с фильтрами (общий для страницы и точного счетчика)"""
+        query = select(User)
+        if filters:
+            conditions = []
+            if filters.get('is_premium') is not None:
+                conditions.append(User.is_premium == filters['is_premium'])
+            if filters.get('date_from'):
+                conditions.append(User.created_at >= filters['date_from'])
+            if filters.get('date_to'):
+                conditions.append(User.created_at <= filters['date_to'])
+            if conditions:
+                query = query.where(and_(*conditions))
+        return query
+
+    async def get_users_page(self, request: PageRequest | None = None, page_size: int = 10,
+                             filters: dict = None) -> tuple[List[User], bool]:
         """
-        Получение списка пользователей с пагинацией
+        Страница пользователей (новые сверху) по курсору, без OFFSET и COUNT
+        :return: (пользователи, есть ли следующая страница)
         """
         try:
-            from sqlalchemy import or_
-            
-            offset = (page - 1) * page_size
-            
-            query = select(User).order_by(User.user_id.desc())
-            
-            # Применение фильтров
-            if filters:
-                conditions = []
-                if filters.get('is_premium') is not None:
-                    conditions.append(User.is_premium == filters['is_premium'])
-                if filters.get('date_from'):
-                    conditions.append(User.created_at >= filters['date_from'])
-                if filters.get('date_to'):
-                    conditions.append(User.created_at <= filters['date_to'])
-                
-                if conditions:
-                    query = query.where(and_(*conditions))
-            
-            # Получение пользователей
-            result = await self.session.execute(query.offset(offset).limit(page_size))
-            users = result.scalars().all()
-            
-            # Получение общего количества
-            count_query = select(func.count(User.user_id))
-            if filters:
-                count_conditions = []
-                if filters.get('is_premium') is not None:
-                    count_conditions.append(User.is_premium == filters['is_premium'])
-                if filters.get('date_from'):
-                    count_conditions.append(User.created_at >= filters['date_from'])
-                if filters.get('date_to'):
-                    count_conditions.append(User.created_at <= filters['date_to'])
-                
-                if count_conditions:
-                    count_query = count_query.where(and_(*count_conditions))
-            
-            total_count = await self.session.scalar(count_query)
-            
-            return users, total_count or 0
+            return await fetch_keyset_page(
+                self.session, self._users_query(filters), self.LIST_KEY, page_size, request
+            )
         except Exception:
             # Обработка любых ошибок (например, связанных с базой данных)
-            return [], 0
+            return [], False
+
+    async def estimate_users_total(self) -> int | None:
+        """Примерное число пользователей из статистики планировщика"""
+        return await estimate_total(self.session, "users")
+
+    async def count_users(self, filters: dict = None) -> int:
+        """Точное число пользователей (только по запросу админа)"""
+        return await count_exact(self.session, self._users_query(filters))
     
     async def get_user_detailed_info(self, user_id: int) -> Optional[Dict]:
         """
@@ -107,8 +72,9 @@ class UserService:
                 return None
             
             # Подсчет количества участий
+            participations = all_participations()
             participation_count = await self.session.scalar(
-                select(func.count(Participant.user_id)).where(Participant.user_id == user_id)
+                select(func.count(participations.c.user_id)).where(participations.c.user_id == user_id)
             )
             
             # Подсчет количества созданных розыгрышей
@@ -0,0 +1,221 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, func, union, except_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import User, UserSubscription, BroadcastDelivery
+from database.models.giveaway import Giveaway
+from database.requests.participant_repo import all_participations
+from database.requests.user_repo import reachable_users_clause
+
+
+class Audience(ABC):
+    """
+    Описание аудитории рассылки.
+    Каждая аудитория компилируется в SELECT с одной колонкой user_id,
+    комбинации (| и -) — в UNION / EXCEPT, так что итог считается одним запросом.
+    """
+    kind: str = ""
+    title: str = ""
+
+    @abstractmethod
+    def user_ids_query(self):
+        """SELECT с одной колонкой user_id"""
+
+    def to_spec(self) -> dict:
+        return {"kind": self.kind}
+
+    def __or__(self, other: "Audience") -> "Audience":
+        return UnionAudience([self, other])
+
+    def __sub__(self, other: "Audience") -> "Audience":
+        return ExcludeAudience(self, other)
+
+
+class AllUsers(Audience):
+    kind = "all"
+    title = "Все пользователи"
+
+    def user_ids_query(self):
+        return select(User.user_id.label("user_id"))
+
+
+class GiveawayParticipants(Audience):
+    kind = "giveaway"
+
+    def __init__(self, giveaway_id: int):
+        self.giveaway_id = giveaway_id
+        self.title = f"Участники розыгрыша #{giveaway_id}"
+
+    def user_ids_query(self):
+        # С учетом архива: рассылка по участникам давно завершенного розыгрыша
+        participations = all_participations()
+        return select(participations.c.user_id.label("user_id")).where(
+            participations.c.giveaway_id == self.giveaway_id
+        )
+
+    def to_spec(self) -> dict:
+        return {"kind": self.kind, "giveaway_id": self.giveaway_id}
+
+
+class ActiveCreators(Audience):
+    kind = "creators"
+    title = "Создатели активных розыгрышей"
+
+    def user_ids_query(self):
+        return select(Giveaway.owner_id.label("user_id")).where(
+            Giveaway.status == "active"
+        ).distinct()
+
+
+class PremiumUsers(Audience):
+    kind = "premium"
+    title = "Премиум-пользователи"
+
+    def user_ids_query(self):
+        now = datetime.now(timezone.utc)
+        return union(
+            select(User.user_id.label("user_id")).where(User.is_premium.is_(True)),
+            select(UserSubscription.user_id.label("user_id")).where(
+                UserSubscription.is_active.is_(True),
+                or_(UserSubscription.end_date.is_(None), UserSubscription.end_date > now)
+            )
+        )
+
+
+class ActiveUsers(Audience):
+    """Активные за N дней: регистрация, участие или розыгрыш, шедший в этот период"""
+    kind = "active"
+
+    def __init__(self, days: int):
+        self.days = days
+        self.title = f"Активные за {days} дн."
+
+    def user_ids_query(self):
+        since = datetime.now(timezone.utc) - timedelta(days=self.days)
+        participations = all_participations()
+        return union(
+            select(User.user_id.label("user_id")).where(User.created_at >= since),
+            select(participations.c.user_id.label("user_id")).where(participations.c.created_at >= since),
+            select(Giveaway.owner_id.label("user_id")).where(Giveaway.finish_time >= since)
+        )
+
+    def to_spec(self) -> dict:
+        return {"kind": self.kind, "days": self.days}
+
+
+class FailedRecipients(Audience):
+    """Получатели рассылки, которым доставка не удалась (для повторной отправки)"""
+    kind = "failed_of"
+
+    def __init__(self, broadcast_id: int):
+        self.broadcast_id = broadcast_id
+        self.title = f"Неудачные доставки рассылки #{broadcast_id}"
+
+    def user_ids_query(self):
+        return select(BroadcastDelivery.user_id.label("user_id")).where(
+            BroadcastDelivery.broadcast_id == self.broadcast_id,
+            BroadcastDelivery.outcome == "failed"
+        ).distinct()
+
+    def to_spec(self) -> dict:
+        return {"kind": self.kind, "broadcast_id": self.broadcast_id}
+
+
+class UnionAudience(Audience):
+    kind = "union"
+
+    def __init__(self, parts: list[Audience]):
+        # Разворачиваем вложенные объединения: (a | b) | c -> UNION(a, b, c)
+        self.parts = []
+        for part in parts:
+            self.parts.extend(part.parts if isinstance(part, UnionAudience) else [part])
+        self.title = " + ".join(part.title for part in self.parts)
+
+    def user_ids_query(self):
+        return union(*(part.user_ids_query() for part in self.parts))
+
+    def to_spec(self) -> dict:
+        return {"kind": self.kind, "parts": [part.to_spec() for part in self.parts]}
+
+
+class ExcludeAudience(Audience):
+    kind = "exclude"
+
+    def __init__(self, base: Audience, excluded: Audience):
+        self.base = base
+        self.excluded = excluded
+        self.title = f"{base.title} − {excluded.title}"
+
+    def user_ids_query(self):
+        return except_(self.base.user_ids_query(), self.excluded.user_ids_query())
+
+    def to_spec(self) -> dict:
+        return {"kind": self.kind, "base": self.base.to_spec(), "excluded": self.excluded.to_spec()}
+
+
+def audience_from_spec(spec: dict | None) -> Audience:
+    """Восстанавливает аудиторию из JSON-описания (None — все пользователи)"""
+    if not spec:
+        return AllUsers()
+
+    kind = spec.get("kind")
+    if kind == AllUsers.kind:
+        return AllUsers()
+    if kind == GiveawayParticipants.kind:
+        return GiveawayParticipants(int(spec["giveaway_id"]))
+    if kind == ActiveCreators.kind:
+        return ActiveCreators()
+    if kind == PremiumUsers.kind:
+        return PremiumUsers()
+    if kind == ActiveUsers.kind:
+        return ActiveUsers(int(spec["days"]))
+    if kind == FailedRecipients.kind:
+        return FailedRecipients(int(spec["broadcast_id"]))
+    if kind == UnionAudience.kind:
+        return UnionAudience([audience_from_spec(part) for part in spec["parts"]])
+    if kind == ExcludeAudience.kind:
+        return ExcludeAudience(audience_from_spec(spec["base"]), audience_from_spec(spec["excluded"]))
+    raise ValueError(f"Unknown audience kind: {kind}")
+
+
+def recipients_query(audience: Audience):
+    """Итоговый запрос получателей: аудитория ∩ достижимые пользователи"""
+    if isinstance(audience, AllUsers):
+        return select(User.user_id).where(reachable_users_clause()).order_by(User.user_id)
+
+    audience_ids = audience.user_ids_query().subquery("audience")
+    return (
+        select(User.user_id)
+        .join(audience_ids, audience_ids.c.user_id == User.user_id)
+        .where(reachable_users_clause())
+        .order_by(User.user_id)
+    )
+
+
+async def count_recipients(session: AsyncSession, audience: Audience) -> int:
+    """Предпросмотр: сколько получателей будет у рассылки"""
+    stmt = select(func.count()).select_from(recipients_query(audience).order_by(None).subquery())
+    return int(await session.scalar(stmt) or 0)
+
+
+async def iter_recipient_batches(session: AsyncSession, audience: Audience, batch_size: int = 1000):
+    """
+    Отдает получателей страницами по user_id (user_id > последний LIMIT n).
+    Каждая страница — своя короткая транзакция: пока рассылка идет часами,
+    не держим ни снимок, ни серверный курсор, ни соединение из пула.
+    """
+    last_id = None
+    while True:
+        stmt = recipients_query(audience).limit(batch_size)
+        if last_id is not None:
+            stmt = stmt.where(User.user_id > last_id)
+        batch = list((await session.scalars(stmt)).all())
+        # Конец транзакции: соединение возвращается в пул до следующей страницы
+        await session.rollback()
+        if not batch:
+            return
+        yield batch
+        if len(batch) < batch_size:
+            return
+        last_id = batch[-1]
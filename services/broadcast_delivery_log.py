@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import select, insert, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import async_session_maker
+from database.models import BroadcastDelivery
+from core.services.reachability_service import (
+    ReachabilityBuffer,
+    OUTCOME_SENT,
+    OUTCOME_BLOCKED,
+    OUTCOME_DEACTIVATED,
+    OUTCOME_FAILED
+)
+
+logger = logging.getLogger('broadcast')
+
+
+class DeliveryLogWriter:
+    """
+    Буфер журнала доставки.
+    Исходы копятся в памяти и записываются многострочным INSERT в фоне
+    (своей сессией), поэтому отправитель не ждет БД на каждом сообщении.
+    Одновременно выполняется не больше одной записи.
+    """
+
+    WRITE_ATTEMPTS = 3
+    # Пауза перед повтором, сек (растет с номером попытки)
+    WRITE_RETRY_DELAY = 2
+
+    def __init__(self, broadcast_id: int, flush_size: int = 500):
+        self.broadcast_id = broadcast_id
+        self.flush_size = flush_size
+        self._rows: list[dict] = []
+        self._reachability = ReachabilityBuffer(flush_size)
+        self._flush_task: asyncio.Task | None = None
+
+    def record(self, user_id: int, outcome: str, error_code: int | None = None):
+        self._rows.append({
+            "broadcast_id": self.broadcast_id,
+            "user_id": user_id,
+            "outcome": outcome,
+            "error_code": error_code,
+            "sent_at": datetime.now(timezone.utc),
+        })
+        self._reachability.record(user_id, outcome)
+
+    def is_full(self) -> bool:
+        return len(self._rows) >= self.flush_size
+
+    async def flush(self, wait: bool = False):
+        """
+        Передает накопленное фоновой записи.
+        :param wait: дождаться окончания записи (в конце рассылки)
+        """
+        # Предыдущая пачка еще пишется — ждем ее (естественный backpressure)
+        if self._flush_task:
+            await self._flush_task
+            self._flush_task = None
+
+        if self._rows:
+            rows, self._rows = self._rows, []
+            reachability, self._reachability = self._reachability, ReachabilityBuffer(self.flush_size)
+            self._flush_task = asyncio.create_task(self._write(rows, reachability))
+
+        if wait and self._flush_task:
+            await self._flush_task
+            self._flush_task = None
+
+    async def _write(self, rows: list[dict], reachability: ReachabilityBuffer):
+        """
+        Пишет пачку, при ошибке повторяет с паузой.
+        Если все попытки не удались — исключение уходит в flush() и прерывает рассылку:
+        без журнала ни итоговые счетчики, ни повтор по неудачным доставкам не будут верны.
+        """
+        for attempt in range(1, self.WRITE_ATTEMPTS + 1):
+            try:
+                async with async_session_maker() as session:
+                    await session.execute(insert(BroadcastDelivery), rows)
+                    await reachability.flush(session)
+                    await session.commit()
+                return
+            except Exception as e:
+                logger.error(
+                    f"Failed to write delivery log for broadcast #{self.broadcast_id} "
+                    f"({len(rows)} rows, attempt {attempt}/{self.WRITE_ATTEMPTS}): {e}"
+                )
+                if attempt == self.WRITE_ATTEMPTS:
+                    raise
+                await asyncio.sleep(self.WRITE_RETRY_DELAY * attempt)
+
+
+async def get_delivery_stats(session: AsyncSession, broadcast_id: int) -> dict:
+    """Счетчики рассылки из журнала доставки"""
+    result = await session.execute(
+        select(BroadcastDelivery.outcome, func.count())
+        .where(BroadcastDelivery.broadcast_id == broadcast_id)
+        .group_by(BroadcastDelivery.outcome)
+    )
+    by_outcome = dict(result.all())
+    return {
+        "sent_count": by_outcome.get(OUTCOME_SENT, 0),
+        "blocked_count": by_outcome.get(OUTCOME_BLOCKED, 0) + by_outcome.get(OUTCOME_DEACTIVATED, 0),
+        "failed_count": by_outcome.get(OUTCOME_FAILED, 0),
+    }
@@ -0,0 +1,49 @@
+"""Числовой поиск в админке (services/admin_search.py): ID за пределами INTEGER и странные цифры"""
+import pytest
+
+from services.admin_search import search_users, search_giveaways
+
+# ID Telegram давно вышли за 2^31
+BIG_USER_ID = 5000000000
+
+SEED = [
+    f"""
+    INSERT INTO users (user_id, username, full_name, is_premium, created_at)
+    VALUES (7, 'small', 'Small', false, now()), ({BIG_USER_ID}, 'big', 'Big', false, now())
+    """,
+    f"""
+    INSERT INTO giveaways (id, owner_id, channel_id, message_id, prize_text, winners_count, finish_time, status,
+                           is_referral_enabled, is_captcha_enabled, is_paid, is_participants_hidden,
+                           last_update_at, last_count)
+    VALUES (7, {BIG_USER_ID}, -100, 1, 'Prize', 1, now(), 'active', false, false, false, false, now(), 0),
+           (8, 7, -100, 2, 'Prize', 1, now(), 'active', false, false, false, false, now(), 0)
+    """,
+]
+
+pytestmark = [pytest.mark.integration, pytest.mark.asyncio]
+
+
+async def test_giveaways_by_big_owner_id(pg_session_maker):
+    async with pg_session_maker() as session:
+        found = await search_giveaways(session, str(BIG_USER_ID))
+    assert [gw.id for gw in found] == [7]
+
+
+async def test_giveaway_id_goes_first(pg_session_maker):
+    async with pg_session_maker() as session:
+        found = await search_giveaways(session, "#7")
+    # Розыгрыш #7, затем розыгрыши владельца с ID 7
+    assert [gw.id for gw in found] == [7, 8]
+
+
+async def test_users_by_big_id(pg_session_maker):
+    async with pg_session_maker() as session:
+        found = await search_users(session, str(BIG_USER_ID))
+    assert [user.user_id for user in found] == [BIG_USER_ID]
+
+
+@pytest.mark.parametrize("query", ["²", "#²³", "9" * 30])
+async def test_unparsable_numbers_find_nothing(pg_session_maker, query):
+    async with pg_session_maker() as session:
+        assert await search_giveaways(session, query) == []
+        assert await search_users(session, query) == []
@@ -0,0 +1,109 @@
+"""
+Вступление в розыгрыш через сессию middleware (LazySession):
+join_giveaway пишет в CTE под SELECT, и finish() все равно должен сделать COMMIT.
+"""
+import pytest
+from sqlalchemy import select, insert, update, func, table, column
+
+from database.models import Participant, PendingReferral
+from database.requests.participant_repo import join_giveaway
+from middlewares.db_session import LazySession, writes_data
+
+GIVEAWAY_ID = 1
+REFERRER_ID = 2
+USER_ID = 3
+
+SEED = [
+    """
+    INSERT INTO users (user_id, username, full_name, is_premium, created_at)
+    VALUES (1, 'owner', 'Owner', false, now()), (2, 'referrer', 'Referrer', false, now()),
+           (3, 'user', 'User', false, now()), (4, 'other', 'Other', false, now())
+    """,
+    """
+    INSERT INTO giveaways (id, owner_id, channel_id, message_id, prize_text, winners_count, finish_time, status,
+                           is_referral_enabled, is_captcha_enabled, is_paid, is_participants_hidden,
+                           last_update_at, last_count)
+    VALUES (1, 1, -100, 1, 'Prize', 1, now() + interval '1 day', 'active', true, false, false, false, now(), 0)
+    """,
+    "INSERT INTO participants (user_id, giveaway_id, created_at, tickets_count) VALUES (2, 1, now(), 1)",
+    "INSERT INTO pending_referrals (user_id, giveaway_id, referrer_id) VALUES (3, 1, 2)",
+]
+
+
+def test_writes_data_detects_dml_ctes():
+    t = table("t", column("a"))
+    inserted = insert(t).values(a=1).returning(t.c.a).cte("inserted")
+    updated = update(t).values(a=2).returning(t.c.a).cte("updated")
+    plain = select(t.c.a).cte("plain")
+
+    assert writes_data(select(inserted.c.a))
+    # CTE, на который SELECT не ссылается, подключен через add_cte
+    assert writes_data(select(plain.c.a).add_cte(updated))
+    assert not writes_data(select(plain.c.a))
+    assert not writes_data(select(t.c.a))
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_join_is_committed_by_finish(pg_session_maker):
+    session = LazySession()
+    session.maker = pg_session_maker
+    committed = []
+    session.after_commit(lambda: _record(committed))
+
+    try:
+        is_new, referrer = await join_giveaway(session, USER_ID, GIVEAWAY_ID, "T1")
+        assert (is_new, referrer) == (True, REFERRER_ID)
+        assert session.has_writes
+        await session.finish()
+    finally:
+        await session.close()
+    assert committed == [True]
+
+    async with pg_session_maker() as check:
+        tickets = dict((await check.execute(
+            select(Participant.user_id, Participant.tickets_count).where(Participant.giveaway_id == GIVEAWAY_ID)
+        )).all())
+        pending = await check.scalar(select(func.count()).select_from(PendingReferral))
+    assert tickets == {REFERRER_ID: 2, USER_ID: 1}
+    assert pending == 0
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_repeated_join_changes_nothing(pg_session_maker):
+    session = LazySession()
+    session.maker = pg_session_maker
+
+    try:
+        assert await join_giveaway(session, REFERRER_ID, GIVEAWAY_ID, "T2") == (False, None)
+        await session.finish()
+    finally:
+        await session.close()
+
+    async with pg_session_maker() as check:
+        count = await check.scalar(
+            select(func.count()).select_from(Participant)
+            .where(Participant.giveaway_id == GIVEAWAY_ID, Participant.user_id == REFERRER_ID)
+        )
+    assert count == 1
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_after_commit_skipped_without_commit(pg_session_maker):
+    session = LazySession()
+    session.maker = pg_session_maker
+    called = []
+    session.after_commit(lambda: _record(called))
+    try:
+        await session.scalar(select(func.count()).select_from(Participant))
+        assert not session.has_writes
+        await session.finish()
+    finally:
+        await session.close()
+    assert called == []
+
+
+async def _record(calls: list):
+    calls.append(True)
@@ -0,0 +1,180 @@
+"""
+Планы горячих запросов на реалистичном объеме данных.
+Нужна тестовая база (DB_DNS из test.sh); схему с данными готовит tests/conftest.py.
+
+    pytest tests/test_query_plans.py -m integration
+"""
+import re
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, select, asc
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import Giveaway, Winner
+from database.requests.participant_repo import get_user_participations_detailed, count_user_participations
+from database.requests.giveaway_repo import get_expired_active_giveaways, get_required_channels
+from database.requests.boost_repo import add_boost_ticket, user_has_boost_type
+
+pytestmark = [pytest.mark.integration, pytest.mark.asyncio]
+
+# Объем, при котором планировщик уже не выбирает Seq Scan "потому что таблица маленькая"
+USERS = 50000
+GIVEAWAYS = 20000
+PARTICIPANTS_PER_GIVEAWAY = 20
+BOOSTS = 50000
+
+# Таблицы, по которым в планах не должно быть Seq Scan
+HOT_TABLES = ("participants", "winners", "boost_tickets", "giveaways", "giveaway_required_channels")
+
+# Для планов важны не найденные строки, а путь к ним: id берем из середины диапазонов
+USER_ID = 25000
+GIVEAWAY_ID = 10001
+
+SEED = [
+    f"""
+    INSERT INTO users (user_id, username, full_name, is_premium, created_at)
+    SELECT u, 'user_' || u, 'User ' || u, u % 10 = 0, now() - (u || ' minutes')::interval
+    FROM generate_series(1, {USERS}) AS u
+    """,
+    # ~1% активных, из них каждый десятый уже просрочен; остальные завершены
+    f"""
+    INSERT INTO giveaways (id, owner_id, channel_id, message_id, prize_text, winners_count, finish_time, status,
+                           is_referral_enabled, is_captcha_enabled, is_paid, is_participants_hidden,
+                           last_update_at, last_count)
+    SELECT g, g % 2000 + 1, -100 - g % 500, g, 'Prize ' || g, 1,
+           CASE WHEN g % 1000 = 0 THEN now() - interval '1 hour'
+                WHEN g % 100 = 0 THEN now() + (g || ' minutes')::interval
+                ELSE now() - (g || ' minutes')::interval END,
+           CASE WHEN g % 100 = 0 THEN 'active' ELSE 'finished' END,
+           g % 3 = 0, false, false, false,
+           now() - (g % 600 || ' seconds')::interval, 0
+    FROM generate_series(1, {GIVEAWAYS}) AS g
+    """,
+    f"SELECT setval(pg_get_serial_sequence('giveaways', 'id'), {GIVEAWAYS})",
+    f"""
+    INSERT INTO participants (user_id, giveaway_id, created_at, tickets_count, referrer_id)
+    SELECT (g * 37 + s * 1009) % {USERS} + 1, g, now() - (g || ' minutes')::interval, 1 + s % 3,
+           CASE WHEN s % 4 = 0 THEN (g * 37 + (s - 1) * 1009) % {USERS} + 1 END
+    FROM generate_series(1, {GIVEAWAYS}) AS g, generate_series(1, {PARTICIPANTS_PER_GIVEAWAY}) AS s
+    """,
+    f"""
+    INSERT INTO winners (giveaway_id, user_id, created_at)
+    SELECT g, (g * 37 + 1009) % {USERS} + 1, now()
+    FROM generate_series(1, {GIVEAWAYS}) AS g
+    WHERE g % 100 <> 0
+    """,
+    # Один-два спонсора на розыгрыш
+    f"""
+    INSERT INTO giveaway_required_channels (giveaway_id, channel_id, channel_title, channel_link)
+    SELECT g, -1000 - (g + c) % 3000, 'Sponsor ' || c, 'https://t.me/sponsor_' || c
+    FROM generate_series(1, {GIVEAWAYS}) AS g, generate_series(1, 2) AS c
+    WHERE c = 1 OR g % 2 = 0
+    """,
+    f"""
+    INSERT INTO boost_tickets (user_id, giveaway_id, boost_type, issued_at, is_verified, created_at, updated_at)
+    SELECT (b * 37 + 1009) % {USERS} + 1, b % {GIVEAWAYS} + 1,
+           (ARRAY['premium', 'story', 'channel_boost'])[b % 3 + 1], now(), true, now(), now()
+    FROM generate_series(1, {BOOSTS}) AS b
+    ON CONFLICT DO NOTHING
+    """,
+]
+
+
+ANALYZE_TABLES = HOT_TABLES + ("users", "participants_archive")
+
+
+@pytest_asyncio.fixture
+async def session(pg_session_maker):
+    async with pg_session_maker() as session:
+        # Соединение до перехвата, чтобы служебные запросы при подключении не попали в выборку
+        await session.connection()
+        yield session
+        await session.rollback()
+
+
+async def explain(session: AsyncSession, call) -> list[str]:
+    """
+    Выполняет call(session) как есть, перехватывая SQL, который уходит в базу
+    (вместе с selectin-подгрузками), и возвращает EXPLAIN каждого запроса
+    """
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    sync_engine = session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        await call(session)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+
+    conn = await session.connection()
+    plans = []
+    for statement, parameters in statements:
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")):
+            continue
+        result = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        plans.append("\n".join(row[0] for row in result))
+    assert plans, "no statements captured"
+    return plans
+
+
+def assert_no_seq_scan(plans: list[str]):
+    for plan in plans:
+        for table in HOT_TABLES:
+            assert not re.search(rf"Seq Scan on {table}\b", plan), f"Seq Scan on {table}:\n{plan}"
+
+
+async def test_user_participations_detailed(session):
+    assert_no_seq_scan(await explain(session, lambda s: get_user_participations_detailed(s, USER_ID)))
+    assert_no_seq_scan(await explain(session, lambda s: get_user_participations_detailed(s, USER_ID, status="finished")))
+
+
+async def test_count_user_participations(session):
+    assert_no_seq_scan(await explain(session, lambda s: count_user_participations(s, USER_ID)))
+    assert_no_seq_scan(await explain(session, lambda s: count_user_participations(s, USER_ID, status="active")))
+
+
+async def test_won_giveaway_lookup(session):
+    # my_participations: выиграл ли пользователь конкретный розыгрыш (PK winners)
+    by_giveaway = select(Winner).where(Winner.giveaway_id == GIVEAWAY_ID, Winner.user_id == USER_ID)
+    # Все выигрыши пользователя (idx_winners_user_id)
+    by_user = select(Winner.giveaway_id).where(Winner.user_id == USER_ID)
+    assert_no_seq_scan(await explain(session, lambda s: s.execute(by_giveaway)))
+    assert_no_seq_scan(await explain(session, lambda s: s.execute(by_user)))
+
+
+async def test_smart_updater_queue(session):
+    # Тот же запрос, что в smart_update_giveaways (core/logic/game_actions.py)
+    stmt = (
+        select(Giveaway)
+        .where(Giveaway.status == "active")
+        .order_by(asc(Giveaway.last_update_at))
+        .limit(1)
+    )
+    plans = await explain(session, lambda s: s.scalar(stmt))
+    assert "idx_giveaways_active_last_update" in plans[0]
+    assert_no_seq_scan(plans)
+
+
+async def test_expired_active_giveaways(session):
+    plans = await explain(session, get_expired_active_giveaways)
+    # Активных мало: планировщик вправе взять и idx_giveaways_status, и (status, finish_time)
+    assert re.search(r"Index (Only )?Scan using idx_giveaways_status\w* on giveaways", plans[0]), plans[0]
+    assert_no_seq_scan(plans)
+
+
+async def test_boost_dedupe(session):
+    plans = await explain(session, lambda s: add_boost_ticket(s, USER_ID, GIVEAWAY_ID, "story"))
+    # Дубликаты отсекает уникальный индекс, а не предварительный SELECT
+    assert any("uq_boost_tickets_user_giveaway_type" in plan for plan in plans)
+    assert_no_seq_scan(plans)
+    assert_no_seq_scan(await explain(session, lambda s: user_has_boost_type(s, USER_ID, GIVEAWAY_ID, "story")))
+
+
+async def test_required_channels(session):
+    plans = await explain(session, lambda s: get_required_channels(s, GIVEAWAY_ID))
+    assert "idx_required_channels_giveaway_id" in plans[0]
+    assert_no_seq_scan(plans)
@@ -0,0 +1,148 @@
+"""
+Лимитеры админ-панели (utils/rate_limiter.py).
+Кольцевой буфер проверяется с подмененными часами, GCRA — на тестовом Redis (REDIS_URL из test.sh).
+"""
+import asyncio
+import uuid
+
+import pytest
+import pytest_asyncio
+
+from config import config
+from utils import rate_limiter
+from utils.rate_limiter import RateLimiter, RedisRateLimiter
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    # Подменяем только ссылку в модуле лимитера, event loop продолжает жить по настоящим часам
+    monkeypatch.setattr(rate_limiter, "time", fake)
+    return fake
+
+
+def test_allows_max_requests_then_denies(clock):
+    limiter = RateLimiter(max_requests=3, window=60)
+    assert [limiter.is_allowed(1) for _ in range(3)] == [True, True, True]
+    assert limiter.is_allowed(1) is False
+    # Отказ не занимает место в буфере
+    assert limiter.is_allowed(1) is False
+
+
+def test_reset_time_points_to_oldest_request(clock):
+    limiter = RateLimiter(max_requests=3, window=60)
+    assert limiter.get_reset_time(1) == 0
+
+    for _ in range(3):
+        clock.now += 10
+        assert limiter.is_allowed(1)
+    # Самый старый запрос был в 1010, окно закончится в 1070; сейчас 1030
+    assert limiter.get_reset_time(1) == pytest.approx(40)
+
+    clock.now = 1069.9
+    assert limiter.is_allowed(1) is False
+    clock.now = 1070
+    assert limiter.get_reset_time(1) == 0
+    assert limiter.is_allowed(1)
+    # Теперь старейший — запрос из 1020
+    assert limiter.get_reset_time(1) == pytest.approx(1020 + 60 - clock.now)
+
+
+def test_window_slides_one_slot_at_a_time(clock):
+    limiter = RateLimiter(max_requests=2, window=10)
+    assert limiter.is_allowed(1)
+    clock.now += 5
+    assert limiter.is_allowed(1)
+    clock.now += 5
+    # Освободился только слот первого запроса
+    assert limiter.is_allowed(1)
+    assert limiter.is_allowed(1) is False
+
+
+def test_keys_are_independent_and_bounded(clock):
+    limiter = RateLimiter(max_requests=1, window=60, max_keys=2)
+    assert limiter.is_allowed(1)
+    assert limiter.is_allowed(2)
+    assert limiter.is_allowed(1) is False
+
+    # Третий ключ вытесняет давно не активный (2), а не только что проверенный (1)
+    assert limiter.is_allowed(3)
+    assert list(limiter.requests) == [1, 3]
+    assert limiter.is_allowed(2)
+
+
+def test_hit_returns_wait_seconds(clock):
+    limiter = RateLimiter(max_requests=1, window=30)
+    assert asyncio.run(limiter.hit(1)) == 0
+    clock.now += 10
+    assert asyncio.run(limiter.hit(1)) == pytest.approx(20)
+
+
+# --- GCRA на Redis ---
+
+@pytest_asyncio.fixture
+async def redis():
+    from redis.asyncio import Redis
+
+    client = Redis.from_url(config.REDIS_URL)
+    try:
+        await client.ping()
+    except Exception as e:
+        await client.aclose()
+        pytest.skip(f"Test Redis is unavailable: {e}")
+    yield client
+    await client.aclose()
+
+
+@pytest_asyncio.fixture
+async def gcra(redis):
+    prefix = f"test_ratelimit:{uuid.uuid4().hex[:8]}"
+    yield RedisRateLimiter(redis, max_requests=5, window=1, prefix=prefix)
+    keys = [key async for key in redis.scan_iter(match=f"{prefix}:*")]
+    if keys:
+        await redis.delete(*keys)
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_gcra_burst_then_denies(gcra):
+    assert [await gcra.hit(1) for _ in range(5)] == [0] * 5
+    wait = await gcra.hit(1)
+    # Интервал 200 мс: следующий запрос пройдет не позже чем через него
+    assert 0 < wait <= 0.2
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_gcra_allows_after_wait(gcra):
+    for _ in range(5):
+        await gcra.hit(1)
+    wait = await gcra.hit(1)
+    assert wait > 0
+    await asyncio.sleep(wait + 0.02)
+    assert await gcra.hit(1) == 0
+    assert await gcra.hit(1) > 0
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_gcra_keys_are_independent_and_expire(gcra, redis):
+    for _ in range(5):
+        await gcra.hit(1)
+    assert await gcra.hit(1) > 0
+    assert await gcra.hit(2) == 0
+
+    # Ключ живет не дольше окна — после простоя Redis не хранит ничего
+    ttl_ms = await redis.pttl(f"{gcra.prefix}:1")
+    assert 0 < ttl_ms <= 1000
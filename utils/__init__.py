@@ -1,11 +1,12 @@
 from .admin_logger import log_admin_action
-from .rate_limiter import admin_rate_limiter, RateLimiter
+from .rate_limiter import admin_rate_limiter, RateLimiter, RedisRateLimiter
 from .exception_handler import handle_exceptions, admin_errors_handler
 
 __all__ = [
     "log_admin_action",
     "admin_rate_limiter",
     "RateLimiter",
+    "RedisRateLimiter",
     "handle_exceptions",
     "admin_errors_handler"
 ]
\ No newline at end of file
@@ -1,50 +1,126 @@
 import time
-from collections import defaultdict
-from typing import Dict
+from collections import OrderedDict
+
+from config import config
 
 
 class RateLimiter:
-    def __init__(self, max_requests: int = 10, window: int = 60):
+    """
+    Лимитер в памяти процесса: не больше max_requests за window секунд.
+    На каждый ключ — кольцевой буфер из max_requests отметок времени:
+    самая старая отметка лежит под указателем, так что проверка — O(1)
+    без пересборки списков. Ключей не больше max_keys, давно не активные
+    вытесняются (LRU), поэтому память не растет с числом пользователей.
+    """
+
+    def __init__(self, max_requests: int = 10, window: int = 60, max_keys: int = 10000):
         """
         Инициализация рейт-лимитера
         :param max_requests: максимальное количество запросов за окно
         :param window: размер окна в секундах
+        :param max_keys: сколько ключей держать в памяти
         """
         self.max_requests = max_requests
         self.window = window
-        self.requests: Dict[int, list] = defaultdict(list)
-    
+        self.max_keys = max_keys
+        # key -> [указатель, отметка_0, ..., отметка_{max_requests-1}]
+        self.requests: OrderedDict[int, list] = OrderedDict()
+
+    def _ring(self, user_id: int) -> list:
+        ring = self.requests.get(user_id)
+        if ring is None:
+            ring = [0] + [float("-inf")] * self.max_requests
+            self.requests[user_id] = ring
+            if len(self.requests) > self.max_keys:
+                self.requests.popitem(last=False)
+        else:
+            self.requests.move_to_end(user_id)
+        return ring
+
     def is_allowed(self, user_id: int) -> bool:
         """
         Проверяет, разрешен ли запрос для пользователя
         :param user_id: ID пользователя
         :return: True, если запрос разрешен, иначе False
         """
-        now = time.time()
-        # Удаляем старые запросы
-        self.requests[user_id] = [req_time for req_time in self.requests[user_id] if now - req_time < self.window]
-        
-        if len(self.requests[user_id]) < self.max_requests:
-            self.requests[user_id].append(now)
-            return True
-        
-        return False
-    
+        now = time.monotonic()
+        ring = self._ring(user_id)
+        pos = ring[0] + 1
+        # Самый старый из последних max_requests запросов еще в окне — лимит исчерпан
+        if now - ring[pos] < self.window:
+            return False
+        ring[pos] = now
+        ring[0] = pos % self.max_requests
+        return True
+
     def get_reset_time(self, user_id: int) -> float:
         """
         Возвращает время до сброса ограничения
         :param user_id: ID пользователя
         :return: время до сброса в секундах
         """
-        if user_id not in self.requests or not self.requests[user_id]:
+        ring = self.requests.get(user_id)
+        if ring is None:
+            return 0
+        return max(0, ring[ring[0] + 1] + self.window - time.monotonic())
+
+    async def hit(self, user_id: int) -> float:
+        """Общий интерфейс бэкендов: 0 — разрешено, иначе секунды до следующей попытки"""
+        if self.is_allowed(user_id):
             return 0
-        
-        oldest_request = min(self.requests[user_id])
-        reset_time = oldest_request + self.window
-        now = time.time()
-        
-        return max(0, reset_time - now)
+        return self.get_reset_time(user_id)
+
+
+# GCRA: в Redis хранится одно число на ключ — теоретическое время прибытия (TAT).
+# Запрос проходит, если TAT - now <= burst; тогда TAT сдвигается на интервал.
+# Возвращает 0 (разрешено) или мс до следующей возможной попытки.
+GCRA_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', key) or now)
+if tat < now then tat = now end
+local allow_at = tat - burst
+if now < allow_at then
+    return allow_at - now
+end
+local new_tat = tat + interval
+redis.call('SET', key, new_tat, 'PX', new_tat - now)
+return 0
+"""
+
+
+class RedisRateLimiter:
+    """
+    Лимитер, общий для всех процессов бота: GCRA одним вызовом Lua-скрипта.
+    Та же емкость, что у RateLimiter (max_requests подряд, дальше — равномерно
+    по window / max_requests), но один ключ с одним числом вместо журнала отметок.
+    """
+
+    def __init__(self, redis, max_requests: int = 10, window: int = 60, prefix: str = "ratelimit"):
+        self.redis = redis
+        self.prefix = prefix
+        self.interval_ms = int(window * 1000 / max_requests)
+        self.burst_ms = int(window * 1000) - self.interval_ms
+        self.script = redis.register_script(GCRA_LUA)
+
+    async def hit(self, user_id: int) -> float:
+        """0 — разрешено, иначе секунды до следующей попытки"""
+        wait_ms = await self.script(
+            keys=[f"{self.prefix}:{user_id}"],
+            args=[int(time.time() * 1000), self.interval_ms, self.burst_ms]
+        )
+        return int(wait_ms) / 1000
+
+
+def create_rate_limiter(max_requests: int, window: int, prefix: str):
+    """Лимитер по ADMIN_RATE_LIMIT_BACKEND: memory (один процесс) или redis (несколько)"""
+    if config.ADMIN_RATE_LIMIT_BACKEND == "redis":
+        from redis.asyncio import Redis
+        return RedisRateLimiter(Redis.from_url(config.REDIS_URL), max_requests, window, prefix)
+    return RateLimiter(max_requests=max_requests, window=window)
 
 
 # Глобальный лимитер для админ-панели
-admin_rate_limiter = RateLimiter(max_requests=20, window=60)  # 20 запросов в минуту для админов
\ No newline at end of file
+admin_rate_limiter = create_rate_limiter(max_requests=20, window=60, prefix="ratelimit:admin")  # 20 запросов в минуту для админов